@@ -1,51 +1,88 @@
+import os
 import subprocess
-import ollama
-import json
-import time
+import sys
+import concurrent.futures
 
-def ensure_ollama_is_ready():
-    """Checks if Docker container is running and model is pulled."""
+# Readiness polling, keep_alive, num_ctx and tokens/s reporting live in the
+# scraper's shared Ollama backend (my-job-board/webScraping/Scripts/common/llm_backends.py)
+SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'my-job-board', 'webScraping', 'Scripts')
+if SCRIPTS_DIR not in sys.path:
+    sys.path.insert(0, SCRIPTS_DIR)
+from common.batching import trim_boilerplate
+from common.json_stream import salvage_json_array
+from common.llm_backends import OLLAMA_PREFIX, get_backend
+
+MODEL = 'llama3.1:8b'
+JOBS_PER_REQUEST = 5    # small prompts finish sooner and keep every parallel slot busy
+
+backend = get_backend(OLLAMA_PREFIX + MODEL)
+
+def ensure_ollama_is_ready(timeout=60):
+    """Starts the container if Ollama does not answer, then waits for it and loads the model."""
     try:
-        # Check if the container 'ollama' is running
-        status = subprocess.check_output(['docker', 'inspect', '-f', '{{.State.Running}}', 'ollama'])
-        if b'true' not in status:
-            print("Starting Ollama container...")
-            subprocess.run(['docker', 'start', 'ollama'])
-            time.sleep(5) # Wait for service to boot
-    except subprocess.CalledProcessError:
-        print("Ollama container not found. Please run your 'docker run' command first.")
-
-def send_batch_to_local_llm(resume_text, jobs_batch):
-    """Sends a list of jobs to the local Docker model."""
-    
-    # Format the batch into a single string
+        backend.wait_until_ready(timeout=1)
+    except TimeoutError:
+        try:
+            # Check if the container 'ollama' is running
+            status = subprocess.check_output(['docker', 'inspect', '-f', '{{.State.Running}}', 'ollama'])
+            if b'true' not in status:
+                print("Starting Ollama container...")
+                subprocess.run(['docker', 'start', 'ollama'])
+        except (subprocess.CalledProcessError, FileNotFoundError):
+            print("Ollama container not found. Please run your 'docker run' command first.")
+    try:
+        backend.prepare(MODEL, timeout=timeout)
+    except (TimeoutError, RuntimeError) as e:
+        print(e)
+        return False
+    return True
+
+def score_jobs(resume_text, jobs):
+    """One request for a few (id, job) pairs. Returns the parsed results."""
     jobs_formatted = ""
-    for idx, job in enumerate(jobs_batch):
-        jobs_formatted += f"--- JOB ID: {idx} ---\n{job['full_description'][:1500]}\n"
+    for idx, job in jobs:
+        jobs_formatted += f"--- JOB ID: {idx} ---\n{trim_boilerplate(job['full_description'])}\n"
 
     prompt = f"""
-    SYSTEM: You are an ATS matching expert. 
-    Compare this RESUME to the following {len(jobs_batch)} JOBS.
-    
+    SYSTEM: You are an ATS matching expert.
+    Compare this RESUME to the following {len(jobs)} JOBS.
+
     RESUME:
     {resume_text}
-    
+
     JOBS TO ANALYZE:
     {jobs_formatted}
-    
+
     OUTPUT INSTRUCTIONS:
-    Return ONLY a JSON array of objects. 
+    Return ONLY a JSON array of objects.
     Each object: {{"id": int, "score": int, "reason": "string"}}
     """
 
-    # Sending the prompt via the Python library (which talks to Docker port 11434)
-    response = ollama.chat(model='llama3.1:8b', messages=[
-        {'role': 'user', 'content': prompt},
-    ])
-    
-    return response['message']['content']
+    # The backend's requests carry keep_alive and a num_ctx large enough for the whole prompt
+    response = backend.model(MODEL).generate_content(prompt)
+    results = salvage_json_array(response.text)
+    if not results:
+        print(f"Could not parse the answer for jobs {[idx for idx, _ in jobs]}")
+    return results
+
+def send_batch_to_local_llm(resume_text, jobs_batch, jobs_per_request=JOBS_PER_REQUEST, parallel=None):
+    """
+    Scores a list of jobs on the local model. The list is split into requests
+    of jobs_per_request jobs and `parallel` of them (default: the backend's,
+    ollamaParallel) are kept in flight, so the inference box never sits idle
+    between calls. Result ids are positions in jobs_batch.
+    """
+    numbered = list(enumerate(jobs_batch))
+    chunks = [numbered[i:i + jobs_per_request] for i in range(0, len(numbered), jobs_per_request)]
+    results = []
+    with concurrent.futures.ThreadPoolExecutor(max_workers=parallel or backend.parallel) as pool:
+        for batch_results in pool.map(lambda jobs: score_jobs(resume_text, jobs), chunks):
+            results.extend(batch_results)
+    print(f"Scored {len(jobs_batch)} jobs in {len(chunks)} requests: {backend.stats()}")
+    return results
 
 # --- EXECUTION ---
-ensure_ollama_is_ready()
-# result = send_batch_to_local_llm(my_resume, my_job_list[0:10])
-# print(result)
\ No newline at end of file
+if __name__ == "__main__":
+    ensure_ollama_is_ready()
+    # result = send_batch_to_local_llm(my_resume, my_job_list[0:10])
+    # print(result)
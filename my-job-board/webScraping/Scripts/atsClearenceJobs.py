@@ -1,23 +1,49 @@
 from pprint import pprint
-import re,time,random
+import re,time,random,threading
 import json,os
 import google.generativeai as genai
 # from playwright.sync_api import sync_playwright
 # from tqdm import tqdm
 from docx import Document
-from profileSettings import minSalary, minScore, atsBatchSize,llmModel
-import argparse, sys
+from profileSettings import minSalary, minScore, atsBatchSize, atsBatchTokenBudget, llmModel, llmConcurrency, llmCachedContext, llmStructuredOutput, cascadeModel, cascadeBand, prerankTopK, prerankMinSimilarity, userClearance, userPolygraph, userYearsExperience, requireRemote
+import argparse, sys, itertools
 current_dir = os.path.dirname(os.path.abspath(__file__))
 parent_dir = os.path.dirname(current_dir)
 if parent_dir not in sys.path:
     sys.path.insert(0, parent_dir)
 from common.helper import cprint
-
-
-def jitter():
-    jitterTime = random.uniform(3, 5)  # Random time between 3 to 5 seconds
-    print(f"Jittering for {jitterTime:.2f} seconds...",end='\r')
-    time.sleep(jitterTime)  # Random delay to mimic human behavior
+from common.jobstore import iter_jobs, count_jobs
+from common.jobdb import JobDB, score_cache_key
+from common.llm_scheduler import BatchScheduler
+from common.llm_client import get_llm_client, estimate_tokens, DEFAULT_USAGE_PATH
+from common.llm_backends import get_backend, FakeBackend
+from common.prerank import rank_jobs
+from common.rules import RuleEngine
+from common.features import parse_salary_column, requirements_frame
+from common.batching import index_batch, ResultMatcher, pack_batches, trim_boilerplate
+from common.json_stream import JSONArrayStream
+from common.llm_schema import MATCH_RESULTS_SCHEMA, check_match_result
+
+# Every LLM call goes through one quota-aware client per model (see
+# common/llm_client.py), whatever its backend: Gemini, a local Ollama model
+# ("ollama/llama3.1:8b") or the fake endpoint ("fake"). main() sets it up;
+# LLM_USAGE_PATH keeps the Gemini requests-per-day count across runs.
+LLM_USAGE_PATH = DEFAULT_USAGE_PATH
+llm_client = None
+# Bump whenever the scoring prompt changes, so cached scores from the old prompt are not reused
+PROMPT_VERSION = 5
+# How many times jobs the LLM left out of a response are re-sent in a smaller batch
+MAX_FOLLOWUP_ROUNDS = 2
+# Room left in a local model's context window for each scored job in the answer
+ANSWER_TOKENS_PER_JOB = 100
+# Jobs read and prefiltered (salary, rules) together; the extraction runs once per chunk
+PREFILTER_CHUNK = 1000
+# Send the resume and scoring rules once per session (cached context / system
+# instruction) instead of with every batch; main() sets it from llmCachedContext
+USE_CACHED_CONTEXT = llmCachedContext
+# Ask the backend for JSON that follows MATCH_RESULTS_SCHEMA (constrained decoding)
+USE_STRUCTURED_OUTPUT = llmStructuredOutput
+job_db = JobDB()
 
 # Setup API Key
 api_key = os.getenv("GENAI_API_KEY")
@@ -97,7 +123,6 @@ def get_model_selection():
 # with open("available_models.json", "w") as f:
 #     json.dump(models_list, f, indent=2)
 
-model = genai.GenerativeModel(llmModel)
 # model = genai.GenerativeModel('models/gemini-3-flash-preview')
 
 def parse_salary(s):
@@ -124,41 +149,27 @@ def parse_salary(s):
     except Exception:
         return 0
 
-def call_model_with_retries(prompt, max_retries=2, initial_backoff=1.0):
-    """Call the LLM and handle rate-limit (429) errors with retry delays.
+def call_model_with_retries(prompt, system_instruction=None):
+    """Call the LLM through the shared client.
 
-    The function will inspect exception messages for a suggested retry delay
-    (e.g. 'Please retry in 54.61s' or 'retry_delay { seconds: 54 }') and honor
-    that when present. Otherwise it uses exponential backoff.
+    The client waits for the model's RPM/TPM budget before sending, so 429s
+    are the exception; if one still comes back it honours the suggested retry
+    delay (e.g. 'Please retry in 54.61s') and otherwise backs off exponentially.
+    A system_instruction is set up once per session and not resent per call.
     """
-    model = genai.GenerativeModel('models/gemini-flash-lite-latest')
-    backoff = initial_backoff
-    for attempt in range(1, max_retries + 1):
-        try:
-            return model.generate_content(prompt)
-        except Exception as e:
-            text = str(e)
-            # If the LLM/HTTP client includes a suggested retry delay, parse it
-            m = re.search(r"Please retry in\s*(\d+(?:\.\d+)?)s", text)
-            if not m:
-                m = re.search(r"retry_delay\s*\{[^}]*seconds:\s*(\d+)\s*\}", text)
+    global llm_client
+    if llm_client is None:
+        llm_client = get_llm_client(llmModel, usage_path=LLM_USAGE_PATH)
+    return llm_client.generate(prompt, system_instruction=system_instruction)
 
-            if m:
-                # Use the provided delay (add a small buffer)
-                try:
-                    delay = float(m.group(1)) + 1.0
-                    print(f"Rate limit hit. Waiting {delay:.1f}s before retry (attempt {attempt}/{max_retries})")
-                    time.sleep(delay)
-                except KeyboardInterrupt:
-                    pass
-            else:
-                # Fallback exponential backoff
-                if attempt == max_retries:
-                    print(f"Max retries reached ({max_retries}). Raising error.")
-                    raise
-                print(f"Transient error calling model: {e}. Backing off {backoff:.1f}s (attempt {attempt}/{max_retries})")
-                time.sleep(backoff)
-                backoff *= 2
+def stream_model_with_retries(prompt, system_instruction=None, response_schema=None, client=None):
+    """Like call_model_with_retries, but yields the response text in pieces as the model writes it."""
+    global llm_client
+    if client is None:
+        if llm_client is None:
+            llm_client = get_llm_client(llmModel, usage_path=LLM_USAGE_PATH)
+        client = llm_client
+    return client.generate_stream(prompt, system_instruction=system_instruction, response_schema=response_schema)
 
 
 def match_roles(resume_text, jobs_json):
@@ -178,11 +189,11 @@ def match_roles(resume_text, jobs_json):
                  continue
             # Normalize salary value on the job dict for downstream use
             job['salary_min'] = salary
-            jitter()  # To avoid rate limiting
             print(f"Processing job: {job['role_name']} at {job['company']}")
             # Analyze the match between this resume and the job. 
+            resume_context = f"Resume Content: {resume_text}"
             prompt = f"""
-                Resume Content: {resume_text}
+                {'' if USE_CACHED_CONTEXT else resume_context}
 
                 Analyze the match for the following Job:
                 - Title: {job['role_name']}
@@ -202,22 +213,19 @@ def match_roles(resume_text, jobs_json):
                 {{
                 "score": (0-100),
                 "fit_reason": "One concise sentence explaining the match based on the rules above.",
-                "missing_skills": ["List only skills/certs explicitly missing from the resume"]
-                "matching_skills":["List only skills/certs explicitly present from the resume"]
+                "missing_skills": ["List only skills/certs explicitly missing from the resume"],
+                "matching_skills": ["List only skills/certs explicitly present from the resume"]
                 }}
                 """
             
             try:
-                response = call_model_with_retries(prompt)
+                response = call_model_with_retries(prompt, system_instruction=resume_context if USE_CACHED_CONTEXT else None)
                 # Clean and parse the LLM's JSON response
                 match_data = json.loads(response.text.replace('```json', '').replace('```', ''))
                 
                 # Combine original job data with LLM analysis
                 job.update(match_data)
                 results.append(job)
-                
-                # Rate limiting for free tier
-                time.sleep(1) 
             except Exception as e:
                 print(f"Error processing {job['role_name']}: {e}")
     except KeyboardInterrupt:
@@ -229,36 +237,25 @@ def chunk_list(data, chunk_size):
     for i in range(0, len(data), chunk_size):
         yield data[i:i + chunk_size]
 
-def match_roles_batched(resume_text, jobs_json, batch_size=25):
-    results = []
-    
-    # 1. Pre-filter by salary to save tokens/money
-    # Normalize salary_min to integer for all jobs (handles strings like "118,600.00")
-    for j in jobs_json:
-        j['salary']['min_val'] = parse_salary(j['salary'].get('min_val', 0))
-    print(len(jobs_json), "jobs loaded for batching.")
-    filtered_jobs = [j for j in jobs_json if j['salary'].get('min_val', 0) >= minSalary]
-    print(f"Filtered jobs to {len(filtered_jobs)} with salary >= ${minSalary}.")
-
-    for batch in chunk_list(filtered_jobs, batch_size):
-        # Create a simplified version of the jobs for the prompt to save tokens
-        job_summaries = []
-        for j in batch:
-            job_summaries.append({
-                "id": j.get('link'), # Use link or UUID as a key
-                "title": j.get('role_name'),
-                "description": j.get('full_description'),
-                "exp": j.get('years_exp_required'),
-                "clearance": j.get('clearance')
-            })
-
-        prompt = f"""
+def job_summary(job_id, j):
+    """Simplified version of a job for the prompt, to save tokens."""
+    return {
+        "id": job_id, # Compact numeric id, mapped back through the index
+        "title": j.get('role_name'),
+        "description": trim_boilerplate(j.get('full_description')),
+        "exp": j.get('years_exp_required'),
+        "clearance": j.get('clearance')
+    }
+
+def job_prompt_tokens(j):
+    """Estimated tokens a job adds to a batch prompt."""
+    return estimate_tokens(json.dumps(job_summary(0, j))) + 1
+
+def build_scoring_context(resume_text):
+    """The part of every batch prompt that does not change: the resume, the rules and the output format."""
+    return f"""
         Resume: {resume_text}
         ---
-        List of Jobs to Analyze:
-        {json.dumps(job_summaries)}
-        ---
-        
         CRITICAL LOGIC RULES:
             1. YEARS OF EXPERIENCE: Treat this as a 'minimum threshold.' If the resume shows MORE years (e.g., 10) than the job requires (e.g., 8), it is a PERFECT MATCH. Only penalize if resume < required.
             2. CLEARANCE MATCHING: 
@@ -266,64 +263,57 @@ def match_roles_batched(resume_text, jobs_json, batch_size=25):
             - 'Top Secret' matches and exceeds 'Secret'.
             - If the resume states an active clearance that meets or exceeds the job requirement, it is a 100% match for that criteria.
             3. SCORING: Weight the score heavily on Technical Skills, Years of Experience, and Clearance.
+            4. IDS: Return exactly one object per job, with the job's numeric "id" unchanged.
 
         Output Format:
             [
                 {{
-                "id": "original_id_here",
+                "id": 0,
                 "score": (0-100),
                 "fit_reason": "One concise sentence explaining the match based on the rules above.",
-                "missing_skills": ["List only skills/certs explicitly missing from the resume"]
-                "matching_skills":["List only skills/certs explicitly present from the resume"]
+                "missing_skills": ["List only skills/certs explicitly missing from the resume"],
+                "matching_skills": ["List only skills/certs explicitly present from the resume"]
                 }}
             ]
         """
 
-        # Task: Analyze the match between the resume and each job provided.
-        # Return a JSON list of objects. Each object MUST include the 'id' provided.
-        
-        # Output Format:
-        # [
-        #   {{
-        #     "id": "original_id_here",
-        #     "score": (0-100),
-        #     "fit_reason": "one sentence explanation",
-        #     "missing_skills": ["skill1", "skill2"]
-        #   }}
-        # ]
-
-        try:
-            print(f"Processing a batch of {len(batch)} jobs...")
-            response = call_model_with_retries(prompt)
-            
-            # Use regex or json.loads to clean the response
-            raw_text = response.text.replace('```json', '').replace('```', '').strip()
-            batch_results = json.loads(raw_text)
-
-            # Map results back to original data
-            for match_item in batch_results:
-                # Find the original job by ID to merge data
-                original_job = next((item for item in batch if item['link'] == match_item['id']), None)
-                if original_job:
-                    original_job.update(match_item)
-                    results.append(original_job)
-
-            time.sleep(2) # Respect free tier rate limits
-        except ConnectionError as e:
-            print(f"Error processing batch: {e}")
-            
-    return results
+def build_job_list_prompt(index):
+    """The per-batch part of the prompt; index is {numeric id: job} from index_batch()."""
+    job_summaries = [job_summary(job_id, j) for job_id, j in index.items()]
+    return f"""
+        List of Jobs to Analyze:
+        {json.dumps(job_summaries)}
+        """
 
-def match_roles_batched(resume_text, jobs_json, batch_size=25):
+def build_match_prompt(resume_text, index):
+    """
+    (prompt, system_instruction) for one batch. With USE_CACHED_CONTEXT the
+    scoring context is the system instruction, set up once per session, and
+    the prompt is only the job list; otherwise it is all in the prompt.
+    """
+    if USE_CACHED_CONTEXT:
+        return build_job_list_prompt(index), build_scoring_context(resume_text)
+    return build_scoring_context(resume_text) + build_job_list_prompt(index), None
+
+def split_by_score_cache(resume_text, jobs, model_name):
+    """(cached, uncached): the jobs already scored for this resume, prompt and model, and the rest."""
+    cache_keys = {j['link']: score_cache_key(resume_text, j.get('full_description') or '', PROMPT_VERSION, model_name) for j in jobs}
+    cached = job_db.get_cached_scores(cache_keys.values())
+    hits = [j for j in jobs if cache_keys[j['link']] in cached]
+    misses = [j for j in jobs if cache_keys[j['link']] not in cached]
+    return hits, misses
+
+def match_roles_batched(resume_text, jobs_json, batch_size=25, client=None, tier=1):
+    """
+    Scores jobs_json with the LLM (client, default: the run's llm_client).
+    Every scored job records the model as 'scored_by' and the cascade tier
+    that produced the score as 'score_tier'.
+    """
     results = []
     
     # --- NEW: Load the Tracking Data ---
-    # Path assumes server.py and this script can both see the same applied_jobs.json
-    tracker_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'applied_jobs.json'))
-    applied_ids = []
-    if os.path.exists(tracker_path):
-        with open(tracker_path, 'r') as f:
-            applied_ids = json.load(f)
+    # Applied jobs live in the shared SQLite database (see server.mark_applied)
+    applied_ids = set(job_db.applied_ids())
 
     # 1. Pre-filter by Salary AND Applied Status
     for j in jobs_json:
@@ -333,88 +323,91 @@ def match_roles_batched(resume_text, jobs_json, batch_size=25):
     filtered_jobs = [
         j for j in jobs_json 
         if j['salary'].get('min_val', 0) >= minSalary 
-        and j.get('jobId') not in applied_ids  # Skip what we've already done
+        and j.get('job_id') not in applied_ids  # Skip what we've already done
     ]
     
     print(f"Total jobs: {len(jobs_json)} | Filtered (Salary/Applied) down to: {len(filtered_jobs)}.")
 
-    # 2. Proceed with Chunking (unchanged, but now much faster)
-    for batch in chunk_list(filtered_jobs, batch_size):
-        # Create a simplified version of the jobs for the prompt to save tokens
-        job_summaries = []
-        for j in batch:
-            job_summaries.append({
-                "id": j.get('link'), # Use link or UUID as a key
-                "title": j.get('role_name'),
-                "description": j.get('full_description'),
-                "exp": j.get('years_exp_required'),
-                "clearance": j.get('clearance')
-            })
-
-        prompt = f"""
-        Resume: {resume_text}
-        ---
-        List of Jobs to Analyze:
-        {json.dumps(job_summaries)}
-        ---
-        
-        CRITICAL LOGIC RULES:
-            1. YEARS OF EXPERIENCE: Treat this as a 'minimum threshold.' If the resume shows MORE years (e.g., 10) than the job requires (e.g., 8), it is a PERFECT MATCH. Only penalize if resume < required.
-            2. CLEARANCE MATCHING: 
-            - 'Top Secret/SCI' matches and exceeds 'Top Secret'. 
-            - 'Top Secret' matches and exceeds 'Secret'.
-            - If the resume states an active clearance that meets or exceeds the job requirement, it is a 100% match for that criteria.
-            3. SCORING: Weight the score heavily on Technical Skills, Years of Experience, and Clearance.
-
-        Output Format:
-            [
-                {{
-                "id": "original_id_here",
-                "score": (0-100),
-                "fit_reason": "One concise sentence explaining the match based on the rules above.",
-                "missing_skills": ["List only skills/certs explicitly missing from the resume"]
-                "matching_skills":["List only skills/certs explicitly present from the resume"]
-                }}
-            ]
-        """
-
-        # Task: Analyze the match between the resume and each job provided.
-        # Return a JSON list of objects. Each object MUST include the 'id' provided.
-        
-        # Output Format:
-        # [
-        #   {{
-        #     "id": "original_id_here",
-        #     "score": (0-100),
-        #     "fit_reason": "one sentence explanation",
-        #     "missing_skills": ["skill1", "skill2"]
-        #   }}
-        # ]
-
-        try:
-            print(f"Processing a batch of {len(batch)} jobs...")
-            response = call_model_with_retries(prompt)
-            
-            # Use regex or json.loads to clean the response
-            raw_text = response.text.replace('```json', '').replace('```', '').strip()
-            batch_results = json.loads(raw_text)
-
-            # Map results back to original data
-            for match_item in batch_results:
-                original_job = next((item for item in batch if item['link'] == match_item['id']), None)
-                if original_job:
-                    original_job.update(match_item)
-                    results.append(original_job)
-
-                    # --- THE TAILORING TRIGGER ---
-                    if original_job['score'] >= minScore:
-                        print(f"🔥 High Match Found ({original_job['score']}%). Triggering Tailor script...")
-                        # Here you would call your tailoring function
-                        # generate_tailored_resume(resume_text, original_job
-
-            time.sleep(2) # Respect free tier rate limits
-        except ConnectionError as e:
-            print(f"Error processing batch: {e}")
+    # 2. Reuse scores for jobs already seen with this resume, prompt and model
+    client = client or llm_client
+    model_name = client.model_name if client else llmModel
+    cache_keys = {j['link']: score_cache_key(resume_text, j.get('full_description') or '', PROMPT_VERSION, model_name) for j in filtered_jobs}
+    cached = job_db.get_cached_scores(cache_keys.values())
+    to_score = []
+    for j in filtered_jobs:
+        hit = cached.get(cache_keys[j['link']])
+        if hit:
+            j.update(hit)
+            j.update(scored_by=model_name, score_tier=tier)
+            results.append(j)
+        else:
+            to_score.append(j)
+    if cached:
+        print(f"Score cache: {len(filtered_jobs) - len(to_score)} hits, {len(to_score)} jobs left for the LLM.")
+
+    # 3. Proceed with Chunking. Jobs the LLM skips are re-queued in a smaller
+    # follow-up batch (at most MAX_FOLLOWUP_ROUNDS times).
+    for batch in chunk_list(to_score, batch_size):
+        rounds = 0
+        while batch:
+            index = index_batch(batch)
+            prompt, system_instruction = build_match_prompt(resume_text, index)
+            # The response is parsed as it streams in: every complete result is
+            # merged right away, and a cut-off or partly malformed answer still
+            # keeps its complete results (the rest is re-queued below)
+            matcher = ResultMatcher(index)
+            stream = JSONArrayStream()
+            scored = {}
+            checked = {'repaired': 0, 'invalid': 0}
+            try:
+                print(f"Processing a batch of {len(batch)} jobs...")
+                schema = MATCH_RESULTS_SCHEMA if USE_STRUCTURED_OUTPUT else None
+                for text in stream_model_with_retries(prompt, system_instruction=system_instruction, response_schema=schema, client=client):
+                    for match_item in stream.feed(text):
+                        # Near-misses (e.g. "85%" as the score) are repaired in place;
+                        # records that cannot be repaired stay missing and are re-queued
+                        match_item, status = check_match_result(match_item)
+                        if status != 'valid':
+                            checked[status] += 1
+                        if match_item is None:
+                            continue
+                        job_id = matcher.add(match_item)
+                        if job_id is None:
+                            continue
+                        # Map results back to original data through the id index
+                        original_job = index[job_id]
+                        original_job.update({k: v for k, v in match_item.items() if k != 'id'})
+                        original_job.update(scored_by=model_name, score_tier=tier)
+                        results.append(original_job)
+                        scored[cache_keys[original_job['link']]] = match_item
+
+                        # --- THE TAILORING TRIGGER ---
+                        if original_job.get('score', 0) >= minScore:
+                            print(f"🔥 High Match Found ({original_job['score']}%). Triggering Tailor script...")
+                            # Here you would call your tailoring function
+                            # generate_tailored_resume(resume_text, original_job
+            except ConnectionError as e:
+                print(f"Error processing batch: {e}")
+                break
+            finally:
+                job_db.put_cached_scores(scored, model_name)
+
+            if not stream.complete:
+                print(f"  [!] Response was cut off; kept its {stream.items} complete results")
+            if stream.errors or checked['invalid']:
+                print(f"  [!] Skipped {stream.errors + checked['invalid']} malformed results")
+            if checked['repaired']:
+                print(f"  [!] Repaired {checked['repaired']} results that did not match the schema")
+            if matcher.duplicates or matcher.unknown:
+                print(f"  [!] Ignored {len(matcher.duplicates)} duplicate and {len(matcher.unknown)} unknown result ids")
+
+            batch = [index[job_id] for job_id in matcher.missing]
+            if batch:
+                rounds += 1
+                if rounds > MAX_FOLLOWUP_ROUNDS:
+                    cprint(f"  [!] {len(batch)} jobs still unscored after {MAX_FOLLOWUP_ROUNDS} follow-up batches; skipping them", color="red")
+                    break
+                print(f"  [!] {len(batch)} jobs missing from the response; re-queuing them")
             
     return results
 
@@ -472,6 +465,8 @@ def create_nested_master_json(data_list, filename=f"llm_data_ClearenceJobs.json"
         # Nest the role details under the role_name key within that company
         master_dict[company][role] = {
             "score": item.get('score'),
+            "scored_by": item.get('scored_by'),
+            "score_tier": item.get('score_tier'),
             "fit_reason": item.get('fit_reason'),
             "missing_skills": item.get('missing_skills'),
             "location": item['location'],
@@ -503,6 +498,8 @@ def update_grand_master(grand_master, batch_data):
         # Map the item to the specific nested structure
         grand_master[company][role] = {
             "score": item.get('score'),
+            "scored_by": item.get('scored_by'),
+            "score_tier": item.get('score_tier'),
             "fit_reason": item.get('fit_reason'),
             "missing_skills": item.get('missing_skills', []),
             "location": item.get('location', 'N/A'),
@@ -516,9 +513,38 @@ def update_grand_master(grand_master, batch_data):
 
 
 
-def main(selected_resume):
+def build_client(model_name, fake_llm_url=None, quota=None):
+    """The shared client for model_name on its backend (the fake endpoint when fake_llm_url is set)."""
+    backend = get_backend(model_name)
+    if fake_llm_url:
+        print(f"Using the fake LLM endpoint at {fake_llm_url}")
+        backend = FakeBackend(fake_llm_url)
+    print(f"LLM backend for {model_name}: {backend.name}")
+    backend.prepare(model_name)
+    # Only Gemini has a daily request budget worth keeping across runs
+    return get_llm_client(model_name, quota=quota, backend=backend,
+                          usage_path=LLM_USAGE_PATH if backend.name == 'gemini' else None)
+
+def main(selected_resume, concurrency: int = None, fake_llm_url: str = None, model_name: str = None, quota: dict = None, prerank: bool = True, cached_context: bool = llmCachedContext,
+         cascade_model: str = cascadeModel, cascade_band: float = cascadeBand, rules: bool = True):
+    global llm_client, USE_CACHED_CONTEXT
+    USE_CACHED_CONTEXT = cached_context
     import os,json
     import json
+    # One client for the whole run: the model handle is built once and every
+    # batch draws from the same RPM/TPM/RPD budget (quota overrides the table).
+    model_name = model_name or llmModel
+    llm_client = build_client(model_name, fake_llm_url, quota)
+    backend = llm_client.backend
+    # Local engines serve a fixed number of requests at once; keep that many in flight
+    concurrency = concurrency or backend.parallel or llmConcurrency
+    # Two-tier cascade: the stronger model only sees the jobs the first one scored close to minScore
+    cascade_client = None
+    if cascade_model and cascade_model != model_name:
+        cascade_client = build_client(cascade_model, fake_llm_url)
+        print(f"Cascade: scores within {cascade_band} points of {minScore} are re-scored by {cascade_model}.")
+    cascade = {'scored': 0, 'rescored': 0, 'flipped': 0, 'failed': 0}
+    cascade_lock = threading.Lock()
     # 4. Extract text from the chosen file
     print(f"✅ Selected: {selected_resume}")
     resume_text = extract_text_from_docx(f'{selected_resume}')
@@ -530,88 +556,152 @@ def main(selected_resume):
 
     # resume_text = extract_text_from_docx("kristopher-moye-resume 2026_01_16.docx")
     # print("Resume extracted. Length:", resume_text)
-    with open('C:\\Users\\kmoye\\3D Objects\\Dev_Mode\\webScraping\\JobData\\ClearanceJobs\\jobs_data.json', 'r') as f:
-        
-        jobs_json = json.load(f)
-    print(f"Loaded {len(jobs_json)} jobs from JSON.")
-    # Process the jobs in batches filled with qualifying jobs (salary >= minSalary) to improve LLM efficiency
-    out_dir = 'JobData/ClearanceJobs/llmIn'
-    os.makedirs(out_dir, exist_ok=True)
-    chunk_size = atsBatchSize  # target number of jobs per LLM batch
-    n = len(jobs_json)
-    idx = 0
-    batch_num = 1
-
-
-    # ... (your previous imports and function defs) ...
-
-    # resume_text = extract_text_from_docx("kristopher-moye-resume 2026_01_16.docx")
-    # with open('JobData/ClearanceJobs/jobs_data.json', 'r') as f:
-    #     jobs_json = json.load(f)
-
-    total_jobs = len(jobs_json)
-    print(f"Loaded {total_jobs} jobs from JSON.")
+    # Jobs come from whichever source is newer. The scraper appends to its
+    # JSON-lines store as each job finishes, so while a scrape is running the
+    # store is streamed (memory stays flat and the new jobs can already be
+    # analysed). Once the scrape has synced the store into the SQLite
+    # database, the salary/applied filter is an indexed query there.
+    jobs_path = os.path.join(parent_dir, 'JobData', 'ClearanceJobs', 'jobs_data.jsonl')
+    if not os.path.exists(jobs_path):
+        jobs_path = os.path.join(parent_dir, 'JobData', 'ClearanceJobs', 'jobs_data.json')
+    db_updated = job_db.jobs_updated_at()
+    store_updated = os.path.getmtime(jobs_path) if os.path.exists(jobs_path) else None
+    # scraped_at has whole seconds, the file time does not
+    if db_updated is not None and (store_updated is None or db_updated >= store_updated - 1):
+        total_jobs = job_db.count_jobs(min_salary=minSalary, exclude_applied=True)
+        print(f"Found {total_jobs} unapplied jobs paying at least {minSalary} in {job_db.path}.")
+        jobs_iter = job_db.iter_jobs(min_salary=minSalary, exclude_applied=True)
+    else:
+        total_jobs = count_jobs(jobs_path)
+        print(f"Found {total_jobs} jobs in {jobs_path}.")
+        jobs_iter = iter_jobs(jobs_path)
 
     out_dir = 'JobData/ClearanceJobs/llmIn'
     os.makedirs(out_dir, exist_ok=True)
     grand_master_dict = {}
-    chunk_size = atsBatchSize 
-    idx = 0
-    batch_num = 1
-    qualifying_count = 0
-    while idx < total_jobs:
-        batch = []
-        batch_start = idx
-        
-        # Inner loop to fill the batch
-        while idx < total_jobs and len(batch) < chunk_size:
-            job = jobs_json[idx]
-            salary_val = parse_salary(job.get('salary', {}).get('min_val', 0))
-            
-            if salary_val >= minSalary:
-                batch.append(job)
-                qualifying_count += 1
-            
-            idx += 1
-        
-        if not batch:
-            print("\n[!] No more qualifying jobs found in the remaining data.")
-            break
-
-        # --- PROGRESS CALCULATION ---
-        percent_complete = (idx / total_jobs) * 100
-        # Create a simple visual bar [##########----------]
-        bar_length = 20
-        filled = int(round(bar_length * idx / float(total_jobs)))
-        bar = '█' * filled + '-' * (bar_length - filled)
-
-        print(f"\n{'='*60}")
-        print(f"BATCH {batch_num} | Progress: [{bar}] {percent_complete:.1f}%")
-        print(f"Examining Index: {batch_start} to {idx-1}")
-        print(f"Batch Size: {len(batch)} qualifying roles found so far")
-        print(f"Total Qualified: {qualifying_count} / Total Scanned: {idx}")
-        print(f"{'='*60}")
-
-        try:
-            # Pass the batch to the LLM
-            data_list = match_roles_batched(resume_text, batch, batch_size=len(batch))
-            grand_master_dict = update_grand_master(grand_master_dict, data_list)
-
-            out_path = os.path.join(out_dir, f"llm_data_ClearenceJobs_{batch_num}.json")
-            create_nested_master_json(data_list, out_path)
-            cprint(f"Successfully saved {out_path}", color="green")
-            
-        except ConnectionError as e:
-            cprint(f"Error processing batch {batch_num}: {e}", color="red")
-            break
-            # Partial save logic here...
+    scan = {'scanned': 0, 'qualified': 0}
+    # Hard constraints from profileSettings (clearance, polygraph, years, remote):
+    # jobs that break one are rejected here and never reach the pre-ranker or the LLM
+    rule_engine = RuleEngine(clearance=userClearance, polygraph=userPolygraph, max_years=userYearsExperience,
+                             remote_only=requireRemote) if rules else RuleEngine()
 
-        batch_num += 1
+    def qualifying_jobs():
+        """
+        Jobs paying at least minSalary that pass the rule prefilter, read
+        lazily. Salaries and requirements are extracted a chunk at a time
+        (common.features) instead of one regex pass per job and field.
+        """
+        while True:
+            chunk = list(itertools.islice(jobs_iter, PREFILTER_CHUNK))
+            if not chunk:
+                return
+            scan['scanned'] += len(chunk)
+            salaries = parse_salary_column([job.get('salary', {}).get('min_val', 0) for job in chunk])
+            chunk = [job for job, salary in zip(chunk, salaries) if salary >= minSalary]
+            if rule_engine.active and chunk:
+                requirements = requirements_frame(chunk).to_dict('records')
+                chunk = [job for job, req in zip(chunk, requirements)
+                         if not rule_engine.reject_reason(job, requirements=req)]
+            scan['qualified'] += len(chunk)
+            yield from chunk
+
+    jobs_to_score = qualifying_jobs()
+    if prerank:
+        # Ranking needs every description at once: score them all locally
+        # against the resume and only send the best matches to the LLM. Jobs
+        # the score cache already holds cost no LLM call, so they skip the
+        # ranking (and its cap) and are always kept.
+        cached, candidates = split_by_score_cache(resume_text, list(jobs_to_score), llm_client.model_name)
+        ranked, _ = rank_jobs(resume_text, candidates, top_k=prerankTopK, min_similarity=prerankMinSimilarity)
+        jobs_to_score = cached + ranked
+        print(f"Pre-ranker kept {len(ranked)} of {len(candidates)} uncached qualifying jobs for the LLM "
+              f"({len(cached)} more are in the score cache).")
+
+    # Fill each request up to the token budget instead of a fixed job count:
+    # long postings get smaller batches, short ones are packed densely. The
+    # resume and rules come off the top unless the model handle really holds
+    # them as an uploaded context cache (see LLMClient.request_tokens).
+    prompt_overhead = llm_client.request_tokens(*build_match_prompt(resume_text, {}))
+    job_budget = max(1, atsBatchTokenBudget - prompt_overhead)
+    # A local model's context window has to hold the whole request (instruction,
+    # job list and answer); anything beyond it is cut from the front of the prompt
+    context_window = getattr(backend, 'num_ctx', None)
+    if context_window:
+        full_overhead = estimate_tokens(build_scoring_context(resume_text) + build_job_list_prompt({}))
+        job_budget = max(1, min(job_budget, context_window - full_overhead - ANSWER_TOKENS_PER_JOB * atsBatchSize))
+    batches = pack_batches(jobs_to_score, job_budget, token_fn=job_prompt_tokens, max_jobs=atsBatchSize)
+
+    def score_batch(batch):
+        data_list = match_roles_batched(resume_text, batch, batch_size=len(batch))
+        if cascade_client is None:
+            return data_list
+        # Tier 2: most jobs are clear rejects (or clear matches); only the
+        # ones near the threshold are worth the stronger model
+        uncertain = [j for j in data_list if abs(j.get('score', 0) - minScore) <= cascade_band]
+        passed = {j['link']: j.get('score', 0) >= minScore for j in uncertain}
+        failed = False
+        if uncertain:
+            try:
+                match_roles_batched(resume_text, uncertain, batch_size=len(uncertain), client=cascade_client, tier=2)
+            except Exception as e:
+                # Keep the tier-1 scores (e.g. the stronger model's daily quota ran out)
+                cprint(f"Cascade re-scoring failed, keeping tier-1 scores: {e}", color="yellow")
+                failed = True
+        rescored = [j for j in uncertain if j.get('score_tier') == 2]
+        with cascade_lock:
+            cascade['failed'] += failed
+            cascade['scored'] += len(data_list)
+            cascade['rescored'] += len(rescored)
+            cascade['flipped'] += sum(1 for j in rescored if (j.get('score', 0) >= minScore) != passed[j['link']])
+        return data_list
+
+    # Keep several batches in flight at once; the client paces each call to the
+    # model's RPM/TPM quota. Results are merged and saved as each batch comes back.
+    scheduler = BatchScheduler(score_batch, max_in_flight=concurrency)
+    print(f"Scoring with {model_name}, up to {concurrency} batches in flight ({llm_client.quota}), "
+          f"~{atsBatchTokenBudget} prompt tokens and at most {atsBatchSize} jobs per batch.")
+    if USE_CACHED_CONTEXT:
+        print("Resume and scoring rules are sent once as a cached context; batches only carry the job list.")
+
+    for batch_num, batch, data_list, error in scheduler.run(batches):
+        if error is not None:
+            cprint(f"Error processing batch {batch_num}: {error}", color="red")
+            continue
+
+        grand_master_dict = update_grand_master(grand_master_dict, data_list)
+        job_db.save_analyses(data_list, model=model_name, resume=os.path.basename(selected_resume))
+
+        out_path = os.path.join(out_dir, f"llm_data_ClearenceJobs_{batch_num}.json")
+        create_nested_master_json(data_list, out_path)
+
+        # --- PROGRESS ---
+        # total_jobs is a snapshot; a scrape still running can push the scan past it
+        total_jobs = max(total_jobs, scan['scanned'])
+        percent_complete = (scan['scanned'] / total_jobs) * 100 if total_jobs else 100.0
+        cprint(f"BATCH {batch_num} saved to {out_path} | {len(batch)} roles (~{prompt_overhead + sum(map(job_prompt_tokens, batch))} tokens) | scanned {scan['scanned']}/{total_jobs} ({percent_complete:.1f}%) | qualified {scan['qualified']}", color="green")
+
+    if not scan['qualified']:
+        print("\n[!] No qualifying jobs found.")
     print(out_dir)
     final_output_path = os.path.join(out_dir, "MASTER_ANALYSIS.json")
     with open(final_output_path, 'w', encoding='utf-8') as f:
         json.dump(grand_master_dict, f, indent=4)
-    print(f"\n✅ Finished. Total scanned: {idx}/{total_jobs}. Total qualified for LLM: {qualifying_count}")
+    print(f"\n✅ Finished. Total scanned: {scan['scanned']}/{total_jobs}. Total qualified for LLM: {scan['qualified']}")
+    if rule_engine.active:
+        print(f"{rule_engine.summary()}.")
+    print(f"LLM scheduler: {scheduler.stats()}")
+    print(f"LLM client: {llm_client.stats()}")
+    backend_stats = backend.stats()
+    if backend_stats:
+        print(f"LLM backend ({backend.name}): {backend_stats}")
+    if cascade_client is not None:
+        print(f"Cascade: {cascade['rescored']} of {cascade['scored']} scored jobs re-scored by {cascade_model}, "
+              f"{cascade['flipped']} of them crossed minScore ({minScore}).")
+        if cascade['failed']:
+            cprint(f"Cascade: re-scoring failed for {cascade['failed']} batches; they kept their tier-1 scores.", color="red")
+        print(f"LLM client ({cascade_model}): {cascade_client.stats()}")
+        cascade_client.close()
+    llm_client.close()
 
 def resumeFromUI():
     # 1. Initialize the Argument Parser
@@ -622,7 +712,16 @@ def resumeFromUI():
     # parser.add_argument("--link", type=str, required=True, help="URL of the job posting")
 
     parser.add_argument("--resume_path", type=str, required=True, help="resume used for analysis")
-    parser.add_argument("--model", type=str, required=True, help="LLM model used for analysis")
+    parser.add_argument("--model", type=str, required=True, help="LLM model used for analysis: a Gemini model, ollama/<local model> or fake")
+    parser.add_argument("--concurrency", type=int, default=None, help=f"LLM batches kept in flight at once (default: the backend's parallelism, else {llmConcurrency})")
+    parser.add_argument("--fake-llm", dest="fake_llm", type=str, default=None, help="URL of a local fake LLM endpoint (see common/fake_llm.py) to use instead of Gemini")
+    parser.add_argument("--rpm", type=float, default=None, help="Override the model's requests-per-minute quota (e.g. for a paid tier)")
+    parser.add_argument("--tpm", type=float, default=None, help="Override the model's tokens-per-minute quota")
+    parser.add_argument("--no-cached-context", dest="no_cached_context", action="store_true", help="Resend the resume and scoring rules with every batch instead of once per session")
+    parser.add_argument("--cascade-model", dest="cascade_model", type=str, default=cascadeModel, help="Stronger model that re-scores jobs near minScore (two-tier cascade)")
+    parser.add_argument("--cascade-band", dest="cascade_band", type=float, default=cascadeBand, help="Re-score jobs whose first score is within this many points of minScore")
+    parser.add_argument("--no-rules", dest="no_rules", action="store_true", help="Skip the clearance/polygraph/experience/remote prefilter from profileSettings")
+    parser.add_argument("--no-prerank", dest="no_prerank", action="store_true", help="Send every qualifying job to the LLM instead of only the locally pre-ranked best matches")
     # parser.add_argument("--model", type=str, required=True, help="Gemini model ID to use")
 
     args = parser.parse_args()
@@ -630,10 +729,13 @@ def resumeFromUI():
     # 3. Use the data in your script
     print(f"--- Starting Analysis Pipeline ---")
     print(f"LLM Model: {args.model}")
-    return args.resume_path
+    return args
 ####################################################
 # Usage
-main(resumeFromUI())
+ui_args = resumeFromUI()
+quota_override = {k: v for k, v in {'rpm': ui_args.rpm, 'tpm': ui_args.tpm}.items() if v}
+main(ui_args.resume_path, concurrency=ui_args.concurrency, fake_llm_url=ui_args.fake_llm, model_name=ui_args.model, quota=quota_override, prerank=not ui_args.no_prerank, cached_context=llmCachedContext and not ui_args.no_cached_context,
+     cascade_model=ui_args.cascade_model, cascade_band=ui_args.cascade_band, rules=not ui_args.no_rules)
 # if __name__ == "__main__":
 
 #     import os
@@ -0,0 +1,77 @@
+import asyncio
+import time
+
+from common.fetch import DEFAULT_HEADERS, DEFAULT_TIMEOUT, MAX_RETRIES
+from common.ratelimit import BACKOFF_STATUSES, get_limiter, parse_retry_after
+
+try:
+    import httpx
+except ImportError:  # optional: only needed for the --async scrape mode
+    httpx = None
+
+DEFAULT_CONCURRENCY = 100  # requests allowed in flight at once
+
+
+class AsyncFetcher:
+    """
+    Coroutine counterpart to common.fetch: one shared httpx.AsyncClient
+    (so one connection pool) with a semaphore capping in-flight requests.
+    Requests are paced by the same per-host limiters as the threaded fetch.
+
+    Usage:
+        async with AsyncFetcher(concurrency=200) as fetcher:
+            html = await fetcher.fetch_text(url)
+    """
+
+    def __init__(self, concurrency: int = DEFAULT_CONCURRENCY, timeout: float = None, headers: dict = None):
+        if httpx is None:
+            raise ImportError("Async mode needs httpx. Install it with: pip install httpx")
+        self.concurrency = concurrency
+        self.timeout = timeout or DEFAULT_TIMEOUT
+        self.headers = {**DEFAULT_HEADERS, **(headers or {})}
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._client = None
+
+    async def __aenter__(self):
+        limits = httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+        self._client = httpx.AsyncClient(headers=self.headers, timeout=self.timeout, limits=limits, follow_redirects=True)
+        return self
+
+    async def __aexit__(self, *exc):
+        await self._client.aclose()
+        self._client = None
+
+    async def fetch(self, url: str, headers: dict = None, retries: int = MAX_RETRIES) -> "httpx.Response":
+        """GET `url` once the host's limiter and a concurrency slot allow it (retrying 429/503)."""
+        limiter = get_limiter(url)
+        for attempt in range(retries + 1):
+            await limiter.acquire_async()
+            async with self._semaphore:
+                started = time.monotonic()
+                try:
+                    response = await self._client.get(url, headers=headers)
+                except httpx.HTTPError:
+                    limiter.record(None)
+                    raise
+            limiter.record(response.status_code, time.monotonic() - started, parse_retry_after(response.headers.get('Retry-After')))
+            if response.status_code not in BACKOFF_STATUSES or attempt == retries:
+                return response
+
+    async def fetch_text(self, url: str, headers: dict = None, cache=None) -> str:
+        """
+        GET `url` and return the body, raising on HTTP errors.
+        cache: optional common.http_cache.HttpCache, used the same way as
+        common.fetch.fetch_text (fresh hit, 304 revalidation, or store).
+        """
+        if cache is None:
+            response = await self.fetch(url, headers=headers)
+            response.raise_for_status()
+            return response.text
+
+        body, request_headers = cache.prepare(url, headers)
+        if body is not None:
+            return body
+        body = cache.complete(url, await self.fetch(url, headers=request_headers))
+        if body is None:
+            body = cache.complete(url, await self.fetch(url, headers=headers))
+        return body
@@ -0,0 +1,123 @@
+import re
+
+from common.llm_client import estimate_tokens
+
+# Sections of a posting that say nothing about fit: EEO statements, benefits,
+# company blurbs. A heading matching BOILERPLATE_HEADING drops its section up
+# to the next heading; a line matching BOILERPLATE_LINE is dropped on its own.
+BOILERPLATE_HEADING = re.compile(
+    r"^\W*(benefits|perks|what we offer|why (join|work)|about (us|the company|our company)|who we are|our company"
+    r"|equal (employment )?opportunity|eeo|pay transparency|compensation (and|&) benefits)\b", re.I)
+BOILERPLATE_LINE = re.compile(
+    r"equal opportunity employer|without regard to (race|color|religion|sex)|reasonable accommodation"
+    r"|e-verify|protected veteran|pay transparency|drug[- ]free workplace", re.I)
+MAX_HEADING_WORDS = 8
+
+
+def _is_heading(line: str) -> bool:
+    """Short line that opens a section, e.g. 'Benefits:' or 'REQUIRED SKILLS'."""
+    words = line.split()
+    return 0 < len(words) <= MAX_HEADING_WORDS and (line.endswith(':') or line.isupper() or BOILERPLATE_HEADING.match(line) is not None)
+
+
+def trim_boilerplate(text: str) -> str:
+    """The description without its boilerplate sections and lines (see BOILERPLATE_HEADING)."""
+    if not text:
+        return ''
+    kept = []
+    skipping = False
+    for line in text.splitlines():
+        stripped = line.strip()
+        if _is_heading(stripped):
+            skipping = BOILERPLATE_HEADING.match(stripped) is not None
+            if skipping:
+                continue
+        if skipping or BOILERPLATE_LINE.search(stripped):
+            continue
+        kept.append(line)
+    return '\n'.join(kept).strip()
+
+
+def pack_batches(jobs, token_budget: int, token_fn=estimate_tokens, max_jobs: int = None):
+    """
+    Greedily fills batches up to `token_budget` prompt tokens, lazily.
+
+    token_fn(job) -> the job's share of the prompt in tokens. A batch is
+    closed when the next job would push it over the budget or when it holds
+    max_jobs jobs (None = no cap, the budget alone decides). A job larger than
+    the whole budget still goes out, alone in its batch.
+    """
+    batch, used = [], 0
+    for job in jobs:
+        tokens = token_fn(job)
+        if batch and (used + tokens > token_budget or (max_jobs and len(batch) >= max_jobs)):
+            yield batch
+            batch, used = [], 0
+        batch.append(job)
+        used += tokens
+    if batch:
+        yield batch
+
+
+def index_batch(batch: list) -> dict:
+    """
+    Gives every job in a batch a compact numeric id (0, 1, 2, ...) for the
+    prompt. Returns {id: job}; the LLM echoes the id back and the result is
+    found with one dict lookup instead of a scan of the batch.
+    """
+    return dict(enumerate(batch))
+
+
+def _parse_id(raw):
+    """The LLM may echo 3 as 3, "3" or " 3 ". Returns the int, or None if it is not one."""
+    if isinstance(raw, bool):
+        return None
+    if isinstance(raw, int):
+        return raw
+    try:
+        return int(str(raw).strip())
+    except (TypeError, ValueError):
+        return None
+
+
+class ResultMatcher:
+    """
+    Matches the LLM's result items to an indexed batch one at a time, so
+    results can be used while the rest of the response is still arriving.
+
+        matched     {id: result item} for the first result seen for each id
+        missing     ids in the batch the LLM has not answered (re-queue these)
+        duplicates  ids answered more than once (only the first answer is kept)
+        unknown     raw ids that are not in the batch (mangled or invented)
+    """
+
+    def __init__(self, index: dict):
+        self.index = index
+        self.matched, self.duplicates, self.unknown = {}, [], []
+
+    def add(self, item):
+        """Records one result item. Returns the batch id it answers, or None if it is not used."""
+        if not isinstance(item, dict):
+            self.unknown.append(item)
+            return None
+        job_id = _parse_id(item.get('id'))
+        if job_id not in self.index:
+            self.unknown.append(item.get('id'))
+        elif job_id in self.matched:
+            self.duplicates.append(job_id)
+        else:
+            self.matched[job_id] = item
+            return job_id
+        return None
+
+    @property
+    def missing(self) -> list:
+        return [job_id for job_id in self.index if job_id not in self.matched]
+
+
+def reconcile_results(results: list, index: dict):
+    """Matches a complete list of result items; returns (matched, missing, duplicates, unknown) as in ResultMatcher."""
+    matcher = ResultMatcher(index)
+    for item in results:
+        matcher.add(item)
+    return matcher.matched, matcher.missing, matcher.duplicates, matcher.unknown
@@ -0,0 +1,121 @@
+import glob
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+
+def atomic_write_json(path: str, data, indent: int = None):
+    """Writes JSON to a temp file and renames it over `path`, so readers never see a partial file."""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=indent)
+    os.replace(tmp_path, path)
+
+
+_file_locks = {}
+_file_locks_guard = threading.Lock()
+
+
+@contextmanager
+def file_lock(path: str, timeout: float = 10.0, stale_after: float = 60.0):
+    """
+    Exclusive lock on `path` across threads and processes, held as a
+    `path`.lock file created with O_EXCL. A lock file older than stale_after
+    seconds is left over from a crashed process and is taken over; after
+    timeout seconds the caller goes ahead without the lock.
+    """
+    with _file_locks_guard:
+        thread_lock = _file_locks.setdefault(os.path.abspath(path), threading.Lock())
+    lock_path = f'{path}.lock'
+    os.makedirs(os.path.dirname(lock_path) or '.', exist_ok=True)
+    with thread_lock:
+        deadline = time.monotonic() + timeout
+        held = False
+        while not held:
+            try:
+                os.close(os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                held = True
+            except FileExistsError:
+                try:
+                    if time.time() - os.path.getmtime(lock_path) > stale_after:
+                        os.remove(lock_path)
+                        continue
+                except OSError:
+                    continue
+                if time.monotonic() > deadline:
+                    break
+                time.sleep(0.01)
+        try:
+            yield
+        finally:
+            if held:
+                try:
+                    os.remove(lock_path)
+                except FileNotFoundError:
+                    pass
+
+
+class PageCheckpoints:
+    """
+    One checkpoint file per completed listing page of a scrape.
+
+    Checkpoints live in a folder named after a hash of the search URL, so a
+    resumed run only picks up pages from the same search. A page is saved
+    once every job on it has been deep-scraped; pages missing on disk are the
+    ones a resumed run still has to schedule.
+    """
+
+    def __init__(self, root: str, base_url: str):
+        key = hashlib.md5(base_url.encode()).hexdigest()[:12]
+        self.directory = os.path.join(root, key)
+        self.base_url = base_url
+        self._write_manifest()
+
+    def _write_manifest(self):
+        manifest = os.path.join(self.directory, 'manifest.json')
+        if not os.path.exists(manifest):
+            atomic_write_json(manifest, {'base_url': self.base_url, 'created': datetime.now().isoformat(timespec='seconds')}, indent=2)
+
+    def _page_path(self, page_num: int) -> str:
+        return os.path.join(self.directory, f'page_{page_num}.json')
+
+    def save(self, page_num: int, jobs: list):
+        atomic_write_json(self._page_path(page_num), jobs)
+
+    def completed_pages(self) -> set:
+        pages = set()
+        for path in glob.glob(os.path.join(self.directory, 'page_*.json')):
+            m = re.search(r'page_(\d+)\.json$', path)
+            if m:
+                pages.add(int(m.group(1)))
+        return pages
+
+    def load(self, page_num: int) -> list:
+        with open(self._page_path(page_num), 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def load_all(self) -> dict:
+        """Returns {page_num: jobs} for every completed page that can still be read."""
+        pages = {}
+        for page_num in sorted(self.completed_pages()):
+            try:
+                pages[page_num] = self.load(page_num)
+            except Exception as e:
+                print(f"Warning: ignoring unreadable checkpoint for page {page_num}: {e}")
+        return pages
+
+    def clear(self):
+        """Deletes this scrape's checkpoints (after a successful finish)."""
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def reset(self):
+        """Drops any old checkpoints for this search and starts an empty set."""
+        self.clear()
+        self._write_manifest()
@@ -0,0 +1,188 @@
+"""
+Local stand-in for the Gemini API, for testing the ATS stage without a key or quota.
+
+Run it:
+    python -m common.fake_llm --port 8090 --latency 0.5 --rpm 60
+Point the ATS stage at it:
+    python atsClearenceJobs.py --resume_path ... --model fake --fake-llm http://127.0.0.1:8090
+
+The server answers POST /generate with a JSON list holding one score for every
+"id" found in the prompt, after `latency` seconds. Past `rpm` requests in the
+last minute it returns a 429 worded like Gemini's ("Please retry in Ns"), so
+the retry and throttling paths can be exercised too. --drop-rate leaves a
+share of the jobs out of each answer, like a model that skips items, and
+--truncate-rate cuts a share of the answers off midway. With "stream": true
+the answer text is sent in small pieces as it would be by a streaming model.
+
+POST /contexts stands in for Gemini's context caching: it stores a system
+instruction once and returns its name, which /generate requests then pass as
+"context" instead of resending the text. prompt_chars counts what the
+/generate requests carried, to compare runs with and without a context.
+"""
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+ID_PATTERN = re.compile(r'"id":\s*(?:"([^"]+)"|(\d+))')
+STREAM_PIECE_CHARS = 64  # size of each piece of a streamed answer
+
+
+def fake_score(job_id) -> int:
+    """Deterministic 0-100 score so repeated runs give the same answer."""
+    return int(hashlib.md5(str(job_id).encode()).hexdigest(), 16) % 101
+
+
+class FakeLLMServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency: float = 0.0, rpm: float = None, drop_rate: float = 0.0, truncate_rate: float = 0.0):
+        super().__init__(address, FakeLLMHandler)
+        self.latency = latency
+        self.rpm = rpm
+        self.drop_rate = drop_rate
+        self.truncate_rate = truncate_rate
+        self.requests_served = 0
+        self.prompt_chars = 0
+        self.contexts = {}
+        self._recent = deque()
+        self._lock = threading.Lock()
+
+    def admit(self) -> float:
+        """Returns 0 if the request fits in the RPM window, else the seconds until it would."""
+        with self._lock:
+            now = time.monotonic()
+            while self._recent and now - self._recent[0] >= 60:
+                self._recent.popleft()
+            if self.rpm and len(self._recent) >= self.rpm:
+                return 60 - (now - self._recent[0])
+            self._recent.append(now)
+            self.requests_served += 1
+            return 0.0
+
+
+class FakeLLMHandler(BaseHTTPRequestHandler):
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+        if self.path == '/contexts':
+            with self.server._lock:
+                name = f'contexts/{len(self.server.contexts) + 1}'
+                self.server.contexts[name] = body.get('system_instruction', '')
+            self._reply(200, {'name': name})
+            return
+        context = body.get('context')
+        if context is not None and context not in self.server.contexts:
+            self._reply(404, {'error': f'Cached content {context} not found.'})
+            return
+        with self.server._lock:
+            self.server.prompt_chars += len(body.get('prompt', ''))
+        wait = self.server.admit()
+        if wait:
+            self._reply(429, {'error': f'Resource exhausted. Please retry in {wait:.2f}s.'})
+            return
+        time.sleep(self.server.latency)
+        # String ids come back as strings, numeric ids as numbers
+        ids = [text if text else int(number) for text, number in ID_PATTERN.findall(body.get('prompt', ''))]
+        # Like a real model, sometimes leave jobs out of the answer
+        ids = [job_id for job_id in dict.fromkeys(ids) if random.random() >= self.server.drop_rate]
+        results = [{
+            'id': job_id,
+            'score': fake_score(job_id),
+            'fit_reason': 'Fake LLM response.',
+            'missing_skills': [],
+            'matching_skills': [],
+        } for job_id in ids]
+        text = '```json\n' + json.dumps(results) + '\n```'
+        if random.random() < self.server.truncate_rate:
+            # Output cut off mid-answer, like a model hitting its token limit
+            text = text[:random.randint(0, len(text) - 1)]
+        if body.get('stream'):
+            self._stream(text)
+        else:
+            self._reply(200, {'text': text})
+
+    def _stream(self, text: str, piece: int = STREAM_PIECE_CHARS):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; charset=utf-8')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        for i in range(0, len(text), piece):
+            self.wfile.write(text[i:i + piece].encode())
+            self.wfile.flush()
+        self.close_connection = True
+
+    def _reply(self, status: int, payload: dict):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_fake_llm(port: int = 8090, latency: float = 0.0, rpm: float = None, drop_rate: float = 0.0, truncate_rate: float = 0.0) -> FakeLLMServer:
+    """Starts the fake server on a background thread and returns it (call .shutdown() to stop)."""
+    server = FakeLLMServer(('127.0.0.1', port), latency=latency, rpm=rpm, drop_rate=drop_rate, truncate_rate=truncate_rate)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+class FakeLLMResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class FakeLLMModel:
+    """
+    Client with the same generate_content(prompt).text shape as genai.GenerativeModel.
+    A system_instruction is uploaded once to /contexts and referenced by name afterwards.
+    """
+
+    def __init__(self, url: str, timeout: float = 120, system_instruction: str = None):
+        self.base_url = url.rstrip('/')
+        self.url = self.base_url + '/generate'
+        self.timeout = timeout
+        self.context = None
+        if system_instruction:
+            response = requests.post(self.base_url + '/contexts', json={'system_instruction': system_instruction}, timeout=timeout)
+            response.raise_for_status()
+            self.context = response.json()['name']
+
+    def generate_content(self, prompt: str, stream: bool = False, response_schema: dict = None):
+        """The response, or with stream=True an iterator of partial responses."""
+        payload = {'prompt': prompt, 'stream': stream}
+        if response_schema:
+            payload['format'] = response_schema
+        if self.context:
+            payload['context'] = self.context
+        response = requests.post(self.url, json=payload, timeout=self.timeout, stream=stream)
+        if response.status_code != 200:
+            # Same wording as the Gemini client errors, so the retry parsing applies
+            raise RuntimeError(f"{response.status_code} {response.json().get('error', response.text)}")
+        if stream:
+            return (FakeLLMResponse(piece) for piece in response.iter_content(chunk_size=None, decode_unicode=True))
+        return FakeLLMResponse(response.json()['text'])
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Fake LLM endpoint for testing the ATS stage')
+    parser.add_argument('--port', type=int, default=8090)
+    parser.add_argument('--latency', type=float, default=0.5, help='Seconds to wait before answering')
+    parser.add_argument('--rpm', type=float, default=None, help='Requests per minute before answering 429')
+    parser.add_argument('--drop-rate', dest='drop_rate', type=float, default=0.0, help='Fraction of jobs left out of each answer')
+    parser.add_argument('--truncate-rate', dest='truncate_rate', type=float, default=0.0, help='Fraction of answers cut off midway')
+    args = parser.parse_args()
+    server = FakeLLMServer(('127.0.0.1', args.port), latency=args.latency, rpm=args.rpm, drop_rate=args.drop_rate, truncate_rate=args.truncate_rate)
+    print(f'Fake LLM listening on http://127.0.0.1:{args.port}')
+    server.serve_forever()
@@ -0,0 +1,390 @@
+"""
+Batch feature extraction over a whole job corpus with pandas string columns.
+
+The scrapers parse one posting at a time (wsClearenceJobs.extract_salary,
+wsDice.extract_salary, the years regex and clearance if-chains in
+wsDice.expand_job_details, atsClearenceJobs.parse_salary). The functions here
+give the same values for a whole column at once, so 30,000 postings are
+featurized in well under a second instead of one regex pass per posting and
+field. With pyarrow installed the column is Arrow-backed and the regexes run
+in Arrow's compiled (RE2) engine: case-insensitive patterns over an
+ASCII-lowercased copy, and only over the rows that hold one of the pattern's
+literals. Without it pandas' Python-re path gives the same result, only
+slower. Patterns therefore stay inside the syntax both engines share (no
+lookarounds) and name their groups. tests/test_features.py checks the parity
+with the per-job functions on random postings, on both paths.
+
+Usage:
+    frame = featurize(jobs)                        # ClearanceJobs records
+    frame = featurize(jobs, source='dice')         # Dice postings
+    reqs = requirements_frame(jobs)                # common.rules.job_requirements, in bulk
+"""
+import functools
+import math
+import re
+
+import numpy as np
+import pandas as pd
+
+from common.rules import CLEARANCE_LEVELS, CLEARANCE_PATTERNS, POLYGRAPH_PATTERNS, YEARS_PATTERN, \
+    YEARS_FIELD_PATTERN, ONSITE_PATTERN, REMOTE_PATTERN, NONE_VALUE_PATTERN, QUALIFIER_PATTERN, QUALIFIED_PATTERN, \
+    requirement_text
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    STRING_DTYPE = pd.StringDtype('pyarrow')
+except ImportError:  # optional: plain pandas strings use Python's re
+    pa = pc = None
+    STRING_DTYPE = pd.StringDtype('python')
+
+_AMOUNT = r"\d{1,3}(?:,\d{3})*(?:\.\d+)?"
+# wsClearenceJobs.extract_salary: a "$a - $b" range, else the first "$a"
+SALARY_RANGE = rf"\$(?P<min>{_AMOUNT})\s*-\s*\$(?P<max>{_AMOUNT})"
+SALARY_SINGLE = rf"\$(?P<amount>{_AMOUNT})"
+# wsDice.extract_salary: whole-dollar ranges only, any dash
+DICE_SALARY_RANGE = r"\$(?P<min>\d{1,3}(?:,\d{3})*)\s*[-–—]\s*\$(?P<max>\d{1,3}(?:,\d{3})*)"
+# wsDice.expand_job_details
+YEARS = r"(?i)(?P<years>\d+)\s*(?:\+|or more)?\s*years"
+# wsDice.extract_field('Travel'); the non-capturing group stands in for its lookahead
+DICE_TRAVEL = r"(?i)Travel:\s*(?P<travel>.*?)\s*(?:Category:|Subcategory:|Schedule:|Shift:|Travel:|Minimum Clearance|$)"
+# atsClearenceJobs.parse_salary: the first number once '$', ',' and parentheses are gone
+NUMBER = r"(?P<number>[-+]?\d+(?:\.\d+)?)"
+
+
+def text_column(values) -> pd.Series:
+    """Any sequence of strings (None allowed) as a string column, missing values as ''."""
+    return pd.Series(values, dtype=object).fillna('').astype(str).astype(STRING_DTYPE)
+
+
+def _is_arrow(text: pd.Series) -> bool:
+    return pc is not None and getattr(text.dtype, 'storage', None) == 'pyarrow'
+
+
+def _extract(text: pd.Series, pattern: str) -> pd.DataFrame:
+    """The first match of each named group of `pattern` per row, None where it does not match."""
+    if not _is_arrow(text):
+        return text.str.extract(pattern).astype(object).where(lambda found: found.notna(), None)
+    array = pa.array(text.array)
+    names = re.compile(pattern).groupindex
+    rows = _candidate_rows(text, pattern)
+    if rows is None:
+        found = pc.extract_regex(array, pattern)
+        return pd.DataFrame({name: pc.struct_field(found, name).to_numpy(zero_copy_only=False)
+                             for name in names}, index=text.index)
+    columns = {name: np.full(len(text), None, dtype=object) for name in names}
+    if len(rows):
+        found = pc.extract_regex(array.take(rows), pattern)
+        for name, column in columns.items():
+            column[rows] = pc.struct_field(found, name).to_numpy(zero_copy_only=False)
+    return pd.DataFrame(columns, index=text.index)
+
+
+def _contains(text: pd.Series, needle: str) -> np.ndarray:
+    """Boolean array: does each row contain the plain substring `needle`."""
+    if not _is_arrow(text):
+        return text.str.contains(needle, regex=False).to_numpy(dtype=bool)
+    # RE2 finds a literal with memchr; Arrow's match_substring is several times slower
+    return _mask(pc.match_substring_regex(pa.array(text.array), _REGEX_META.sub(r"\\\1", needle)))
+
+
+def _mask(found) -> np.ndarray:
+    return found.to_numpy(zero_copy_only=False).astype(bool)
+
+
+_REGEX_META = re.compile(r"([\\.^$|?*+()\[\]{}])")
+_UPPERCASE = re.compile(r"\\.|\(\?P<\w+>|[A-Z]+")
+
+
+def _lowercase_pattern(pattern: str) -> str:
+    """`pattern` with its letters lowercased, leaving escapes (such as a capital-S class) and group names alone."""
+    return _UPPERCASE.sub(lambda m: m.group() if m.group()[0] in '\\(' else m.group().lower(), pattern)
+
+
+def _lowered(text: pd.Series):
+    """The ASCII-lowercased Arrow array of `text`, for _search's IGNORECASE patterns (None without Arrow)."""
+    return pc.ascii_lower(pa.array(text.array)) if _is_arrow(text) else None
+
+
+def _arrow_regex(text: pd.Series, pattern: re.Pattern, lowered=None):
+    """(array, pattern string) to run `pattern` on in Arrow. RE2 is several times faster
+    without case folding, so IGNORECASE patterns run lowercased over lowercased text."""
+    if pattern.flags & re.IGNORECASE:
+        return (lowered if lowered is not None else _lowered(text)), _lowercase_pattern(pattern.pattern)
+    return pa.array(text.array), pattern.pattern
+
+
+@functools.lru_cache(maxsize=None)
+def _needles(pattern: str):
+    """
+    One literal per top-level alternative of `pattern` that every match of
+    that alternative contains (its longest plain run of letters and digits
+    outside groups and classes), or None when some alternative has none.
+    Inline flags are ignored: _candidate_rows looks for the needles in any case.
+    """
+    needles, best, run, depth, in_class, i = [], '', '', 0, False, 0
+    while i <= len(pattern):
+        c = pattern[i] if i < len(pattern) else '|'
+        if in_class:
+            in_class = c != ']'
+        elif c.isalnum() and depth == 0:
+            run += c
+        else:
+            if c in '?*{':
+                run = run[:-1]  # the quantified character may be absent
+            best = max(best, run, key=len)
+            run = ''
+            if c == '\\':
+                i += 1
+            elif c == '{':
+                i = pattern.index('}', i)
+            elif c == '[':
+                in_class = True
+            elif c in '()':
+                depth += 1 if c == '(' else -1
+            elif c == '|' and depth == 0:
+                needles.append(best)
+                best = ''
+        i += 1
+    return tuple(dict.fromkeys(needles)) if all(needles) else None
+
+
+def _candidate_rows(text: pd.Series, pattern: str, lowered=None, within: np.ndarray = None):
+    """
+    Indices of the rows (of `within`, default all) that hold one of the
+    _needles() of `pattern` in any case, so only they need the full regex;
+    None when the pattern has no needles and every row must be searched.
+    """
+    needles = _needles(pattern)
+    if needles is None:
+        return None if within is None else np.flatnonzero(within)
+    if lowered is None:
+        lowered = _lowered(text)
+    holds_needle = np.zeros(len(text), dtype=bool)
+    for needle in needles:
+        # The needle is lowercased and so is the text, which keeps the scan a
+        # plain RE2 literal search whatever flags the pattern carries
+        holds_needle |= _mask(pc.match_substring_regex(lowered, needle.lower()))
+    return np.flatnonzero(holds_needle if within is None else holds_needle & within)
+
+
+def _search(text: pd.Series, pattern: re.Pattern, lowered=None, within: np.ndarray = None) -> np.ndarray:
+    """
+    Boolean array: does compiled `pattern` match anywhere in each row.
+    lowered: _lowered(text), to reuse it. within: only these rows are searched (the rest are False).
+    """
+    if not _is_arrow(text):
+        found = text.str.contains(pattern).to_numpy(dtype=bool)
+        return found if within is None else found & within
+    if lowered is None:
+        lowered = _lowered(text)
+    array, regex = _arrow_regex(text, pattern, lowered)
+    # A pattern that starts with \b or branches (|) keeps RE2 off its fast
+    # literal scan, so it only runs over the rows holding one of its needles
+    rows = _candidate_rows(text, pattern.pattern, lowered, within)
+    if rows is None:
+        return _mask(pc.match_substring_regex(array, regex))
+    found = np.zeros(len(text), dtype=bool)
+    if len(rows):
+        found[rows] = _mask(pc.match_substring_regex(array.take(rows), regex))
+    return found
+
+
+def _dollars(amounts: pd.Series) -> np.ndarray:
+    """'118,600.00' -> 118600 (int(float(...)) as the per-job parsers do), missing -> 0."""
+    numbers = pd.to_numeric(amounts.str.replace(',', '', regex=False), errors='coerce').astype('float64')
+    return numbers.fillna(0).to_numpy().astype('int64')
+
+
+def salary_columns(text: pd.Series, source: str = 'clearancejobs') -> pd.DataFrame:
+    """salary_min / salary_max per row, as extract_salary in wsClearenceJobs (or wsDice with source='dice')."""
+    if source == 'dice':
+        found = _extract(text, DICE_SALARY_RANGE)
+        return pd.DataFrame({'salary_min': _dollars(found['min']), 'salary_max': _dollars(found['max'])}, index=text.index)
+    found = _extract(text, SALARY_RANGE)
+    single = _extract(text, SALARY_SINGLE)['amount']
+    # Rows without a range take the first single amount for both ends
+    low = found['min'].fillna(single)
+    high = found['max'].fillna(single)
+    return pd.DataFrame({'salary_min': _dollars(low), 'salary_max': _dollars(high)}, index=text.index)
+
+
+def years_column(text: pd.Series) -> pd.Series:
+    """The first "N years" / "N+ years" / "N or more years" number, 0 when there is none."""
+    return pd.Series(_dollars(_extract(text, YEARS)['years']), index=text.index, name='years_exp')
+
+
+def clearance_column(text: pd.Series) -> pd.Series:
+    """wsDice's chain: 'TS/SCI' if mentioned, else 'Top Secret', else 'Not Specified'."""
+    choices = np.select([_contains(text, 'TS/SCI'), _contains(text, 'Top Secret')],
+                        ['TS/SCI', 'Top Secret'], default='Not Specified')
+    return pd.Series(choices, index=text.index, name='clearance')
+
+
+def clearance_tier_column(text: pd.Series) -> pd.Series:
+    """Index into common.rules.CLEARANCE_LEVELS of the highest clearance the text asks for (0 = none)."""
+    levels = _first_level(CLEARANCE_PATTERNS, [text]).fillna('None')
+    return levels.map(CLEARANCE_LEVELS.index).astype('int64').rename('clearance_tier')
+
+
+def _flag(text: pd.Series, needle: str, yes: str, no: str, name: str) -> pd.Series:
+    return pd.Series(np.where(_contains(text, needle), yes, no), index=text.index, name=name)
+
+
+def polygraph_column(text: pd.Series) -> pd.Series:
+    return _flag(text, 'Polygraph', 'Yes', 'No', 'polygraph')
+
+
+def remote_column(text: pd.Series, source: str = 'clearancejobs') -> pd.Series:
+    """wsClearenceJobs' remote_eligible, or wsDice's "remote" requirement with source='dice'."""
+    if source == 'dice':
+        return _flag(text, 'Potential for Remote Work: No', 'No', 'Yes/Hybrid', 'remote')
+    return _flag(text, '(On-Site', 'On-Site', 'Remote/Hybrid Search Needed', 'remote')
+
+
+def travel_column(text: pd.Series, source: str = 'clearancejobs') -> pd.Series:
+    """wsClearenceJobs' travel_req, or wsDice's extract_field(text, 'Travel') with source='dice'."""
+    if source == 'dice':
+        travel = _extract(text, DICE_TRAVEL)['travel'].str.strip()
+        # extract_field only searches when 'Travel' appears with that exact case
+        travel = travel.where(_contains(text, 'Travel'), None)
+        return travel.fillna('N/A').astype(object).rename('travel')
+    return _flag(text, '10% of the Time', '10%', 'Check Description', 'travel')
+
+
+def parse_salary_column(values) -> pd.Series:
+    """atsClearenceJobs.parse_salary over a column of ints, floats and strings like "$118,600/yr"."""
+    raw = pd.Series(values, dtype=object)
+    kinds = raw.map(type)
+    parsed = pd.Series(0, index=raw.index, dtype='int64')
+
+    numeric = kinds.isin((int, float, bool))
+    if numeric.any():
+        numbers = raw[numeric].astype('float64')
+        parsed[numeric] = numbers.where(np.isfinite(numbers), 0).to_numpy().astype('int64')
+    strings = kinds == str
+    if strings.any():
+        clean = text_column(raw[strings]).str.replace(r"[,$()]", '', regex=True).str.strip()
+        parsed[strings] = _dollars(_extract(clean, NUMBER)['number'])
+    return parsed
+
+
+def featurize(jobs, source: str = 'clearancejobs') -> pd.DataFrame:
+    """
+    One row per job: salary_min, salary_max, years_exp, clearance,
+    clearance_tier, polygraph, remote, travel. `jobs` are job dicts (their
+    full_description is used) or plain description strings. source picks the
+    scraper whose rules are mirrored where the two differ ('clearancejobs' or 'dice').
+    """
+    descriptions = [j.get('full_description') if isinstance(j, dict) else j for j in jobs]
+    text = text_column(descriptions)
+    frame = salary_columns(text, source)
+    for column in (years_column(text), clearance_column(text), clearance_tier_column(text),
+                   polygraph_column(text), remote_column(text, source), travel_column(text, source)):
+        frame[column.name] = column
+    return frame
+
+
+# --- common.rules.job_requirements in bulk ---
+
+def _first_level(patterns, texts: list, level: pd.Series = None) -> pd.Series:
+    """
+    Per row, the level of the first pattern found in the first text that has
+    one (else NaN). Rows already set in `level` keep their value.
+    """
+    if level is None:
+        level = pd.Series(np.nan, index=texts[0].index, dtype=object)
+    for text in texts:
+        lowered = _lowered(text)
+        for name, pattern in patterns:
+            open_rows = level.isna().to_numpy()
+            if not open_rows.any():
+                return level
+            level[_search(text, pattern, lowered, within=open_rows)] = name
+    return level
+
+
+def _stated_level(patterns, fields: list) -> pd.Series:
+    """common.rules._stated_level per row: `fields` are the card columns, searched joined."""
+    joined = fields[0]
+    for field in fields[1:]:
+        joined = joined + ' ' + field
+    level = _first_level(patterns, [joined])
+    stated_none = np.zeros(len(joined), dtype=bool)
+    for field in fields:
+        stated_none |= _search(field, NONE_VALUE_PATTERN)
+    level[stated_none & level.isna().to_numpy()] = 'None'
+    return level
+
+
+def _requirement_text(text: pd.Series, lowered=None) -> pd.Series:
+    """common.rules.requirement_text per row."""
+    if not _is_arrow(text):
+        return text.map(requirement_text).astype(STRING_DTYPE)
+    # Only the rows holding a qualifier are rewritten (RE2 folds case itself
+    # here, since the replacement keeps the original text)
+    rows = _candidate_rows(text, QUALIFIER_PATTERN.pattern, lowered)
+    if not len(rows):
+        return text
+    array = pa.array(text.array)
+    rewritten = pc.replace_substring_regex(array.take(rows), '(?i)' + QUALIFIED_PATTERN.pattern, ' ')
+    mask = np.zeros(len(text), dtype=bool)
+    mask[rows] = True
+    return pd.Series(pc.replace_with_mask(array, pa.array(mask), rewritten), dtype=STRING_DTYPE, index=text.index)
+
+
+_MARK = '\x1f'  # wraps each captured number while _min_number collects them
+
+
+def _min_number(text: pd.Series, pattern: re.Pattern, lowered=None) -> pd.Series:
+    """The smallest number captured by group 1 of `pattern` anywhere in each row (NaN when none)."""
+    if not _is_arrow(text):
+        found = text.str.extractall(pattern)
+        if found.empty:
+            return pd.Series(np.nan, index=text.index)
+        return pd.to_numeric(found[0]).astype('float64').groupby(level=0).min().reindex(text.index)
+
+    # Arrow has no extract-all: every match in the rows that have one is
+    # rewritten to MARK<number>MARK, so after a split the numbers are the
+    # odd-numbered pieces of each row
+    array, regex = _arrow_regex(text, pattern, lowered)
+    rows = np.flatnonzero(_search(text, pattern, lowered))
+    smallest = np.full(len(text), np.nan)
+    if len(rows):
+        marked = pc.replace_substring(array.take(rows), _MARK, ' ')
+        marked = pc.replace_substring_regex(marked, regex, f'{_MARK}\\1{_MARK}')
+        pieces = pc.split_pattern(marked, _MARK)
+        parents = pc.list_parent_indices(pieces).to_numpy()
+        odd = (np.arange(len(parents)) - pieces.offsets.to_numpy()[parents]) % 2 == 1
+        numbers = pc.cast(pc.list_flatten(pieces).filter(pa.array(odd)), pa.float64()).to_numpy()
+        np.fmin.at(smallest, rows[parents[odd]], numbers)
+    return pd.Series(smallest, index=text.index)
+
+
+def requirements_frame(jobs: list) -> pd.DataFrame:
+    """
+    common.rules.job_requirements for every job at once: columns clearance,
+    polygraph, years (None when not stated) and onsite. Rows can be fed to
+    RuleEngine.reject_reason(job, requirements=row).
+    """
+    def column(*keys):
+        return text_column([' '.join(str(j.get(key) or '') for key in keys) for j in jobs])
+
+    description = column('full_description')
+    lowered = _lowered(description)
+    required = _requirement_text(description, lowered)
+    clearance = _first_level(CLEARANCE_PATTERNS, [required],
+                             _stated_level(CLEARANCE_PATTERNS, [column('clearance'), column('clearance_required')]))
+    polygraph = _first_level(POLYGRAPH_PATTERNS, [required], _stated_level(POLYGRAPH_PATTERNS, [column('polygraph')]))
+
+    years = _min_number(required, YEARS_PATTERN, lowered if required is description else _lowered(required))
+    years = years.fillna(_min_number(column('years_exp_required'), YEARS_FIELD_PATTERN))
+    location = column('remote_eligible', 'location')
+    onsite = (_search(location, ONSITE_PATTERN) | _search(description, ONSITE_PATTERN, lowered)) \
+        & ~_search(description, REMOTE_PATTERN, lowered)
+    return pd.DataFrame({
+        'clearance': clearance.fillna('None').astype(object),
+        'polygraph': polygraph.fillna('None').astype(object),
+        'years': pd.Series([None if math.isnan(y) else int(y) for y in years], index=description.index, dtype=object),
+        'onsite': onsite,
+    }, index=description.index)
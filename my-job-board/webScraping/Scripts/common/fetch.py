@@ -0,0 +1,108 @@
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from common.ratelimit import BACKOFF_STATUSES, get_limiter, parse_retry_after
+
+# Headers every scraper sends unless a call overrides them
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Accept-Language": "en-US,en;q=0.9",
+}
+DEFAULT_TIMEOUT = 10  # seconds
+POOL_SIZE = 20  # keep-alive connections kept open per host
+MAX_RETRIES = 2  # extra attempts after a 429/503, once the host's limiter has backed off
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def configure(pool_size: int = None, timeout: float = None, headers: dict = None):
+    """
+    Changes the pool size, default timeout or default headers.
+    Call before the first fetch; sessions already open keep their old pool.
+    """
+    global POOL_SIZE, DEFAULT_TIMEOUT
+    if pool_size is not None:
+        POOL_SIZE = pool_size
+    if timeout is not None:
+        DEFAULT_TIMEOUT = timeout
+    if headers:
+        DEFAULT_HEADERS.update(headers)
+
+
+def get_session(url: str) -> requests.Session:
+    """
+    Returns the pooled keep-alive session for the host of `url`.
+    One session per host so connections are reused across every request
+    (and every thread) hitting that site.
+    """
+    host = urlsplit(url).netloc.lower()
+    session = _sessions.get(host)
+    if session is None:
+        with _sessions_lock:
+            session = _sessions.get(host)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                session.headers.update(DEFAULT_HEADERS)
+                _sessions[host] = session
+    return session
+
+
+def fetch(url: str, headers: dict = None, timeout: float = None, retries: int = MAX_RETRIES, **kwargs) -> requests.Response:
+    """
+    GET `url` through the shared session for its host.
+    Every request waits on the host's adaptive rate limiter (common.ratelimit)
+    and reports its status and latency back to it.
+    headers: extra headers merged over DEFAULT_HEADERS for this call only.
+    timeout: seconds, defaults to DEFAULT_TIMEOUT.
+    retries: extra attempts when the server answers 429/503.
+    """
+    session = get_session(url)
+    limiter = get_limiter(url)
+    for attempt in range(retries + 1):
+        limiter.acquire()
+        started = time.monotonic()
+        try:
+            response = session.get(url, headers=headers, timeout=timeout or DEFAULT_TIMEOUT, **kwargs)
+        except requests.RequestException:
+            limiter.record(None)
+            raise
+        limiter.record(response.status_code, time.monotonic() - started, parse_retry_after(response.headers.get('Retry-After')))
+        if response.status_code not in BACKOFF_STATUSES or attempt == retries:
+            return response
+
+
+def fetch_text(url: str, cache=None, headers: dict = None, timeout: float = None) -> str:
+    """
+    GET `url` and return the body text, raising on HTTP errors.
+    cache: optional common.http_cache.HttpCache. Fresh entries are served from
+    disk; stale ones are revalidated with a conditional GET and reused on 304.
+    """
+    if cache is None:
+        response = fetch(url, headers=headers, timeout=timeout)
+        response.raise_for_status()
+        return response.text
+
+    body, request_headers = cache.prepare(url, headers)
+    if body is not None:
+        return body
+    body = cache.complete(url, fetch(url, headers=request_headers, timeout=timeout))
+    if body is None:
+        # Body vanished from disk; fetch it again without validators
+        body = cache.complete(url, fetch(url, headers=headers, timeout=timeout))
+    return body
+
+
+def close_sessions():
+    """Closes every pooled session (call at the end of a run)."""
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
@@ -0,0 +1,221 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+DEFAULT_FRESH_FOR = 6 * 3600  # serve straight from disk for this long, no request at all
+DEFAULT_TTL = 14 * 24 * 3600  # drop entries not revalidated for this long
+DEFAULT_MAX_BYTES = 500 * 1024 * 1024  # cap on stored bodies; least recently used go first
+
+
+class HttpCache:
+    """
+    On-disk HTTP cache keyed by URL that revalidates with conditional GETs.
+
+    Each entry is a body file plus a small JSON meta file holding the ETag,
+    Last-Modified and timestamps. Once an entry is older than `fresh_for`
+    the next fetch sends If-None-Match / If-Modified-Since, and a 304 reply
+    reuses the stored body. Entries not revalidated for `ttl` seconds are evicted, and
+    the least recently used go first when the total size passes `max_bytes`.
+    """
+
+    def __init__(self, directory: str, fresh_for: float = DEFAULT_FRESH_FOR, ttl: float = DEFAULT_TTL, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.fresh_for = fresh_for
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._index = {}  # key -> meta dict
+        self._total_bytes = 0
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+        self._load_index()
+
+    # --- paths / index ---------------------------------------------------
+    @staticmethod
+    def _key(url: str) -> str:
+        return hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+    def _paths(self, key: str):
+        base = os.path.join(self.directory, key[:2], key)
+        return base + '.body', base + '.json'
+
+    def _load_index(self):
+        now = time.time()
+        for sub in os.listdir(self.directory):
+            sub_dir = os.path.join(self.directory, sub)
+            if not os.path.isdir(sub_dir):
+                continue
+            for name in os.listdir(sub_dir):
+                if not name.endswith('.json'):
+                    continue
+                key = name[:-5]
+                try:
+                    with open(os.path.join(sub_dir, name), 'r', encoding='utf-8') as f:
+                        meta = json.load(f)
+                except Exception:
+                    self._remove_files(key)
+                    continue
+                if now - meta.get('validated_at', 0) > self.ttl:
+                    self._remove_files(key)
+                    continue
+                self._index[key] = meta
+                self._total_bytes += meta.get('size', 0)
+        self._evict_over_size()
+
+    def _remove_files(self, key: str):
+        for path in self._paths(key):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def _drop(self, key: str):
+        meta = self._index.pop(key, None)
+        if meta:
+            self._total_bytes -= meta.get('size', 0)
+        self._remove_files(key)
+
+    def _evict_over_size(self):
+        if self._total_bytes <= self.max_bytes:
+            return
+        for key, _ in sorted(self._index.items(), key=lambda kv: kv[1].get('accessed_at', 0)):
+            self._drop(key)
+            if self._total_bytes <= self.max_bytes:
+                break
+
+    @staticmethod
+    def _write_atomic(path: str, data: bytes):
+        tmp_path = f'{path}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    # --- public API ------------------------------------------------------
+    def lookup(self, url: str):
+        """Returns the meta dict for `url`, or None if it is not cached (or expired)."""
+        key = self._key(url)
+        with self._lock:
+            meta = self._index.get(key)
+            if meta and time.time() - meta['validated_at'] > self.ttl:
+                self._drop(key)
+                meta = None
+            return meta
+
+    def is_fresh(self, meta: dict) -> bool:
+        return time.time() - meta['validated_at'] < self.fresh_for
+
+    @staticmethod
+    def conditional_headers(meta: dict) -> dict:
+        """Headers that let the server answer 304 Not Modified for this entry."""
+        headers = {}
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+        return headers
+
+    def read(self, url: str):
+        """Returns the cached body for `url` and marks it as recently used, or None."""
+        key = self._key(url)
+        body_path, _ = self._paths(key)
+        try:
+            with open(body_path, 'r', encoding='utf-8') as f:
+                body = f.read()
+        except FileNotFoundError:
+            with self._lock:
+                self._drop(key)
+            return None
+        with self._lock:
+            if key in self._index:
+                self._index[key]['accessed_at'] = time.time()
+        return body
+
+    def store(self, url: str, body: str, etag: str = None, last_modified: str = None):
+        """Saves a fresh 200 response."""
+        key = self._key(url)
+        body_path, meta_path = self._paths(key)
+        os.makedirs(os.path.dirname(body_path), exist_ok=True)
+        data = body.encode('utf-8')
+        now = time.time()
+        meta = {
+            'url': url,
+            'etag': etag,
+            'last_modified': last_modified,
+            'validated_at': now,
+            'accessed_at': now,
+            'size': len(data),
+        }
+        with self._lock:
+            self._write_atomic(body_path, data)
+            self._write_atomic(meta_path, json.dumps(meta).encode('utf-8'))
+            old = self._index.get(key)
+            if old:
+                self._total_bytes -= old.get('size', 0)
+            self._index[key] = meta
+            self._total_bytes += meta['size']
+            self._evict_over_size()
+
+    def mark_revalidated(self, url: str):
+        """Records a 304: the stored body is current again as of now."""
+        key = self._key(url)
+        _, meta_path = self._paths(key)
+        with self._lock:
+            meta = self._index.get(key)
+            if not meta:
+                return
+            meta['validated_at'] = meta['accessed_at'] = time.time()
+            self._write_atomic(meta_path, json.dumps(meta).encode('utf-8'))
+
+    def prepare(self, url: str, headers: dict = None):
+        """
+        First half of a cached GET, shared by common.fetch and common.async_fetch:
+        returns (body, None) for a fresh entry, else (None, request_headers)
+        where request_headers are `headers` plus the validators of a stale entry.
+        """
+        meta = self.lookup(url)
+        if meta and self.is_fresh(meta):
+            body = self.read(url)
+            if body is not None:
+                self.record('hits')
+                return body, None
+            meta = None
+        request_headers = dict(headers or {})
+        if meta:
+            request_headers.update(self.conditional_headers(meta))
+        return None, request_headers
+
+    def complete(self, url: str, response):
+        """
+        Second half: takes the response (requests or httpx) to the request
+        built by prepare() and returns its body, raising on HTTP errors. A 304
+        reuses the stored body; None means that body has vanished from disk and
+        the caller should fetch again without validators.
+        """
+        if response.status_code == 304:
+            body = self.read(url)
+            if body is not None:
+                self.mark_revalidated(url)
+                self.record('revalidated')
+            return body
+        response.raise_for_status()
+        self.record('misses')
+        self.store(url, response.text, response.headers.get('ETag'), response.headers.get('Last-Modified'))
+        return response.text
+
+    def record(self, outcome: str):
+        """Counts a lookup outcome: 'hits', 'revalidated' or 'misses'."""
+        with self._lock:
+            setattr(self, outcome, getattr(self, outcome) + 1)
+
+    def stats(self) -> dict:
+        return {
+            'entries': len(self._index),
+            'bytes': self._total_bytes,
+            'hits': self.hits,
+            'revalidated': self.revalidated,
+            'misses': self.misses,
+        }
@@ -0,0 +1,60 @@
+import json
+import os
+import threading
+from datetime import datetime, timedelta
+
+
+class JobIndex:
+    """
+    Persistent index of jobs already deep-scraped, keyed by link.
+
+    Each entry keeps the job_id (see _init__.generate_job_id) and when the
+    detail page was last fetched. Incremental scrapes ask should_fetch() before
+    a detail request and only pay for postings that are new, or older than
+    refresh_days when a refresh window is given. A job is known by its link
+    only: the job_id is a hash of role and company, so a new posting of the same
+    role (e.g. another location or requisition) under a new link is fetched.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._by_link = {}
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self._by_link = json.load(f)
+            except Exception as e:
+                print(f"Warning: could not read job index {path}: {e}")
+                self._by_link = {}
+
+    def __len__(self):
+        return len(self._by_link)
+
+    def should_fetch(self, link: str, refresh_days: float = None) -> bool:
+        """True when the link is unknown, or when its last fetch is older than refresh_days."""
+        with self._lock:
+            entry = self._by_link.get(link)
+            if entry is None:
+                return True
+            if refresh_days is None:
+                return False
+            fetched_at = datetime.fromisoformat(entry['fetched_at'])
+            return datetime.now() - fetched_at > timedelta(days=refresh_days)
+
+    def add(self, link: str, job_id: str):
+        """Records that the detail page for `link` was fetched just now."""
+        with self._lock:
+            now = datetime.now().isoformat(timespec='seconds')
+            entry = self._by_link.setdefault(link, {'job_id': job_id, 'first_seen': now})
+            entry['job_id'] = job_id
+            entry['fetched_at'] = now
+
+    def save(self):
+        """Writes the index atomically (temp file + rename)."""
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = f'{self.path}.tmp'
+        with self._lock:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._by_link, f, indent=2)
+            os.replace(tmp_path, self.path)
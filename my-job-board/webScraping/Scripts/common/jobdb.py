@@ -0,0 +1,306 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import itertools
+from datetime import datetime
+
+# webScraping/JobData/jobs.db (this file lives in webScraping/Scripts/common)
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'JobData', 'jobs.db')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    link        TEXT PRIMARY KEY,
+    job_id      TEXT NOT NULL,
+    role_name   TEXT,
+    company     TEXT,
+    location    TEXT,
+    clearance   TEXT,
+    salary_min  REAL,
+    salary_max  REAL,
+    scraped_at  TEXT,
+    data        TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_job_id ON jobs(job_id);
+CREATE INDEX IF NOT EXISTS idx_jobs_company ON jobs(company);
+CREATE INDEX IF NOT EXISTS idx_jobs_salary ON jobs(salary_min);
+
+CREATE TABLE IF NOT EXISTS analyses (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id      TEXT NOT NULL,
+    link        TEXT,
+    score       REAL,
+    model       TEXT,
+    resume      TEXT,
+    analyzed_at TEXT,
+    data        TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_analyses_job_id ON analyses(job_id);
+CREATE INDEX IF NOT EXISTS idx_analyses_link ON analyses(link);
+CREATE INDEX IF NOT EXISTS idx_analyses_score ON analyses(score);
+
+CREATE TABLE IF NOT EXISTS score_cache (
+    key         TEXT PRIMARY KEY,
+    model       TEXT,
+    created_at  TEXT,
+    data        TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS applications (
+    job_id      TEXT PRIMARY KEY,
+    applied_at  TEXT,
+    status      TEXT DEFAULT 'applied'
+);
+"""
+
+# Records written per executemany() by upsert_jobs, so a large store is never held in memory
+UPSERT_CHUNK = 1000
+# Fields the LLM adds on top of a job record
+ANALYSIS_FIELDS = ('score', 'fit_reason', 'missing_skills', 'matching_skills')
+# Which model (and cascade tier) produced the score; kept with analyses, not in the score cache
+ORIGIN_FIELDS = ('scored_by', 'score_tier')
+
+
+def _to_number(value):
+    """Salary/score values arrive as numbers or strings like '$118,600'. Returns a float or None."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        m = re.search(r"\d+(?:\.\d+)?", value.replace(',', ''))
+        if m:
+            return float(m.group(0))
+    return None
+
+
+def score_cache_key(resume_text: str, description: str, prompt_version, model: str) -> str:
+    """Content address of one resume x job scoring: same inputs, same prompt and model, same key."""
+    h = hashlib.sha256()
+    for part in (resume_text, description, str(prompt_version), model):
+        h.update(part.encode('utf-8'))
+        h.update(b'\x00')
+    return h.hexdigest()
+
+
+def _now() -> str:
+    return datetime.now().isoformat(timespec='seconds')
+
+
+class JobDB:
+    """
+    Embedded SQLite store shared by the scraper, the ATS stage, the sorter and the server.
+
+    Tables:
+        jobs         one row per link (job_id, company and salary_min indexed)
+        analyses     every LLM analysis of a job (job_id, link and score indexed)
+        applications job_ids the user has applied to
+        score_cache  LLM scores keyed by score_cache_key(), reused across runs
+    The full record is kept as JSON in `data`; the indexed columns are copies
+    used for filtering. The database runs in WAL mode, so the Flask server can
+    read while a scrape or ATS run is writing. Each thread gets its own
+    connection.
+    """
+
+    def __init__(self, path: str = DEFAULT_DB_PATH):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def close(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    # --- Jobs ---
+
+    def upsert_jobs(self, records, prune: bool = False) -> int:
+        """
+        Inserts or replaces (by link) the given job records, UPSERT_CHUNK rows
+        at a time. Returns how many were written.
+        prune: `records` are the complete set (a compacted JobStore); jobs
+        whose link is not among them are deleted, in the same transaction.
+        """
+        now = _now()
+        written = 0
+        records = iter(records)
+        with self._connect() as conn:
+            if prune:
+                conn.execute('CREATE TEMP TABLE IF NOT EXISTS synced_links (link TEXT PRIMARY KEY)')
+                conn.execute('DELETE FROM synced_links')
+            while True:
+                chunk = list(itertools.islice(records, UPSERT_CHUNK))
+                if not chunk:
+                    break
+                rows = []
+                for record in chunk:
+                    salary = record.get('salary') or {}
+                    rows.append((
+                        record['link'], record['job_id'], record.get('role_name'), record.get('company'),
+                        record.get('location'), record.get('clearance'),
+                        _to_number(salary.get('min_val')), _to_number(salary.get('max_val')),
+                        now, json.dumps(record, ensure_ascii=False),
+                    ))
+                conn.executemany(
+                    """INSERT INTO jobs (link, job_id, role_name, company, location, clearance, salary_min, salary_max, scraped_at, data)
+                       VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                       ON CONFLICT(link) DO UPDATE SET
+                           job_id=excluded.job_id, role_name=excluded.role_name, company=excluded.company,
+                           location=excluded.location, clearance=excluded.clearance, salary_min=excluded.salary_min,
+                           salary_max=excluded.salary_max, scraped_at=excluded.scraped_at, data=excluded.data""",
+                    rows)
+                if prune:
+                    conn.executemany('INSERT OR IGNORE INTO synced_links (link) VALUES (?)', ((row[0],) for row in rows))
+                written += len(rows)
+            if prune:
+                conn.execute('DELETE FROM jobs WHERE link NOT IN (SELECT link FROM synced_links)')
+                conn.execute('DELETE FROM synced_links')
+        return written
+
+    def jobs_updated_at(self):
+        """Unix time of the last upsert_jobs (None when the table is empty), to compare with a JobStore's mtime."""
+        row = self._connect().execute('SELECT MAX(scraped_at) FROM jobs').fetchone()
+        return datetime.fromisoformat(row[0]).timestamp() if row[0] else None
+
+    def _job_filter(self, min_salary: float = None, exclude_applied: bool = False):
+        clauses, params = [], []
+        if min_salary is not None:
+            clauses.append('salary_min >= ?')
+            params.append(min_salary)
+        if exclude_applied:
+            clauses.append('job_id NOT IN (SELECT job_id FROM applications)')
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ''
+        return where, params
+
+    def count_jobs(self, min_salary: float = None, exclude_applied: bool = False) -> int:
+        where, params = self._job_filter(min_salary, exclude_applied)
+        return self._connect().execute(f'SELECT COUNT(*) FROM jobs{where}', params).fetchone()[0]
+
+    def iter_jobs(self, min_salary: float = None, exclude_applied: bool = False):
+        """
+        Yields job records, optionally only those paying at least min_salary
+        and not yet applied to. Uses the salary index instead of a full load.
+        """
+        where, params = self._job_filter(min_salary, exclude_applied)
+        cursor = self._connect().execute(f'SELECT data FROM jobs{where} ORDER BY rowid', params)
+        for row in cursor:
+            yield json.loads(row['data'])
+
+    def get_job(self, job_id: str) -> dict:
+        """The most recently scraped job with this job_id, or None."""
+        row = self._connect().execute(
+            'SELECT data FROM jobs WHERE job_id = ? ORDER BY scraped_at DESC LIMIT 1', (job_id,)).fetchone()
+        return json.loads(row['data']) if row else None
+
+    # --- Analyses ---
+
+    def save_analyses(self, records, model: str = None, resume: str = None) -> int:
+        """
+        Stores the LLM output for each record (a job merged with score, fit_reason, ...).
+        The model column is the record's scored_by when set (cascade runs mix models), else `model`.
+        Returns how many analyses were written.
+        """
+        now = _now()
+        rows = []
+        for record in records:
+            job_id = record.get('job_id')
+            if not job_id:
+                continue
+            analysis = {field: record.get(field) for field in ANALYSIS_FIELDS + ORIGIN_FIELDS}
+            rows.append((job_id, record.get('link'), _to_number(record.get('score')), record.get('scored_by') or model, resume, now,
+                         json.dumps(analysis, ensure_ascii=False)))
+        with self._connect() as conn:
+            conn.executemany(
+                'INSERT INTO analyses (job_id, link, score, model, resume, analyzed_at, data) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                rows)
+        return len(rows)
+
+    def get_analyzed_job(self, job_id: str) -> dict:
+        """The job record merged with its latest analysis, or None if the job is unknown."""
+        job = self.get_job(job_id)
+        if job is None:
+            return None
+        row = self._connect().execute(
+            'SELECT data FROM analyses WHERE job_id = ? ORDER BY id DESC LIMIT 1', (job_id,)).fetchone()
+        if row:
+            job.update(json.loads(row['data']))
+        return job
+
+    def iter_analyzed_jobs(self, min_score: float = None):
+        """
+        Yields every job merged with its latest analysis, highest score first.
+        min_score: skip analyses scoring below this (uses the score index).
+        """
+        where = 'WHERE a.score >= ?' if min_score is not None else ''
+        params = (min_score,) if min_score is not None else ()
+        cursor = self._connect().execute(
+            f"""SELECT j.data AS job, a.data AS analysis
+                FROM analyses a
+                JOIN (SELECT link, MAX(id) AS id FROM analyses GROUP BY link) latest ON latest.id = a.id
+                JOIN jobs j ON j.link = a.link
+                {where}
+                ORDER BY a.score DESC""",
+            params)
+        for row in cursor:
+            job = json.loads(row['job'])
+            job.update(json.loads(row['analysis']))
+            yield job
+
+    # --- Score cache ---
+
+    def get_cached_scores(self, keys) -> dict:
+        """{key: {score, fit_reason, ...}} for every key already in the cache."""
+        keys = list(keys)
+        found = {}
+        conn = self._connect()
+        # Stay under SQLite's bound-parameter limit
+        for i in range(0, len(keys), 500):
+            chunk = keys[i:i + 500]
+            rows = conn.execute(f"SELECT key, data FROM score_cache WHERE key IN ({','.join('?' * len(chunk))})", chunk)
+            found.update((row['key'], json.loads(row['data'])) for row in rows)
+        return found
+
+    def put_cached_scores(self, scored: dict, model: str = None):
+        """Stores {key: LLM result}; only the analysis fields are kept."""
+        now = _now()
+        rows = [(key, model, now, json.dumps({field: result.get(field) for field in ANALYSIS_FIELDS}, ensure_ascii=False))
+                for key, result in scored.items()]
+        with self._connect() as conn:
+            conn.executemany('INSERT OR REPLACE INTO score_cache (key, model, created_at, data) VALUES (?, ?, ?, ?)', rows)
+
+    # --- Applications ---
+
+    def mark_applied(self, job_id: str):
+        with self._connect() as conn:
+            conn.execute('INSERT OR IGNORE INTO applications (job_id, applied_at) VALUES (?, ?)', (job_id, _now()))
+
+    def applied_ids(self) -> list:
+        return [row['job_id'] for row in self._connect().execute('SELECT job_id FROM applications ORDER BY applied_at')]
+
+    def import_applied(self, path: str) -> int:
+        """One-time import of an old applied_jobs.json list. Returns how many ids it held."""
+        if not os.path.exists(path):
+            return 0
+        try:
+            with open(path, 'r') as f:
+                job_ids = json.load(f)
+        except Exception as e:
+            print(f"Warning: could not read {path}: {e}")
+            return 0
+        with self._connect() as conn:
+            conn.executemany('INSERT OR IGNORE INTO applications (job_id, applied_at) VALUES (?, ?)',
+                             [(job_id, _now()) for job_id in job_ids])
+        return len(job_ids)
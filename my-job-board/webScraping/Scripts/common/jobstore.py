@@ -0,0 +1,102 @@
+import json
+import os
+import threading
+
+
+class JobStore:
+    """
+    Append-only JSON-lines file of job records (one JSON object per line).
+
+    Scrapers append() each record as soon as it is built, so nothing has to be
+    held in memory and the ATS stage can start reading while the scrape is
+    still running. Re-scraped jobs are simply appended again; compact() keeps
+    the last record per link once the scrape is done.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+
+    def reset(self):
+        """Empties the store (a fresh, non-incremental scrape)."""
+        with self._lock:
+            open(self.path, 'w', encoding='utf-8').close()
+
+    def append(self, record: dict):
+        """Writes one record as a single line. Safe to call from several threads."""
+        line = json.dumps(record, ensure_ascii=False) + '\n'
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line)
+
+    def extend(self, records):
+        """Appends every record from an iterable (e.g. iter_jobs() of another file)."""
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                for record in records:
+                    f.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+    def __iter__(self):
+        return iter_jobs(self.path)
+
+    def compact(self, key: str = 'link') -> int:
+        """
+        Rewrites the file keeping only the last record for each `key` value,
+        in the order those records were written. Returns the record count.
+        Only the keys and line numbers are held in memory, not the records.
+        """
+        with self._lock:
+            if not os.path.exists(self.path):
+                return 0
+            # 1. Find the line that wins for every key
+            last_line = {}
+            for line_no, record in _iter_lines(self.path):
+                last_line[record.get(key, line_no)] = line_no
+            keep = set(last_line.values())
+
+            # 2. Stream the winners into a temp file and swap it in
+            tmp_path = f'{self.path}.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as out:
+                for line_no, record in _iter_lines(self.path):
+                    if line_no in keep:
+                        out.write(json.dumps(record, ensure_ascii=False) + '\n')
+            os.replace(tmp_path, self.path)
+            return len(keep)
+
+
+def _iter_lines(path: str):
+    """Yields (line_no, record) for every complete, parseable line."""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_no, line in enumerate(f):
+            if not line.endswith('\n'):
+                # Half-written last line from a scraper that is still running
+                break
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield line_no, json.loads(line)
+            except json.JSONDecodeError:
+                print(f"Warning: skipping malformed line {line_no + 1} in {path}")
+
+
+def iter_jobs(path: str):
+    """
+    Yields job records from `path` one at a time.
+    Reads JSON-lines stores and, for older runs, a plain JSON array file.
+    """
+    if path.endswith('.json'):
+        with open(path, 'r', encoding='utf-8') as f:
+            yield from json.load(f)
+        return
+    for _, record in _iter_lines(path):
+        yield record
+
+
+def count_jobs(path: str) -> int:
+    """Counts records without parsing them (used for progress bars)."""
+    if path.endswith('.json'):
+        return sum(1 for _ in iter_jobs(path))
+    with open(path, 'r', encoding='utf-8') as f:
+        return sum(1 for line in f if line.endswith('\n') and line.strip())
@@ -0,0 +1,103 @@
+import json
+
+
+class JSONArrayStream:
+    """
+    Incremental parser for a JSON array of objects arriving in pieces, e.g. a
+    streamed LLM response like '```json\\n[{"id": 0, ...}, {"id": 1, ...}]```'.
+
+    feed(chunk) returns the objects completed by that chunk, so each result can
+    be used as soon as it has arrived. Text before the opening '[' (code fences,
+    chatter) and after the closing ']' is ignored; a bare top-level object is
+    accepted too. If the response breaks off, every object completed before the
+    cut has already been returned. An object that is not valid JSON on its own
+    is skipped and counted in `errors` instead of failing the whole array.
+
+    Usage:
+        stream = JSONArrayStream()
+        for chunk in chunks:
+            for item in stream.feed(chunk):
+                ...
+        if not stream.complete: ...  # truncated response
+    """
+
+    def __init__(self):
+        self.started = False    # seen the opening '[' (or a bare '{')
+        self.complete = False   # seen the closing ']'
+        self.errors = 0         # objects that were not valid JSON
+        self.items = 0          # objects returned so far
+        self._buf = ''
+        self._pos = 0           # next character of _buf to scan
+        self._depth = 0
+        self._obj_start = None  # index in _buf of the object being read
+        self._in_string = False
+        self._escape = False
+
+    @property
+    def pending(self) -> bool:
+        """True while an object has been opened but not closed (what a truncation loses)."""
+        return self._obj_start is not None
+
+    def feed(self, chunk: str) -> list:
+        if self.complete or not chunk:
+            return []
+        self._buf += chunk
+        buf, found = self._buf, []
+        i = self._pos
+        while i < len(buf):
+            c = buf[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == '\\':
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+            elif not self.started:
+                if c in '[{':
+                    self.started = True
+                    self._depth = 1
+                    if c == '{':
+                        continue  # read the bare object as the array's first item
+            elif c == '"':
+                self._in_string = True
+            elif c in '[{':
+                if self._depth == 1 and c == '{':
+                    self._obj_start = i
+                self._depth += 1
+            elif c in ']}':
+                self._depth -= 1
+                if self._depth == 1 and c == '}' and self._obj_start is not None:
+                    self._emit(buf[self._obj_start:i + 1], found)
+                    self._obj_start = None
+                elif self._depth <= 0:
+                    self.complete = True
+                    break
+            i += 1
+
+        # Keep only the unfinished object, so memory stays at one item
+        if self._obj_start is None:
+            self._buf, self._pos = '', 0
+        else:
+            self._buf, self._pos = buf[self._obj_start:], i - self._obj_start
+            self._obj_start = 0
+        return found
+
+    def _emit(self, text: str, found: list):
+        try:
+            found.append(json.loads(text))
+            self.items += 1
+        except ValueError:
+            self.errors += 1
+
+
+def iter_json_array(chunks):
+    """Yields each object of a streamed JSON array as soon as it is complete."""
+    stream = JSONArrayStream()
+    for chunk in chunks:
+        yield from stream.feed(chunk)
+
+
+def salvage_json_array(text: str) -> list:
+    """Every complete object of a (possibly fenced, truncated or partly malformed) JSON array."""
+    return JSONArrayStream().feed(text)
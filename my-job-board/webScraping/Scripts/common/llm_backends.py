@@ -0,0 +1,317 @@
+"""
+LLM backends behind one interface, so the ATS stage, the resume tailor and the
+server's model list work the same against Gemini, a local Ollama server or the
+fake test endpoint.
+
+The model name picks the backend:
+    models/gemini-2.5-flash-lite   Gemini (any name without a known prefix)
+    ollama/llama3.1:8b             Ollama at profileSettings.ollamaUrl
+    fake                           common/fake_llm.py at profileSettings.fakeLlmUrl
+
+A backend builds model handles with the genai.GenerativeModel call shape:
+handle.generate_content(prompt, stream=False) returns a response with .text
+(and usage_metadata.total_token_count when known), or an iterator of partial
+responses when streaming. schema_options(schema) gives the extra
+generate_content() arguments that constrain the answer to a JSON schema.
+prepare(model_name) readies the backend before a
+run, `parallel` is how many requests it serves at once (None = no preference)
+and stats() reports engine-side numbers such as tokens/s.
+"""
+import json
+import os
+import threading
+import time
+from datetime import timedelta
+from types import SimpleNamespace
+
+import requests
+
+from common.fake_llm import FakeLLMModel
+from common.llm_schema import response_schema
+
+OLLAMA_PREFIX = 'ollama/'
+FAKE_MODEL = 'fake'
+DEFAULT_OLLAMA_URL = 'http://localhost:11434'
+DEFAULT_OLLAMA_KEEP_ALIVE = '30m'  # how long Ollama keeps the model loaded after a request
+DEFAULT_OLLAMA_PARALLEL = 4        # requests in flight; match the server's OLLAMA_NUM_PARALLEL
+# Context window per request. Ollama's default (2-4k tokens) silently drops the
+# start of a longer prompt (the resume and rules), so size it to a full batch:
+# atsBatchTokenBudget plus the system instruction plus the JSON answer
+DEFAULT_OLLAMA_NUM_CTX = 24576
+DEFAULT_FAKE_URL = 'http://127.0.0.1:8090'
+CONTEXT_CACHE_TTL = timedelta(hours=2)  # lifetime of an uploaded Gemini context (deleted by LLMClient.close())
+# Local engines have no provider quota; they are only bounded by the client's concurrency
+UNLIMITED_QUOTA = {'rpm': 60_000, 'tpm': 1_000_000_000, 'rpd': 1_000_000_000}
+
+
+def _setting(name: str, default):
+    """A profileSettings value, or the default when the settings module does not define it."""
+    try:
+        import profileSettings
+    except ImportError:
+        return default
+    return getattr(profileSettings, name, default)
+
+
+class GeminiBackend:
+    name = 'gemini'
+    quota = None  # per-model quotas come from llm_client.MODEL_QUOTAS
+    parallel = None
+
+    def __init__(self):
+        self._configured = False
+
+    def prepare(self, model_name: str):
+        self._genai()
+
+    def schema_options(self, schema: dict) -> dict:
+        return {'generation_config': {'response_mime_type': 'application/json', 'response_schema': response_schema(schema)}}
+
+    def stats(self) -> dict:
+        return {}
+
+    def _genai(self):
+        import google.generativeai as genai
+        if not self._configured:
+            genai.configure(api_key=os.getenv("GENAI_API_KEY"))
+            self._configured = True
+        return genai
+
+    def model(self, model_name: str, system_instruction: str = None):
+        """
+        Gemini model handle. With a system_instruction the instruction is uploaded
+        once as cached content and every call only sends its own prompt; when the
+        model or the instruction's size does not allow caching, it is passed as a
+        plain system instruction instead.
+        """
+        genai = self._genai()
+        if not system_instruction:
+            return genai.GenerativeModel(model_name)
+        try:
+            from google.generativeai import caching
+            cache = caching.CachedContent.create(model=model_name, system_instruction=system_instruction, ttl=CONTEXT_CACHE_TTL)
+        except Exception as e:
+            print(f"[{model_name}] Context caching unavailable ({e}); sending the context as a system instruction.")
+            return genai.GenerativeModel(model_name, system_instruction=system_instruction)
+        model = genai.GenerativeModel.from_cached_content(cached_content=cache)
+        model.context_cache = cache
+        return model
+
+    def list_models(self) -> list:
+        selectable = []
+        for m in self._genai().list_models():
+            if 'generateContent' in m.supported_generation_methods:
+                selectable.append({
+                    "name": m.name,
+                    "display_name": m.display_name,
+                    "tier": "PAID" if "pro" in m.name else "FREE"
+                })
+        return selectable
+
+
+class OllamaModel:
+    """An Ollama model behind the generate_content() shape, over Ollama's HTTP chat API."""
+
+    def __init__(self, backend, model_name: str, system_instruction: str = None, timeout: float = 600):
+        self.backend = backend
+        self.url = backend.url
+        self.model_name = model_name
+        self.system_instruction = system_instruction
+        self.timeout = timeout
+
+    def _payload(self, prompt: str, stream: bool, response_schema: dict = None) -> dict:
+        messages = [{'role': 'user', 'content': prompt}]
+        if self.system_instruction:
+            messages.insert(0, {'role': 'system', 'content': self.system_instruction})
+        payload = {'model': self.model_name, 'messages': messages, 'stream': stream, 'keep_alive': self.backend.keep_alive,
+                   'options': self.backend.options}
+        if response_schema:
+            # Ollama constrains the output to a JSON schema passed as "format"
+            payload['format'] = response_schema
+        return payload
+
+    def _response(self, text: str, reply: dict):
+        self.backend.record(reply)
+        tokens = (reply.get('prompt_eval_count') or 0) + (reply.get('eval_count') or 0)
+        return SimpleNamespace(text=text, usage_metadata=SimpleNamespace(total_token_count=tokens or None))
+
+    def generate_content(self, prompt: str, stream: bool = False, response_schema: dict = None):
+        response = requests.post(f'{self.url}/api/chat', json=self._payload(prompt, stream, response_schema), timeout=self.timeout, stream=stream)
+        if response.status_code != 200:
+            raise RuntimeError(f"{response.status_code} {response.text}")
+        if stream:
+            return self._stream(response)
+        reply = response.json()
+        return self._response(reply.get('message', {}).get('content', ''), reply)
+
+    def _stream(self, response):
+        # One JSON object per line; the last one (done=true) carries the token counts
+        for line in response.iter_lines():
+            if not line:
+                continue
+            reply = json.loads(line)
+            text = reply.get('message', {}).get('content', '')
+            yield self._response(text, reply) if reply.get('done') else SimpleNamespace(text=text)
+
+
+class OllamaBackend:
+    """
+    A local Ollama server. Before a run, prepare() polls the HTTP endpoint
+    until it answers, checks the model is pulled and loads it; every request
+    then asks Ollama to keep the model loaded for keep_alive, so it is not
+    reloaded between batches. `parallel` requests are meant to be in flight
+    at once (set OLLAMA_NUM_PARALLEL on the server to match). Every request
+    asks for a num_ctx token context window, large enough for a packed batch.
+    stats() turns
+    the token counts and timings Ollama reports into tokens/s.
+    """
+    name = 'ollama'
+    quota = UNLIMITED_QUOTA
+
+    def __init__(self, url: str = None, keep_alive: str = None, parallel: int = None, num_ctx: int = None):
+        self.url = (url or _setting('ollamaUrl', DEFAULT_OLLAMA_URL)).rstrip('/')
+        self.keep_alive = keep_alive or _setting('ollamaKeepAlive', DEFAULT_OLLAMA_KEEP_ALIVE)
+        self.parallel = parallel or _setting('ollamaParallel', DEFAULT_OLLAMA_PARALLEL)
+        self.num_ctx = num_ctx or _setting('ollamaNumCtx', DEFAULT_OLLAMA_NUM_CTX)
+        self.counters = {'requests': 0, 'prompt_tokens': 0, 'output_tokens': 0, 'generate_s': 0.0}
+        self._first_request = None
+        self._last_reply = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _bare(model_name: str) -> str:
+        return model_name[len(OLLAMA_PREFIX):] if model_name.startswith(OLLAMA_PREFIX) else model_name
+
+    @property
+    def options(self) -> dict:
+        """Model options sent with every request (the same ones the model was loaded with, so it is not reloaded)."""
+        return {'num_ctx': self.num_ctx}
+
+    def model(self, model_name: str, system_instruction: str = None):
+        return OllamaModel(self, self._bare(model_name), system_instruction)
+
+    def schema_options(self, schema: dict) -> dict:
+        return {'response_schema': schema}
+
+    def list_models(self) -> list:
+        response = requests.get(f'{self.url}/api/tags', timeout=5)
+        response.raise_for_status()
+        return [{
+            "name": OLLAMA_PREFIX + m['name'],
+            "display_name": f"{m['name']} (local)",
+            "tier": "LOCAL"
+        } for m in response.json().get('models', [])]
+
+    def wait_until_ready(self, timeout: float = 60) -> list:
+        """
+        Polls the server until it answers, with a growing pause between tries.
+        Returns the names of the pulled models; raises TimeoutError after `timeout` seconds.
+        """
+        deadline = time.monotonic() + timeout
+        delay = 0.25
+        while True:
+            try:
+                response = requests.get(f'{self.url}/api/tags', timeout=2)
+                if response.ok:
+                    return [m['name'] for m in response.json().get('models', [])]
+            except requests.RequestException:
+                pass
+            if time.monotonic() + delay > deadline:
+                raise TimeoutError(f"Ollama at {self.url} did not answer within {timeout:.0f}s. Is the container running? (docker compose -f LocalLLm/Ollama.yml up -d)")
+            time.sleep(delay)
+            delay = min(delay * 2, 2.0)
+
+    def prepare(self, model_name: str, timeout: float = 60):
+        """Waits for the server, checks the model is pulled and loads it into memory."""
+        name = self._bare(model_name)
+        pulled = self.wait_until_ready(timeout)
+        if name not in pulled and f'{name}:latest' not in pulled:
+            raise RuntimeError(f"Ollama has no model '{name}'. Pull it first: ollama pull {name}")
+        # A request without a prompt only loads the model (and keeps it for keep_alive)
+        started = time.monotonic()
+        requests.post(f'{self.url}/api/generate', json={'model': name, 'keep_alive': self.keep_alive, 'options': self.options}, timeout=600).raise_for_status()
+        print(f"Ollama model {name} loaded in {time.monotonic() - started:.1f}s "
+              f"(kept for {self.keep_alive}, {self.parallel} parallel requests, {self.num_ctx}-token context).")
+
+    def record(self, reply: dict):
+        """Adds the counts of a finished Ollama reply (the one with done=true) to the stats."""
+        if not reply.get('done'):
+            return
+        with self._lock:
+            now = time.monotonic()
+            if self._first_request is None:
+                # Start the wall clock at the first request, not at the first reply
+                self._first_request = now - (reply.get('total_duration') or 0) / 1e9
+            self._last_reply = now
+            self.counters['requests'] += 1
+            self.counters['prompt_tokens'] += reply.get('prompt_eval_count') or 0
+            self.counters['output_tokens'] += reply.get('eval_count') or 0
+            self.counters['generate_s'] += (reply.get('eval_duration') or 0) / 1e9
+
+    def stats(self) -> dict:
+        """
+        Counters plus two rates: tokens_per_s is the generation speed of one
+        request, throughput_tokens_per_s the output of all parallel requests
+        together over the wall-clock time of the run.
+        """
+        with self._lock:
+            stats = dict(self.counters)
+            wall = (self._last_reply - self._first_request) if self._first_request is not None else 0.0
+        stats['tokens_per_s'] = round(stats['output_tokens'] / stats['generate_s'], 1) if stats['generate_s'] else 0.0
+        stats['throughput_tokens_per_s'] = round(stats['output_tokens'] / wall, 1) if wall > 0 else 0.0
+        stats['generate_s'] = round(stats['generate_s'], 2)
+        return stats
+
+
+class FakeBackend:
+    name = 'fake'
+    quota = UNLIMITED_QUOTA
+    parallel = None
+
+    def __init__(self, url: str = None):
+        self.url = url or _setting('fakeLlmUrl', DEFAULT_FAKE_URL)
+
+    def prepare(self, model_name: str):
+        pass
+
+    def schema_options(self, schema: dict) -> dict:
+        return {'response_schema': schema}
+
+    def stats(self) -> dict:
+        return {}
+
+    def model(self, model_name: str, system_instruction: str = None):
+        return FakeLLMModel(self.url, system_instruction=system_instruction)
+
+    def list_models(self) -> list:
+        return [{"name": FAKE_MODEL, "display_name": "Fake LLM (testing)", "tier": "LOCAL"}]
+
+
+_backends = {}
+
+
+def get_backend(model_name: str):
+    """The shared backend that serves `model_name` (see the module docstring for the naming)."""
+    if model_name == FAKE_MODEL or model_name.startswith(FAKE_MODEL + '/'):
+        kind = FakeBackend
+    elif model_name.startswith(OLLAMA_PREFIX):
+        kind = OllamaBackend
+    else:
+        kind = GeminiBackend
+    if kind not in _backends:
+        _backends[kind] = kind()
+    return _backends[kind]
+
+
+def list_all_models(include_fake: bool = False) -> list:
+    """Models from every reachable backend: Gemini first, then local Ollama models."""
+    backends = [get_backend('models/gemini'), get_backend(OLLAMA_PREFIX)]
+    if include_fake:
+        backends.append(get_backend(FAKE_MODEL))
+    models = []
+    for backend in backends:
+        try:
+            models.extend(backend.list_models())
+        except Exception as e:
+            print(f"Warning: could not list {backend.name} models: {e}")
+    return models
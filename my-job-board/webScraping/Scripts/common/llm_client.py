@@ -0,0 +1,316 @@
+import atexit
+import json
+import os
+import re
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from common.checkpoint import atomic_write_json, file_lock
+from common.llm_backends import get_backend
+from common.ratelimit import AdaptiveRateLimiter, TokenBucket
+
+# Per-model quotas: requests/minute, tokens/minute, requests/day.
+# These are the Gemini free-tier limits; raise them for a paid tier.
+# Local backends (Ollama, the fake endpoint) bring their own, unlimited quota.
+MODEL_QUOTAS = {
+    'models/gemini-2.5-flash-lite':    {'rpm': 15, 'tpm': 250_000, 'rpd': 1000},
+    'models/gemini-flash-lite-latest': {'rpm': 15, 'tpm': 250_000, 'rpd': 1000},
+    'models/gemini-2.5-flash':         {'rpm': 10, 'tpm': 250_000, 'rpd': 250},
+    'models/gemini-flash-latest':      {'rpm': 10, 'tpm': 250_000, 'rpd': 250},
+    'models/gemini-2.0-flash':         {'rpm': 15, 'tpm': 1_000_000, 'rpd': 200},
+    'models/gemini-2.5-pro':           {'rpm': 5,  'tpm': 250_000, 'rpd': 100},
+}
+DEFAULT_QUOTA = {'rpm': 10, 'tpm': 250_000, 'rpd': 250}
+
+BURST_SECONDS = 5.0  # how much of the per-minute quota may be spent at once
+# webScraping/JobData/llm_usage.json: requests per model and day, shared by every script
+DEFAULT_USAGE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'JobData', 'llm_usage.json')
+USAGE_FLUSH_SECONDS = 30.0  # the daily request count is written to usage_path at most this often (and on close)
+try:
+    from zoneinfo import ZoneInfo
+    QUOTA_TIMEZONE = ZoneInfo('America/Los_Angeles')  # Gemini's daily quotas reset at midnight Pacific time
+except Exception:  # no tz database (Windows without the tzdata package): Pacific standard time
+    QUOTA_TIMEZONE = timezone(timedelta(hours=-8))
+RETRY_PATTERNS = (
+    re.compile(r"Please retry in\s*(\d+(?:\.\d+)?)s"),
+    re.compile(r"retry_delay\s*\{[^}]*seconds:\s*(\d+)\s*\}"),
+)
+
+
+class QuotaExhausted(RuntimeError):
+    """Raised when a model's requests-per-day budget is used up."""
+
+
+def quota_day() -> str:
+    """Today's date in QUOTA_TIMEZONE, the day the requests/day quota is counted against."""
+    return datetime.now(QUOTA_TIMEZONE).date().isoformat()
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough prompt size: ~4 characters per token for English text."""
+    return max(1, len(text) // 4)
+
+
+def parse_retry_delay(message: str) -> float:
+    """Seconds suggested by a rate-limit error message, or None."""
+    for pattern in RETRY_PATTERNS:
+        m = pattern.search(message)
+        if m:
+            return float(m.group(1))
+    return None
+
+
+class LLMClient:
+    """
+    One model handle plus the budgets that keep calls under its quota.
+    The handle comes from the model's backend (Gemini, Ollama or the fake
+    endpoint, see common/llm_backends.py); local backends have no quota.
+
+    Calls are scheduled before they are sent instead of after a 429:
+    - requests/minute: an AdaptiveRateLimiter running at the quota, which
+      still backs off (and pauses for the suggested delay) if a 429 slips through
+    - tokens/minute: a TokenBucket charged with the estimated prompt tokens,
+      corrected with the real count when the response reports usage
+    - requests/day: a counter per Pacific-time day (when the quota resets),
+      that raises QuotaExhausted instead of sending a call that is bound to
+      fail; saved to usage_path when given, every USAGE_FLUSH_SECONDS and on close()
+    Counters (calls, tokens, throttled seconds, retries) are in stats().
+
+    generate(prompt, system_instruction=...) keeps one model handle per
+    instruction, built by backend.model(model_name, system_instruction). A
+    long, fixed part of the prompt (the resume and the scoring rules) is then
+    set up once per session and each call only sends what changes.
+    generate(prompt, response_schema=...) asks the backend for JSON matching
+    the schema (constrained decoding) instead of relying on the prompt alone.
+    """
+
+    def __init__(self, model_name: str, quota: dict = None, backend=None, max_retries: int = 2, usage_path: str = None):
+        self.model_name = model_name
+        self.backend = backend or get_backend(model_name)
+        self.quota = {**DEFAULT_QUOTA, **(self.backend.quota or {}), **MODEL_QUOTAS.get(model_name, {}), **(quota or {})}
+        self.max_retries = max_retries
+        self.usage_path = usage_path
+        self._models = {}
+        self._lock = threading.Lock()
+
+        rps = self.quota['rpm'] / 60.0
+        tps = self.quota['tpm'] / 60.0
+        self.requests = AdaptiveRateLimiter(rate=rps, min_rate=rps / 20, max_rate=rps, increase=rps / 10)
+        self.tokens = TokenBucket(tps, capacity=max(1.0, tps * BURST_SECONDS))
+        self.counters = {'calls': 0, 'tokens': 0, 'retries': 0, 'rate_limited': 0, 'broken_streams': 0, 'throttled_s': 0.0}
+        self._day = quota_day()
+        self._day_calls = self._load_usage().get(self._day, {}).get(model_name, 0)
+        self._unsaved_calls = 0  # counted since the last flush_usage()
+        self._usage_flushed_at = time.monotonic()
+        if usage_path:
+            atexit.register(self.flush_usage)
+
+    @property
+    def model(self):
+        """The plain model handle, built once and reused for every call."""
+        return self.model_for(None)
+
+    def model_for(self, system_instruction: str = None):
+        """The model handle for a system instruction, built on first use and reused."""
+        with self._lock:
+            model = self._models.get(system_instruction)
+            if model is None:
+                model = self._models[system_instruction] = self.backend.model(self.model_name, system_instruction)
+            return model
+
+    def request_tokens(self, prompt: str, system_instruction: str = None) -> int:
+        """
+        Estimated input tokens of one call. The system instruction only comes
+        for free when its handle really holds an uploaded context cache;
+        otherwise (local engines, or Gemini when caching is unavailable) it is
+        sent with every request and counted.
+        """
+        tokens = estimate_tokens(prompt)
+        if system_instruction and getattr(self.model_for(system_instruction), 'context_cache', None) is None:
+            tokens += estimate_tokens(system_instruction)
+        return tokens
+
+    def close(self):
+        """Saves the daily request count and deletes the contexts uploaded for this client's system instructions."""
+        self.flush_usage()
+        with self._lock:
+            models, self._models = list(self._models.values()), {}
+        for model in models:
+            cache = getattr(model, 'context_cache', None)
+            if cache is not None:
+                try:
+                    cache.delete()
+                except Exception as e:
+                    print(f"[{self.model_name}] Could not delete cached context: {e}")
+
+    # --- Daily budget ---
+
+    def _load_usage(self) -> dict:
+        """{day: {model: requests}} from usage_path, so the daily count survives restarts."""
+        if not self.usage_path or not os.path.exists(self.usage_path):
+            return {}
+        try:
+            with open(self.usage_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"Warning: could not read LLM usage {self.usage_path}: {e}")
+            return {}
+
+    def _count_request(self):
+        with self._lock:
+            today = quota_day()
+            if today != self._day:
+                self._day, self._day_calls, self._unsaved_calls = today, 0, 0
+            if self._day_calls >= self.quota['rpd']:
+                raise QuotaExhausted(f"{self.model_name}: daily limit of {self.quota['rpd']} requests reached")
+            self._day_calls += 1
+            self._unsaved_calls += 1
+            due = time.monotonic() - self._usage_flushed_at >= USAGE_FLUSH_SECONDS
+        if due:
+            self.flush_usage()
+
+    def flush_usage(self):
+        """
+        Adds the requests counted since the last flush to this model's entry
+        for today in usage_path. Other clients (other models, other scripts
+        running at the same time) share the file, so it is re-read and merged
+        under a file lock rather than overwritten, and the merged count, which
+        includes their requests with this model, becomes this client's count.
+        """
+        if not self.usage_path:
+            return
+        with file_lock(self.usage_path):
+            with self._lock:
+                day, calls, self._unsaved_calls = self._day, self._unsaved_calls, 0
+                self._usage_flushed_at = time.monotonic()
+            if not calls:
+                return
+            # Older days are no longer needed
+            usage = {d: counts for d, counts in self._load_usage().items() if d >= day}
+            counts = usage.setdefault(day, {})
+            counts[self.model_name] = counts.get(self.model_name, 0) + calls
+            atomic_write_json(self.usage_path, usage, indent=2)
+        with self._lock:
+            if self._day == day:
+                self._day_calls = max(self._day_calls, counts[self.model_name] + self._unsaved_calls)
+
+    # --- Calls ---
+
+    def _wait_for_budget(self, tokens: int):
+        self._count_request()
+        waited = self.requests.acquire() + self.tokens.acquire(tokens)
+        with self._lock:
+            self.counters['throttled_s'] += waited
+
+    def _send(self, tokens: int, request):
+        """
+        Runs request(model) once the budgets allow it. Rate-limit errors are
+        retried after the delay the API suggests; other errors back off
+        exponentially. The last error is raised.
+        """
+        backoff = 1.0
+        for attempt in range(1, self.max_retries + 2):
+            self._wait_for_budget(tokens)
+            try:
+                return request()
+            except Exception as e:
+                delay = parse_retry_delay(str(e))
+                with self._lock:
+                    self.counters['retries'] += 1
+                    if delay is not None:
+                        self.counters['rate_limited'] += 1
+                if attempt > self.max_retries:
+                    raise
+                if delay is not None:
+                    # Hold every caller until the suggested delay (plus a buffer) has passed
+                    print(f"[{self.model_name}] Rate limit hit. Waiting {delay + 1:.1f}s (attempt {attempt}/{self.max_retries})")
+                    self.requests.record(429, retry_after=delay + 1.0)
+                else:
+                    print(f"[{self.model_name}] Transient error: {e}. Backing off {backoff:.1f}s (attempt {attempt}/{self.max_retries})")
+                    self.requests.record(None, retry_after=backoff)
+                    backoff *= 2
+
+    def _settle(self, estimated: int, response):
+        """Books a finished call, correcting the token estimate with the real count when reported."""
+        used = self._usage_tokens(response) or estimated
+        if used != estimated:
+            self.tokens.reserve(used - estimated)
+        with self._lock:
+            self.counters['calls'] += 1
+            self.counters['tokens'] += used
+
+    def generate(self, prompt: str, system_instruction: str = None, response_schema: dict = None):
+        """
+        Sends `prompt` once the budgets allow it and returns the model response.
+        system_instruction: context shared by many calls, set up once (see model_for).
+        response_schema: JSON schema the answer must follow (see common/llm_schema.py).
+        """
+        tokens = self.request_tokens(prompt, system_instruction)
+        options = self.backend.schema_options(response_schema) if response_schema else {}
+        response = self._send(tokens, lambda: self.model_for(system_instruction).generate_content(prompt, **options))
+        # Latency is left out: it tracks prompt size, not server health
+        self.requests.record(200)
+        self._settle(tokens, response)
+        return response
+
+    def generate_stream(self, prompt: str, system_instruction: str = None, response_schema: dict = None):
+        """
+        Like generate(), but yields the response text piece by piece as the
+        model produces it. Errors before the first piece are retried as in
+        generate(); if the stream breaks off later it just ends, and the caller
+        keeps whatever it has already received.
+        """
+        tokens = self.request_tokens(prompt, system_instruction)
+        options = self.backend.schema_options(response_schema) if response_schema else {}
+
+        def first_piece():
+            pieces = iter(self.model_for(system_instruction).generate_content(prompt, stream=True, **options))
+            return next(pieces, None), pieces
+
+        piece, pieces = self._send(tokens, first_piece)
+        self.requests.record(200)
+        last = piece
+        try:
+            while piece is not None:
+                if piece.text:
+                    yield piece.text
+                last = piece
+                piece = next(pieces, None)
+        except Exception as e:
+            print(f"[{self.model_name}] Response stream broke off: {e}")
+            with self._lock:
+                self.counters['broken_streams'] += 1
+        finally:
+            # The final piece carries the usage of the whole response
+            self._settle(tokens, last)
+
+    @staticmethod
+    def _usage_tokens(response) -> int:
+        usage = getattr(response, 'usage_metadata', None)
+        return getattr(usage, 'total_token_count', None) if usage is not None else None
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self.counters)
+            stats['throttled_s'] = round(stats['throttled_s'], 2)
+            stats['requests_today'] = self._day_calls
+        stats['rpm_now'] = round(self.requests.current_rate * 60, 1)
+        return stats
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_llm_client(model_name: str, **settings) -> LLMClient:
+    """
+    Returns the shared client for a model, creating it on first use, so every
+    caller in the process draws from the same quota and model handle.
+    settings: LLMClient arguments, only used when the client is created.
+    """
+    with _clients_lock:
+        client = _clients.get(model_name)
+        if client is None:
+            client = _clients[model_name] = LLMClient(model_name, **settings)
+        return client
@@ -0,0 +1,93 @@
+import concurrent.futures
+import time
+
+from common.llm_client import BURST_SECONDS
+from common.ratelimit import TokenBucket
+
+
+class BatchScheduler:
+    """
+    Keeps up to `max_in_flight` LLM batches running at once while staying under
+    a requests-per-minute and a tokens-per-minute quota.
+
+    Each batch is one LLM request. Before a batch is handed to a worker thread
+    the scheduler takes one request from the RPM bucket and the batch's
+    estimated prompt tokens from the TPM bucket, so a burst of large batches is
+    spread out instead of drawing a 429. Results are yielded in the order they
+    finish, so callers can merge and save them while later batches are running.
+    Leave rpm/tpm as None when score_fn already paces itself (e.g. through a
+    common.llm_client.LLMClient); the scheduler then only bounds concurrency.
+
+    Usage:
+        scheduler = BatchScheduler(score_fn, max_in_flight=8, rpm=1000, tpm=1_000_000)
+        for batch_num, batch, result, error in scheduler.run(batches, token_fn):
+            ...
+    """
+
+    def __init__(self, score_fn, max_in_flight: int = 4, rpm: float = None, tpm: float = None):
+        self.score_fn = score_fn
+        self.max_in_flight = max(1, max_in_flight)
+        self.requests = self.tokens = None
+        if rpm:
+            rps = rpm / 60.0
+            self.requests = TokenBucket(rps, capacity=max(1.0, min(self.max_in_flight, rps * BURST_SECONDS)))
+        if tpm:
+            tps = tpm / 60.0
+            self.tokens = TokenBucket(tps, capacity=max(1.0, tps * BURST_SECONDS))
+        self.throttled = 0.0  # seconds spent waiting on the quotas
+        self.completed = 0
+        self.failed = 0
+        self.elapsed = 0.0
+
+    def _wait_for_quota(self, tokens: int):
+        if self.requests is not None:
+            self.throttled += self.requests.acquire()
+        if self.tokens is not None:
+            self.throttled += self.tokens.acquire(tokens)
+
+    def run(self, batches, token_fn=None):
+        """
+        Scores every batch from the `batches` iterable (read lazily).
+        token_fn(batch) -> estimated prompt tokens; defaults to 1 token per batch.
+        Yields (batch_num, batch, result, error) as batches finish; error is the
+        exception raised by score_fn, or None.
+        """
+        started = time.monotonic()
+        batches = iter(batches)
+        in_flight = {}
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_in_flight) as pool:
+            batch_num = 0
+            exhausted = False
+            while in_flight or not exhausted:
+                # 1. Top up to max_in_flight, paying the quota before each submit
+                while not exhausted and len(in_flight) < self.max_in_flight:
+                    batch = next(batches, None)
+                    if batch is None:
+                        exhausted = True
+                        break
+                    batch_num += 1
+                    self._wait_for_quota(token_fn(batch) if token_fn else 1)
+                    in_flight[pool.submit(self.score_fn, batch)] = (batch_num, batch)
+                if not in_flight:
+                    break
+
+                # 2. Hand back whatever has finished
+                done, _ = concurrent.futures.wait(in_flight, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    num, batch = in_flight.pop(future)
+                    try:
+                        result, error = future.result(), None
+                        self.completed += 1
+                    except Exception as e:
+                        result, error = None, e
+                        self.failed += 1
+                    yield num, batch, result, error
+        self.elapsed = time.monotonic() - started
+
+    def stats(self) -> dict:
+        return {
+            'completed': self.completed,
+            'failed': self.failed,
+            'throttled_s': round(self.throttled, 2),
+            'elapsed_s': round(self.elapsed, 2),
+        }
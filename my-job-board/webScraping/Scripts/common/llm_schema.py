@@ -0,0 +1,161 @@
+import re
+
+# One scored job as the ATS prompt asks for it
+MATCH_RESULT_SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'id': {'type': 'integer'},
+        'score': {'type': 'integer', 'minimum': 0, 'maximum': 100},
+        'fit_reason': {'type': 'string'},
+        'missing_skills': {'type': 'array', 'items': {'type': 'string'}},
+        'matching_skills': {'type': 'array', 'items': {'type': 'string'}},
+    },
+    'required': ['id', 'score', 'fit_reason', 'missing_skills', 'matching_skills'],
+}
+MATCH_RESULTS_SCHEMA = {'type': 'array', 'items': MATCH_RESULT_SCHEMA}
+
+# Keywords Gemini's response_schema understands; the rest are only checked locally
+RESPONSE_SCHEMA_KEYS = ('type', 'properties', 'items', 'required', 'enum', 'description', 'nullable', 'format')
+
+_TYPE_CHECKS = {
+    'object': lambda v: isinstance(v, dict),
+    'array': lambda v: isinstance(v, list),
+    'string': lambda v: isinstance(v, str),
+    'integer': lambda v: isinstance(v, int) and not isinstance(v, bool),
+    'number': lambda v: isinstance(v, (int, float)) and not isinstance(v, bool),
+    'boolean': lambda v: isinstance(v, bool),
+}
+
+
+def compile_validator(schema: dict):
+    """
+    Turns a JSON schema (type, properties, required, items, minimum, maximum,
+    enum) into a function value -> list of errors, empty when valid. The schema
+    is walked once here, so checking each result is only a few closure calls.
+    """
+    checks = []
+    if 'type' in schema:
+        type_name = schema['type']
+        is_type = _TYPE_CHECKS[type_name]
+        checks.append(lambda v, path: [] if is_type(v) else [f"{path}: expected {type_name}"])
+    if 'enum' in schema:
+        allowed = schema['enum']
+        checks.append(lambda v, path: [] if v in allowed else [f"{path}: not one of {allowed}"])
+    if 'minimum' in schema:
+        low = schema['minimum']
+        checks.append(lambda v, path: [f"{path}: below {low}"] if _TYPE_CHECKS['number'](v) and v < low else [])
+    if 'maximum' in schema:
+        high = schema['maximum']
+        checks.append(lambda v, path: [f"{path}: above {high}"] if _TYPE_CHECKS['number'](v) and v > high else [])
+    if 'required' in schema:
+        required = schema['required']
+        checks.append(lambda v, path: [f"{path}.{key}: missing" for key in required if key not in v] if isinstance(v, dict) else [])
+    if 'properties' in schema:
+        properties = {key: compile_validator(sub) for key, sub in schema['properties'].items()}
+        checks.append(lambda v, path: [error for key, check in properties.items() if key in v
+                                       for error in check(v[key], f"{path}.{key}")] if isinstance(v, dict) else [])
+    if 'items' in schema:
+        item_check = compile_validator(schema['items'])
+        checks.append(lambda v, path: [error for i, item in enumerate(v)
+                                       for error in item_check(item, f"{path}[{i}]")] if isinstance(v, list) else [])
+
+    def validate(value, path: str = '$') -> list:
+        errors = []
+        for check in checks:
+            errors.extend(check(value, path))
+        return errors
+    return validate
+
+
+def response_schema(schema: dict) -> dict:
+    """
+    The schema as Gemini's response_schema takes it: only RESPONSE_SCHEMA_KEYS,
+    with upper-case type names (OpenAPI's ARRAY, OBJECT, ...).
+    """
+    reduced = {}
+    for key, value in schema.items():
+        if key not in RESPONSE_SCHEMA_KEYS:
+            continue
+        if key == 'type':
+            value = value.upper()
+        elif key == 'properties':
+            value = {name: response_schema(sub) for name, sub in value.items()}
+        elif key == 'items':
+            value = response_schema(value)
+        reduced[key] = value
+    return reduced
+
+
+def _to_int(value):
+    """85, 85.0, "85", "85%" or "85/100" -> 85; None when there is no number."""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return int(round(value))
+    m = re.search(r"-?\d+(?:\.\d+)?", str(value))
+    return int(round(float(m.group(0)))) if m else None
+
+
+def _to_score(value):
+    """
+    _to_int for a 0-100 score, except that a fraction in (0, 1] (0.9, "0.85",
+    1.0) is taken as a 0-1 scale and multiplied by 100: rounding it would turn
+    a strong match into a score of 0 or 1.
+    """
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, float) or (isinstance(value, str) and '.' in value):
+        m = re.search(r"-?\d*\.\d+|-?\d+", str(value))
+        number = float(m.group(0)) if m else None
+        if number is not None and 0 < number <= 1:
+            return int(round(number * 100))
+    return _to_int(value)
+
+
+def _to_list(value) -> list:
+    """A skills field as a list of strings: lists pass, "a, b; c" is split, nothing becomes []."""
+    if value is None:
+        return []
+    if isinstance(value, list):
+        return [str(v).strip() for v in value if str(v).strip()]
+    return [part.strip() for part in re.split(r"[,;\n]", str(value)) if part.strip()]
+
+
+def repair_match_result(item: dict) -> dict:
+    """
+    Coerces the usual near-misses in a scored job: a numeric string id or
+    score, a 0-1 fraction instead of a percentage, a score outside 0-100,
+    skills given as one string, a missing or non-string fit_reason. Anything
+    it cannot fix is left for the validator.
+    """
+    repaired = dict(item)
+    if 'id' in repaired and not _TYPE_CHECKS['integer'](repaired['id']):
+        job_id = _to_int(repaired['id'])
+        if job_id is not None:
+            repaired['id'] = job_id
+    score = _to_score(repaired.get('score'))
+    if score is not None:
+        repaired['score'] = min(100, max(0, score))
+    for field in ('missing_skills', 'matching_skills'):
+        repaired[field] = _to_list(repaired.get(field))
+    if not isinstance(repaired.get('fit_reason'), str):
+        repaired['fit_reason'] = '' if repaired.get('fit_reason') is None else str(repaired['fit_reason'])
+    return repaired
+
+
+_validate_match_result = compile_validator(MATCH_RESULT_SCHEMA)
+
+
+def check_match_result(item):
+    """
+    (result, status) for one scored job: status is 'valid', 'repaired' (fixed by
+    repair_match_result) or 'invalid' (result is None; re-queue the job).
+    """
+    if not _validate_match_result(item):
+        return item, 'valid'
+    if not isinstance(item, dict):
+        return None, 'invalid'
+    repaired = repair_match_result(item)
+    if not _validate_match_result(repaired):
+        return repaired, 'repaired'
+    return None, 'invalid'
@@ -0,0 +1,44 @@
+import os
+
+import soupsieve as sv
+from bs4 import BeautifulSoup
+
+try:
+    import lxml  # noqa: F401  (C parser, much faster than html.parser)
+    HAS_LXML = True
+except ImportError:
+    HAS_LXML = False
+
+PARSERS = ("lxml", "html.parser")
+
+# Pick the fastest installed parser unless SCRAPER_PARSER says otherwise
+PARSER = os.getenv("SCRAPER_PARSER") or ("lxml" if HAS_LXML else "html.parser")
+
+
+def set_parser(name: str):
+    """
+    Switches the BeautifulSoup tree builder used by make_soup().
+    name: 'lxml' or 'html.parser'
+    """
+    global PARSER
+    if name not in PARSERS:
+        raise ValueError(f"Unknown parser '{name}', expected one of {PARSERS}")
+    if name == "lxml" and not HAS_LXML:
+        raise ImportError("lxml is not installed. Install it with: pip install lxml")
+    PARSER = name
+
+
+def make_soup(html: str, parse_only=None) -> BeautifulSoup:
+    """
+    Parses `html` with the active backend.
+    parse_only: optional bs4.SoupStrainer so only the needed part of the page is built.
+    """
+    return BeautifulSoup(html, PARSER, parse_only=parse_only)
+
+
+def compile_selector(css: str):
+    """
+    Compiles a CSS selector once so repeated per-card lookups skip re-parsing it.
+    The result has .select(tag) / .select_one(tag) / .match(tag).
+    """
+    return sv.compile(css)
@@ -0,0 +1,102 @@
+import math
+import re
+from collections import Counter
+
+import numpy as np
+
+try:
+    from sentence_transformers import SentenceTransformer
+except ImportError:  # optional: TF-IDF is used when it is not installed
+    SentenceTransformer = None
+
+EMBEDDING_MODEL = 'all-MiniLM-L6-v2'  # small CPU model (~80MB)
+MAX_FEATURES = 20000  # TF-IDF vocabulary cap (most common terms win)
+
+TOKEN_PATTERN = re.compile(r"[a-z][a-z0-9+#.\-]*[a-z0-9+#]|[a-z]")
+STOP_WORDS = frozenset("""
+a an and are as at be by for from has have in is it its of on or our that the their this to was we
+will with you your they them he she his her not but can all any may must able who what which
+""".split())
+
+_embedder = None
+
+
+def tokenize(text: str) -> list:
+    return [t for t in TOKEN_PATTERN.findall(text.lower()) if t not in STOP_WORDS]
+
+
+def tfidf_similarities(query: str, docs: list, max_features: int = MAX_FEATURES) -> np.ndarray:
+    """
+    Cosine similarity of each of `docs` to `query` over L2-normalised TF-IDF
+    vectors (sublinear tf, smoothed idf, the query counted as a document).
+    Each document stays a sparse {term: count} dict: its norm is taken over its
+    own terms and only the terms it shares with the query are multiplied, so
+    no n_docs x vocabulary matrix is ever built.
+    """
+    counts = [Counter(tokenize(doc or '')) for doc in [query] + list(docs)]
+    doc_freq = Counter()
+    for c in counts:
+        doc_freq.update(c.keys())
+    n_docs = len(counts)
+    idf = {term: math.log((1 + n_docs) / (1 + df)) + 1.0 for term, df in doc_freq.most_common(max_features)}
+
+    def weights(c):
+        vector = {term: (1.0 + math.log(n)) * idf[term] for term, n in c.items() if term in idf}
+        return vector, math.sqrt(sum(w * w for w in vector.values())) or 1.0
+
+    query_vector, query_norm = weights(counts[0])
+    similarities = np.zeros(len(docs), dtype=np.float32)
+    for row, c in enumerate(counts[1:]):
+        vector, norm = weights(c)
+        shared = sum(w * query_vector[term] for term, w in vector.items() if term in query_vector)
+        similarities[row] = shared / (norm * query_norm)
+    return similarities
+
+
+def embed(texts: list) -> np.ndarray:
+    """Unit-length sentence-transformers vectors for `texts`, one row each."""
+    global _embedder
+    if SentenceTransformer is None:
+        raise ImportError("The embedding pre-ranker needs sentence-transformers. Install it with: pip install sentence-transformers")
+    if _embedder is None:
+        _embedder = SentenceTransformer(EMBEDDING_MODEL, device='cpu')
+    return np.asarray(_embedder.encode(texts, batch_size=64, normalize_embeddings=True), dtype=np.float32)
+
+
+def similarities(resume_text: str, docs: list, backend: str = 'auto') -> np.ndarray:
+    """
+    Cosine similarity of each doc to the resume.
+    backend: 'embedding' (sentence-transformers), 'tfidf', or 'auto' (embedding when installed).
+    """
+    if backend == 'tfidf' or (backend == 'auto' and SentenceTransformer is None):
+        return tfidf_similarities(resume_text, docs)
+    vectors = embed([resume_text] + list(docs))
+    return vectors[1:] @ vectors[0]
+
+
+def rank_jobs(resume_text: str, jobs: list, top_k: int = None, min_similarity: float = None, backend: str = 'auto'):
+    """
+    Scores every job's full_description against the resume by cosine
+    similarity and keeps the best ones for the LLM.
+
+    top_k: keep at most this many jobs (None = no cap).
+    min_similarity: drop jobs below this cosine similarity (None = no floor).
+    Returns (kept_jobs, similarities) with kept_jobs sorted best first; each
+    kept job also gets a 'prerank_similarity' field.
+    """
+    if not jobs:
+        return [], np.zeros(0, dtype=np.float32)
+    scores = similarities(resume_text, [job.get('full_description') or '' for job in jobs], backend=backend)
+
+    order = np.argsort(-scores, kind='stable')
+    if min_similarity is not None:
+        order = order[scores[order] >= min_similarity]
+    if top_k is not None:
+        order = order[:top_k]
+
+    kept = []
+    for i in order:
+        job = jobs[i]
+        job['prerank_similarity'] = round(float(scores[i]), 4)
+        kept.append(job)
+    return kept, scores
@@ -0,0 +1,159 @@
+import asyncio
+import threading
+import time
+from urllib.parse import urlsplit
+
+BACKOFF_STATUSES = (429, 503)
+LATENCY_WARMUP = 10  # responses seen before latency can trigger a backoff
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: `rate` tokens per second, bursts up to `capacity`.
+
+    Callers reserve tokens and wait out any debt, so concurrent threads (or
+    coroutines) are handed evenly spaced slots instead of all firing at once.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, tokens: float = 1.0) -> float:
+        """Takes `tokens` now (going into debt if needed) and returns the seconds to wait."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._tokens -= tokens
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """Blocks until `tokens` are available. Returns the time spent waiting."""
+        delay = self.reserve(tokens)
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+    async def acquire_async(self, tokens: float = 1.0) -> float:
+        """Coroutine version of acquire()."""
+        delay = self.reserve(tokens)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return delay
+
+
+class AdaptiveRateLimiter(TokenBucket):
+    """
+    Token bucket whose rate follows server feedback (AIMD).
+
+    Every healthy response adds `increase` req/s up to `max_rate`. A 429/503,
+    a network error, or rising latency cuts the rate by `decrease_factor` (at
+    most once per `cooldown` seconds), down to `min_rate`. Latency is "rising"
+    when the short-term average passes `latency_factor` x the long-term one.
+    A Retry-After value pauses the bucket for that long.
+    """
+
+    def __init__(self, rate: float = 2.0, min_rate: float = 0.2, max_rate: float = 10.0, increase: float = 0.1,
+                 decrease_factor: float = 0.5, latency_factor: float = 3.0, cooldown: float = 1.0):
+        super().__init__(rate, capacity=1.0)
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease_factor = decrease_factor
+        self.latency_factor = latency_factor
+        self.cooldown = cooldown
+        self._latency_fast = None
+        self._latency_slow = None
+        self._latency_samples = 0
+        self._last_decrease = 0.0
+        self.backoffs = 0
+
+    def configure(self, **settings):
+        """Updates any of the constructor settings (e.g. rate, max_rate) in place."""
+        with self._lock:
+            for name, value in settings.items():
+                if value is None:
+                    continue
+                if not hasattr(self, name):
+                    raise AttributeError(f"Unknown rate limiter setting '{name}'")
+                setattr(self, name, value)
+            self.rate = min(max(self.rate, self.min_rate), self.max_rate)
+
+    @property
+    def current_rate(self) -> float:
+        """Requests per second currently allowed."""
+        return self.rate
+
+    def _back_off(self, now: float, pause: float = None):
+        if now - self._last_decrease >= self.cooldown:
+            self._last_decrease = now
+            self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+            self.backoffs += 1
+        if pause:
+            # Push the bucket into debt (at the new rate) so nobody sends until the pause is over
+            self._tokens = min(self._tokens, -pause * self.rate)
+
+    def record(self, status: int = None, latency: float = None, retry_after: float = None):
+        """
+        Feeds one response back into the limiter.
+        status: HTTP status, or None when the request failed outright.
+        latency: seconds the request took.
+        retry_after: seconds from a Retry-After header, if any.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if status is None or status in BACKOFF_STATUSES:
+                self._back_off(now, retry_after)
+                return
+
+            if latency is not None:
+                if self._latency_samples == 0:
+                    self._latency_fast = self._latency_slow = latency
+                else:
+                    self._latency_fast = 0.7 * self._latency_fast + 0.3 * latency
+                    self._latency_slow = 0.98 * self._latency_slow + 0.02 * latency
+                self._latency_samples += 1
+                # Wait for a few samples so the long-term average means something
+                if self._latency_samples >= LATENCY_WARMUP and self._latency_fast > self._latency_slow * self.latency_factor:
+                    self._back_off(now)
+                    return
+
+            self.rate = min(self.max_rate, self.rate + self.increase)
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(url_or_host: str, **settings) -> AdaptiveRateLimiter:
+    """
+    Returns the shared limiter for a host, creating it on first use.
+    settings: AdaptiveRateLimiter arguments, applied on creation and updated on later calls.
+    """
+    host = urlsplit(url_or_host).netloc.lower() if '//' in url_or_host else url_or_host.lower()
+    with _limiters_lock:
+        limiter = _limiters.get(host)
+        if limiter is None:
+            limiter = _limiters[host] = AdaptiveRateLimiter(**settings)
+            return limiter
+    if settings:
+        limiter.configure(**settings)
+    return limiter
+
+
+def parse_retry_after(value) -> float:
+    """Seconds from a Retry-After header value (only the delay-seconds form), or None."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
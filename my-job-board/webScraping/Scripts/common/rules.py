@@ -0,0 +1,151 @@
+import re
+from collections import Counter
+
+# Clearance and polygraph tiers, lowest first: a level meets every level below it
+CLEARANCE_LEVELS = ('None', 'Public Trust', 'Secret', 'Top Secret', 'TS/SCI')
+POLYGRAPH_LEVELS = ('None', 'CI', 'Full Scope')
+
+# Checked highest tier first; the first pattern that matches decides
+CLEARANCE_PATTERNS = (
+    ('TS/SCI', re.compile(r"\bTS\s*/\s*SCI\b|\btop\s+secret\s*/\s*SCI\b|\bSCI\b", re.I)),
+    ('Top Secret', re.compile(r"\b(?i:top\s+secret)\b|\bTS\b")),
+    ('Secret', re.compile(r"\bsecret\b", re.I)),
+    ('Public Trust', re.compile(r"\bpublic\s+trust\b", re.I)),
+)
+POLYGRAPH_PATTERNS = (
+    ('None', re.compile(r"\bno\s+poly(?:graph)?\b|\bpoly(?:graph)?\s*:?\s*(?:none|no|not\s+required)\b", re.I)),
+    ('Full Scope', re.compile(r"\bfull[\s-]*scope\b|\bFSP\b|\blifestyle\s+poly(?:graph)?\b", re.I)),
+    ('CI', re.compile(r"\bCI\s*/?\s*poly(?:graph)?\b|\bcounter[\s-]*intelligence\s+poly(?:graph)?\b|\bpoly(?:graph)?\b", re.I)),
+)
+# A card field that states there is no requirement; it does not fall through to the description
+NONE_VALUE_PATTERN = re.compile(r"^\s*(?:none|no|not\s+required)\s*$", re.I)
+# Words that make a mention optional ("TS/SCI preferred", "ability to obtain a Secret clearance")
+QUALIFIER_PATTERN = re.compile(r"\bpreferred\b|\bdesired\b|\bdesirable\b|\ba\s+plus\b|\bnice\s+to\s+have\b"
+                               r"|\b(?:ability|able|eligible|eligibility)\s+to\s+obtain\b", re.I)
+# Sentences (and ;-separated clauses) are checked for a qualifier one by one
+SENTENCE_END_PATTERN = re.compile(r"([.;\n])")
+# The same as one pattern, for RE2 (common.features); Python's backtracking re
+# takes quadratic time on it for long sentences without a qualifier
+QUALIFIED_PATTERN = re.compile(rf"[^.;\n]*(?:{QUALIFIER_PATTERN.pattern})[^.;\n]*", re.I)
+YEARS_PATTERN = re.compile(r"(\d{1,2})\s*\+?\s*(?:or\s+more\s+|plus\s+)?years?\b(?:\s+of)?(?:\s+[\w/-]+){0,4}?\s+experience", re.I)
+YEARS_FIELD_PATTERN = re.compile(r"(\d{1,2})")
+ONSITE_PATTERN = re.compile(r"\bon[\s-]?site\b", re.I)
+REMOTE_PATTERN = re.compile(r"\bremote\b|\bhybrid\b|\btelework\b", re.I)
+
+
+def _first_level(patterns, *texts):
+    """The level of the first pattern found in the first text that has one, else None."""
+    for text in texts:
+        if not text:
+            continue
+        for level, pattern in patterns:
+            if pattern.search(text):
+                return level
+    return None
+
+
+def _stated_level(patterns, *values):
+    """
+    The level the card fields state: the first pattern found in them, or
+    'None' for an explicit none ('None', 'No', 'Not Required'). None when they
+    are blank or a placeholder such as 'Not Specified'.
+    """
+    values = [str(value or '') for value in values]
+    level = _first_level(patterns, ' '.join(values))
+    if level is None and any(NONE_VALUE_PATTERN.search(value) for value in values):
+        level = 'None'
+    return level
+
+
+def requirement_text(description: str) -> str:
+    """`description` without the sentences that only prefer something (see QUALIFIER_PATTERN)."""
+    return ''.join(' ' if QUALIFIER_PATTERN.search(piece) else piece for piece in SENTENCE_END_PATTERN.split(description))
+
+
+def clearance_rank(level: str) -> int:
+    return CLEARANCE_LEVELS.index(level) if level in CLEARANCE_LEVELS else 0
+
+
+def polygraph_rank(level: str) -> int:
+    return POLYGRAPH_LEVELS.index(level) if level in POLYGRAPH_LEVELS else 0
+
+
+def job_requirements(job: dict) -> dict:
+    """
+    What a job demands, read from its structured fields first and its
+    description second:
+        clearance  one of CLEARANCE_LEVELS ('None' when nothing is mentioned)
+        polygraph  one of POLYGRAPH_LEVELS
+        years      the smallest "N+ years ... experience" asked for, or None
+        onsite     True when the job is on-site only (no remote/hybrid/telework mention)
+    A clearance or polygraph stated on the card, 'None' included, is final.
+    Description sentences that only prefer something ("TS/SCI preferred",
+    "ability to obtain a Secret clearance") do not count as requirements.
+    """
+    description = job.get('full_description') or ''
+    required = requirement_text(description)
+    clearance = _stated_level(CLEARANCE_PATTERNS, job.get('clearance'), job.get('clearance_required')) \
+        or _first_level(CLEARANCE_PATTERNS, required) or 'None'
+    polygraph = _stated_level(POLYGRAPH_PATTERNS, job.get('polygraph')) \
+        or _first_level(POLYGRAPH_PATTERNS, required) or 'None'
+
+    years = [int(n) for n in YEARS_PATTERN.findall(required)]
+    if not years:
+        years = [int(n) for n in YEARS_FIELD_PATTERN.findall(str(job.get('years_exp_required') or ''))]
+    location = ' '.join(str(job.get(key) or '') for key in ('remote_eligible', 'location'))
+    onsite = bool(ONSITE_PATTERN.search(location) or ONSITE_PATTERN.search(description)) \
+        and not REMOTE_PATTERN.search(description)
+    return {'clearance': clearance, 'polygraph': polygraph, 'years': min(years) if years else None, 'onsite': onsite}
+
+
+class RuleEngine:
+    """
+    Deterministic hard filter run before any job is sent to the LLM.
+
+    constraints (None = not checked):
+        clearance   highest clearance the user holds (CLEARANCE_LEVELS);
+                    jobs asking for more are rejected (TS/SCI > Top Secret > Secret)
+        polygraph   polygraph the user holds (POLYGRAPH_LEVELS); Full Scope > CI
+        max_years   the user's years of experience; jobs whose smallest stated
+                    requirement is higher are rejected
+        remote_only reject jobs that are on-site only
+    reject_reason(job) returns the first broken rule ('clearance', 'polygraph',
+    'years', 'onsite') or None; counts per rule are kept in `rejected`.
+    """
+
+    def __init__(self, clearance: str = None, polygraph: str = None, max_years: int = None, remote_only: bool = False):
+        for value, levels in ((clearance, CLEARANCE_LEVELS), (polygraph, POLYGRAPH_LEVELS)):
+            if value is not None and value not in levels:
+                raise ValueError(f"Unknown level '{value}', expected one of {levels}")
+        self.clearance = clearance_rank(clearance) if clearance is not None else None
+        self.polygraph = polygraph_rank(polygraph) if polygraph is not None else None
+        self.max_years = max_years
+        self.remote_only = remote_only
+        self.rejected = Counter()
+
+    @property
+    def active(self) -> bool:
+        return any(v is not None for v in (self.clearance, self.polygraph, self.max_years)) or self.remote_only
+
+    def reject_reason(self, job: dict, requirements: dict = None):
+        """requirements: job_requirements(job), when already computed (e.g. in bulk)."""
+        if not self.active:
+            return None
+        req = requirements or job_requirements(job)
+        reason = None
+        if self.clearance is not None and clearance_rank(req['clearance']) > self.clearance:
+            reason = 'clearance'
+        elif self.polygraph is not None and polygraph_rank(req['polygraph']) > self.polygraph:
+            reason = 'polygraph'
+        elif self.max_years is not None and req['years'] is not None and req['years'] > self.max_years:
+            reason = 'years'
+        elif self.remote_only and req['onsite']:
+            reason = 'onsite'
+        if reason:
+            self.rejected[reason] += 1
+        return reason
+
+    def summary(self) -> str:
+        total = sum(self.rejected.values())
+        detail = ', '.join(f"{reason} {n}" for reason, n in self.rejected.most_common())
+        return f"Rule prefilter rejected {total} jobs" + (f" ({detail})" if detail else '')
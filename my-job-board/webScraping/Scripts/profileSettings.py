@@ -1,4 +1,42 @@
 minSalary = 110000
 minScore = 90
+# LLM batches are packed up to atsBatchTokenBudget prompt tokens (resume included unless
+# llmCachedContext sends it once), with at most atsBatchSize jobs each.
+# ~TPM/RPM of the model uses both quotas evenly.
 atsBatchSize = 30
-llmModel = 'models/gemini-2.5-flash-lite'
\ No newline at end of file
+atsBatchTokenBudget = 16000
+# LLM used for scoring and tailoring: a Gemini model, 'ollama/<model>' for a local
+# Ollama model (e.g. 'ollama/llama3.1:8b'), or 'fake' for the test endpoint
+llmModel = 'models/gemini-2.5-flash-lite'
+ollamaUrl = 'http://localhost:11434'
+# Local Ollama scoring: keep the model loaded between batches and keep ollamaParallel
+# requests in flight (start the server with OLLAMA_NUM_PARALLEL set to the same value)
+ollamaKeepAlive = '30m'
+ollamaParallel = 4
+# Ollama context window (tokens) per request; must hold a packed batch (atsBatchTokenBudget),
+# the resume and rules and the JSON answer, or Ollama silently cuts the start of the prompt
+ollamaNumCtx = 24576
+fakeLlmUrl = 'http://127.0.0.1:8090'
+# LLM scoring: batches kept in flight (quotas per model are in common/llm_client.py)
+llmConcurrency = 4
+# Upload the resume and scoring rules once per session (Gemini context caching,
+# or a system instruction when caching is unavailable) instead of with every batch
+llmCachedContext = True
+# Ask the LLM for schema-constrained JSON (Gemini response_schema / Ollama format)
+llmStructuredOutput = True
+# Two-tier cascade: llmModel scores every job and jobs it scores within cascadeBand
+# points of minScore are re-scored by cascadeModel (None = off), e.g. 'models/gemini-2.5-flash'
+cascadeModel = None
+cascadeBand = 10
+# Local pre-ranking before the LLM: keep the prerankTopK jobs most similar to the resume
+# (None = no cap, every qualifying job is scored) that score at least
+# prerankMinSimilarity (cosine, 0-1). Jobs already in the score cache are always kept.
+prerankTopK = None
+prerankMinSimilarity = 0.05
+# Rule prefilter before any LLM call: jobs asking for more than you have are rejected
+# locally (None / False = not checked). Clearance: 'None' < 'Public Trust' < 'Secret'
+# < 'Top Secret' < 'TS/SCI'; polygraph: 'None' < 'CI' < 'Full Scope' (see common/rules.py)
+userClearance = None
+userPolygraph = None
+userYearsExperience = None
+requireRemote = False
@@ -1,11 +1,10 @@
-import google.generativeai as genai
 import os,json
 from profileSettings import llmModel
-api_key = os.getenv("GENAI_API_KEY")
-genai.configure(api_key=api_key)
+from common.llm_client import get_llm_client, DEFAULT_USAGE_PATH
 
-def invoke_gemini_tailor(resume_text, job_data, model_name):
-    model = genai.GenerativeModel(llmModel)
+def invoke_gemini_tailor(resume_text, job_data, model_name=None):
+    # Any backend works here: a Gemini model, ollama/<local model> or fake
+    client = get_llm_client(model_name or llmModel, usage_path=DEFAULT_USAGE_PATH)
     
     prompt = f"""
     Act as a professional Executive Resume Writer specializing in Defense and Aerospace.
@@ -31,7 +30,7 @@ def invoke_gemini_tailor(resume_text, job_data, model_name):
     """
      
     try:
-        response = model.generate_content(prompt)
+        response = client.generate(prompt)
         # Clean the response text for JSON parsing
         clean_json = response.text.replace('```json', '').replace('```', '').strip()
         return json.loads(clean_json)
@@ -3,10 +3,11 @@ import sys
 import subprocess
 import json
 import time
-import google.generativeai as genai
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 from docx import Document
+from common.jobdb import JobDB
+from common.llm_backends import list_all_models
 
 # --- PATH LOGIC ---
 # Ensures the script knows where it is relative to the folders
@@ -18,9 +19,10 @@ APPLIED_TRACKER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
 if not os.path.exists(UPLOAD_FOLDER):
     os.makedirs(UPLOAD_FOLDER)
 
-# Setup Gemini
-api_key = os.getenv("GENAI_API_KEY")
-genai.configure(api_key=api_key)
+# Jobs, LLM analyses and applications share one SQLite store.
+# Applied ids from the old JSON tracker are carried over on startup.
+job_db = JobDB()
+job_db.import_applied(APPLIED_TRACKER_PATH)
 
 app = Flask(__name__)
 CORS(app)
@@ -101,18 +103,9 @@ def run_ats():
 
 @app.route('/api/get-models', methods=['GET'])
 def get_models():
-    """Fetches and categorizes Gemini models."""
+    """Fetches and categorizes the models of every LLM backend (Gemini, then local Ollama models)."""
     try:
-        raw_models = genai.list_models()
-        selectable = []
-        for m in raw_models:
-            if 'generateContent' in m.supported_generation_methods:
-                selectable.append({
-                    "name": m.name,
-                    "display_name": m.display_name,
-                    "tier": "PAID" if "pro" in m.name else "FREE"
-                })
-        return jsonify({'models': selectable})
+        return jsonify({'models': list_all_models()})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -123,28 +116,15 @@ def get_models():
 @app.route('/api/mark-applied', methods=['POST'])
 def mark_applied():
     """Endpoint for React to signal that a job has been applied to."""
-    def get_applied_ids():
-        """Reads the list of applied job IDs from the JSON tracker."""
-        if not os.path.exists(APPLIED_TRACKER_PATH):
-            return []
-        try:
-            with open(APPLIED_TRACKER_PATH, 'r') as f:
-                return json.load(f)
-        except Exception:
-            return []
     data = request.json
     job_id = data.get('jobId')
     
     if not job_id:
         return jsonify({"error": "No jobId provided"}), 400
 
-    applied_ids = get_applied_ids()
-    if job_id not in applied_ids:
-        applied_ids.append(job_id)
-        with open(APPLIED_TRACKER_PATH, 'w') as f:
-            json.dump(applied_ids, f, indent=4)
+    job_db.mark_applied(job_id)
     
-    return jsonify({"status": "success", "applied": applied_ids})
+    return jsonify({"status": "success", "applied": job_db.applied_ids()})
 
 @app.route('/api/tailor-resume', methods=['POST'])
 def handle_tailoring():
@@ -165,23 +145,18 @@ def handle_tailoring():
             return ""
 
     try:
-        # 1. Locate Master Analysis (Moving up from Scripts to src)
+        # 1. Look the job (and its latest analysis) up by job_id
         base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        analysis_path = os.path.join(f'{base_dir}\\JobData\\ClearanceJobs', 'MASTER_ANALYSIS.json')
-        with open(analysis_path, 'r') as f:
-            all_jobs = json.load(f)
-        
-        # 2. Extract the specific job data
-        target_job = next((j for j in all_jobs if j.get('jobId') == job_id), None)
+        target_job = job_db.get_analyzed_job(job_id)
         if not target_job:
             return jsonify({"error": "Job details not found for tailoring."}), 404
 
-        # 3. Read Master Resume Text (Assumes you have a helper to get text)
+        # 2. Read Master Resume Text (Assumes you have a helper to get text)
         resume_path = os.path.join(base_dir, 'Resume_Uploads_', resume_name)
         master_text = extract_text_from_docx(resume_path) # You'll need a PDF/Docx parser here
 
-        # 4. Invoke the Tailor Logic
-        tailored_content = resumeWriter.invoke_gemini_tailor(master_text, target_job)
+        # 3. Invoke the Tailor Logic
+        tailored_content = resumeWriter.invoke_gemini_tailor(master_text, target_job, data.get('model'))
         
         return jsonify({
             "status": "success",
@@ -15,12 +15,21 @@ import csv
 import json
 import os
 import re
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 import glob
+import heapq
+from collections import Counter
 from datetime import datetime
 import pandas as pd
 from profileSettings import minSalary, minScore
 import subprocess
+from common.jobstore import iter_jobs
+from common.jobdb import JobDB
+
+# Batch files written by the ATS stage (nested .json). The per-file CLI path
+# reads them with json.load, so flat .jsonl batches are only picked up by the
+# merge functions when a pattern that matches them is passed explicitly
+BATCH_PATTERN = 'llm_data_ClearenceJobs_*.json'
 def parse_score(s: Any) -> Optional[float]:
     """Parse a score value into a float (0-100). Returns None if missing/invalid."""
     if s is None:
@@ -46,7 +55,234 @@ def load_master_json(path: str) -> Dict[str, Dict[str, Dict[str, Any]]]:
         return json.load(f)
 
 
-def load_master_from_folder(folder: str, pattern: str = 'llm_data_ClearenceJobs_*.json', *, dedup_policy: str = 'higher_score', conflict_report_path: Optional[str] = None) -> Dict[str, Dict[str, Dict[str, Any]]]:
+def iter_role_entries(files: List[str], errors: Optional[List[Any]] = None) -> Iterator[Tuple[str, str, str, Dict[str, Any]]]:
+    """Yield (file, company, role, detail) for every role in the given batch files.
+
+    Files are read one at a time, so only one batch is ever in memory.
+    `.json` files hold the nested {company: {role: detail}} batches written by the
+    ATS stage; `.jsonl` files hold one flat record per line (see common.jobstore).
+    Unreadable files are reported (and appended to `errors` as (file, message) when given) and skipped.
+    """
+    for fp in files:
+        try:
+            if fp.endswith('.jsonl'):
+                for record in iter_jobs(fp):
+                    detail = {k: v for k, v in record.items() if k not in ('company', 'role_name')}
+                    yield fp, record.get('company', 'Unknown Company'), record.get('role_name', 'Unknown Role'), detail
+                continue
+            with open(fp, 'r', encoding='utf-8') as f:
+                m = json.load(f)
+        except Exception as e:
+            print(f'Warning: failed to load {fp}: {e}')
+            if errors is not None:
+                errors.append((fp, str(e)))
+            continue
+        for company, roles in m.items():
+            for role, detail in roles.items():
+                yield fp, company, role, detail
+
+
+class MasterMerger:
+    """Single-pass merge of batch files into one record per (company, role).
+
+    Each role entry is looked at once, as iter_role_entries() streams it: the
+    dedup policy decides on the spot whether it replaces the record kept so
+    far, and score/link conflicts and the canonical link map are collected on
+    the way. Memory is one winning record per unique job, plus the report.
+
+    - dedup_policy='latest' -> later files overwrite earlier entries
+    - dedup_policy='higher_score' -> replace the kept entry only if the incoming score is higher
+
+    With top_n set, highest scores first and the 'higher_score' policy, each
+    company keeps a bounded heap of its top_n rows. A record that falls out is
+    dropped and only its score is remembered for de-duplication. The same job
+    offered again with a higher score is ranked anew and re-enters the heap
+    (as the new record) when it beats the company's lowest kept row. Since a
+    kept score can only go up, the result is the same top_n rows the
+    unbounded merge gives. Otherwise every record is kept and the top_n are
+    picked at the end.
+
+    Usage:
+        merger = MasterMerger(dedup_policy='higher_score', top_n=5)
+        merger.add_files(files)
+        merger.write_reports('merge_conflicts.json')
+        by_company = merger.by_company()
+    """
+
+    def __init__(self, dedup_policy: str = 'higher_score', *, top_n: Optional[int] = None, descending: bool = True, min_score: Optional[float] = minScore):
+        self.dedup_policy = dedup_policy
+        self.top_n = top_n
+        self.descending = descending
+        self.min_score = min_score
+        self.bounded = bool(top_n) and descending and dedup_policy == 'higher_score'
+        self.conflicts: List[Dict[str, Any]] = []
+        self.link_map: Dict[str, Dict[str, Any]] = {}
+        self.errors: List[Any] = []
+        self.files = 0
+        self.entries = 0
+        self.occurrences: Counter = Counter()           # (company, role), whitespace-stripped -> times seen
+        self._scores: Dict[str, Dict[str, Tuple[float, int]]] = {}  # company -> role -> (kept score, first-seen order)
+        self._details: Dict[str, Dict[str, Dict[str, Any]]] = {}    # company -> role -> kept record
+        self._heaps: Dict[str, List[List[Any]]] = {}                # company -> [[rank, role], ...] when bounded
+        self._file_ts: Dict[str, str] = {}
+
+    @property
+    def link_collisions(self) -> int:
+        return sum(1 for c in self.conflicts if c['type'] == 'link_collision')
+
+    def add_files(self, files: List[str]) -> 'MasterMerger':
+        for fp, company, role, detail in iter_role_entries(files, errors=self.errors):
+            self.add(fp, company, role, detail)
+        self.files += len(files)
+        return self
+
+    def _claim_link(self, new_detail: Dict[str, Any], link_key: Optional[str], company: str, role: str, fp: str) -> None:
+        """Maps link_key to (company, role) unless another role already owns it; then the incoming
+        record loses its link and is marked with a link conflict (the first-seen mapping is kept)."""
+        if not link_key:
+            return
+        assoc = self.link_map.get(link_key)
+        if assoc is None:
+            self.link_map[link_key] = {'company': company, 'role': role, 'file': os.path.basename(fp), 'timestamp': self._file_ts[fp]}
+            return
+        if assoc['company'] == company and assoc['role'] == role:
+            return
+        new_detail['link_conflict'] = True
+        new_detail['link_conflict_with'] = assoc
+        new_detail.pop('link', None)
+        self.conflicts.append({
+            'type': 'link_collision',
+            'link': link_key,
+            'existing_company': assoc['company'],
+            'existing_role': assoc['role'],
+            'existing_file': assoc['file'],
+            'new_company': company,
+            'new_role': role,
+            'new_file': os.path.basename(fp),
+            'decision': 'keep_existing'
+        })
+
+    def add(self, fp: str, company: str, role: str, detail: Dict[str, Any]) -> None:
+        if fp not in self._file_ts:
+            self._file_ts[fp] = datetime.fromtimestamp(os.path.getmtime(fp)).isoformat()
+        self.entries += 1
+        self.occurrences[(company.strip(), role.strip())] += 1
+        scores = self._scores.setdefault(company, {})
+        self._details.setdefault(company, {})
+        new_score = parse_score(detail.get('score'))
+        new_score_val = new_score if new_score is not None else -1
+
+        # Normalize link value for link_map tracking
+        link_val = detail.get('link')
+        link_key = link_val.strip() if isinstance(link_val, str) and link_val.strip() != '' else None
+
+        if role not in scores:
+            new_detail = dict(detail)
+            new_detail['chosen_by'] = 'initial'
+            self._claim_link(new_detail, link_key, company, role, fp)
+            scores[role] = (new_score_val, self.entries)
+            self._keep(company, role, new_detail)
+            return
+
+        existing_score_val, seq = scores[role]
+        if self.dedup_policy == 'higher_score' and new_score_val <= existing_score_val:
+            decision = 'kept'
+        else:
+            # 'latest' (and any unknown policy) always takes the incoming entry
+            new_detail = dict(detail)
+            new_detail['chosen_by'] = 'higher_score' if self.dedup_policy == 'higher_score' else 'latest'
+            self._claim_link(new_detail, link_key, company, role, fp)
+            scores[role] = (new_score_val, seq)
+            self._keep(company, role, new_detail)
+            decision = 'replaced'
+
+        # record conflict info for diagnostics (score-based conflicts)
+        self.conflicts.append({
+            'type': 'score_conflict',
+            'company': company,
+            'role': role,
+            'existing_score': existing_score_val,
+            'new_score': new_score_val,
+            'new_file': os.path.basename(fp),
+            'decision': decision,
+            'chosen_by': 'higher_score' if self.dedup_policy == 'higher_score' else 'latest'
+        })
+
+    def _keep(self, company: str, role: str, detail: Dict[str, Any]) -> None:
+        """Stores the new winning record for (company, role); when bounded, only if it makes the company's top_n."""
+        details = self._details[company]
+        if not self.bounded:
+            details[role] = detail
+            return
+        score, seq = self._scores[company][role]
+        if self.min_score is not None and score < self.min_score:
+            return
+        # Heap order = output order: highest score, then first seen
+        rank = (score, -seq)
+        heap = self._heaps.setdefault(company, [])
+        if role in details:
+            # Already in the heap: its rank only went up
+            for entry in heap:
+                if entry[1] == role:
+                    entry[0] = rank
+            heapq.heapify(heap)
+        elif len(heap) < self.top_n:
+            heapq.heappush(heap, [rank, role])
+        elif rank > heap[0][0]:
+            _, dropped = heapq.heapreplace(heap, [rank, role])
+            del details[dropped]
+        else:
+            return
+        details[role] = detail
+
+    def master(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """The kept records as {company: {role: detail}} (every job unless bounded by top_n)."""
+        return {company: dict(roles) for company, roles in self._details.items()}
+
+    def by_company(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Company -> rows at or above min_score in output order, as flatten_and_sort() returns them (top_n each when set)."""
+        out: Dict[str, List[Dict[str, Any]]] = {}
+        for company, roles in self._details.items():
+            order = self._scores[company]
+            rows = [role_row(company, role, detail) for role, detail in roles.items()
+                    if self.min_score is None or order[role][0] >= self.min_score]
+            # Equal scores keep first-seen order
+            rows.sort(key=lambda r: (-r['score'] if self.descending else r['score'], order[r['role_name']][1]))
+            out[company] = rows[:self.top_n] if self.top_n else rows
+        return out
+
+    def write_reports(self, conflict_report_path: Optional[str]) -> None:
+        """Writes the conflict report (JSON) and, next to it, link_map.json with the canonical link-to-role mapping."""
+        if conflict_report_path and self.conflicts:
+            try:
+                with open(conflict_report_path, 'w', encoding='utf-8') as cf:
+                    json.dump({'conflicts': self.conflicts}, cf, indent=2, ensure_ascii=False)
+                print(f'Wrote conflict report to {conflict_report_path} ({len(self.conflicts)} conflicts)')
+            except Exception as e:
+                print(f'Warning: failed to write conflict report {conflict_report_path}: {e}')
+
+        if conflict_report_path and self.link_map:
+            try:
+                link_map_path = os.path.join(os.path.dirname(conflict_report_path), 'link_map.json')
+                with open(link_map_path, 'w', encoding='utf-8') as lf:
+                    json.dump({'link_map': self.link_map}, lf, indent=2, ensure_ascii=False)
+                print(f'Wrote link map to {link_map_path} ({len(self.link_map)} links)')
+            except Exception as e:
+                print(f'Warning: failed to write link map: {e}')
+
+
+def merge_folder(folder: str, pattern: str = BATCH_PATTERN, *, dedup_policy: str = 'higher_score', top_n: Optional[int] = None,
+                 descending: bool = True, conflict_report_path: Optional[str] = None) -> MasterMerger:
+    """Merges every batch file in `folder` matching `pattern` in one pass (see MasterMerger) and writes the reports."""
+    files = sorted(glob.glob(os.path.join(folder, pattern)))
+    if not files:
+        raise FileNotFoundError(f'No files found in {folder} matching {pattern}')
+    merger = MasterMerger(dedup_policy, top_n=top_n, descending=descending).add_files(files)
+    merger.write_reports(conflict_report_path)
+    return merger
+
+
+def load_master_from_folder(folder: str, pattern: str = BATCH_PATTERN, *, dedup_policy: str = 'higher_score', conflict_report_path: Optional[str] = None) -> Dict[str, Dict[str, Dict[str, Any]]]:
     """Load and merge multiple master JSON files from a folder matching pattern.
 
     Supports a deduplication policy when the same (company, role) key appears in multiple files.
@@ -61,186 +297,31 @@ def load_master_from_folder(folder: str, pattern: str = 'llm_data_ClearenceJobs_
     Optionally writes a conflict report (JSON) to `conflict_report_path` when duplicates/conflicts are observed,
     and writes a `link_map.json` file next to it containing the canonical link-to-role mapping.
     """
-    files = sorted(glob.glob(os.path.join(folder, pattern)))
-    if not files:
-        raise FileNotFoundError(f'No files found in {folder} matching {pattern}')
-    master: Dict[str, Dict[str, Dict[str, Any]]] = {}
-    conflicts: List[Dict[str, Any]] = []
-    link_map: Dict[str, Dict[str, Any]] = {}
+    return merge_folder(folder, pattern, dedup_policy=dedup_policy, conflict_report_path=conflict_report_path).master()
 
-    for fp in files:
-        try:
-            with open(fp, 'r', encoding='utf-8') as f:
-                m = json.load(f)
-        except Exception as e:
-            print(f'Warning: failed to load {fp}: {e}')
-            continue
-
-        file_mtime = os.path.getmtime(fp)
-        file_ts = datetime.fromtimestamp(file_mtime).isoformat()
-        for company, roles in m.items():
-            if company not in master:
-                master[company] = {}
-            for role, detail in roles.items():
-                existing = master[company].get(role)
-
-                occurrence = {
-                    'file': os.path.basename(fp),
-                    'timestamp': file_ts,
-                    'score': detail.get('score')
-                }
-
-                # Normalize link value for link_map tracking
-                link_val = detail.get('link')
-                link_key = None
-                if isinstance(link_val, str) and link_val.strip() != '':
-                    link_key = link_val.strip()
-
-                # Helper to record a link collision: mark incoming detail with conflict info and
-                # do not overwrite the canonical link_map mapping.
-                def _record_link_collision(new_detail, existing_assoc):
-                    new_detail['link_conflict'] = True
-                    new_detail['link_conflict_with'] = existing_assoc
-                    # remove link to avoid duplicate mapping
-                    if 'link' in new_detail:
-                        del new_detail['link']
-
-                if existing is None:
-                    new_detail = dict(detail)
-                    # new_detail.setdefault('provenance', [])
-                    # new_detail['provenance'].append(occurrence)
-                    new_detail['chosen_by'] = 'initial'
-
-                    # Link map bookkeeping
-                    if link_key:
-                        if link_key in link_map:
-                            # link already associated with a different role
-                            assoc = link_map[link_key]
-                            if assoc['company'] != company or assoc['role'] != role:
-                                _record_link_collision(new_detail, assoc)
-                                conflicts.append({
-                                    'type': 'link_collision',
-                                    'link': link_key,
-                                    'existing_company': assoc['company'],
-                                    'existing_role': assoc['role'],
-                                    'existing_file': assoc['file'],
-                                    'new_company': company,
-                                    'new_role': role,
-                                    'new_file': os.path.basename(fp),
-                                    'decision': 'keep_existing'
-                                })
-                        else:
-                            link_map[link_key] = {'company': company, 'role': role, 'file': os.path.basename(fp), 'timestamp': file_ts}
 
-                    master[company][role] = new_detail
-                else:
-                    existing_score = parse_score(existing.get('score'))
-                    new_score = parse_score(detail.get('score'))
-                    existing_score_val = existing_score if existing_score is not None else -1
-                    new_score_val = new_score if new_score is not None else -1
-
-                    decision = None
-                    replaced = False
-                    if dedup_policy == 'latest':
-                        ## overwrite and carry prior provenance
-                        new_detail = dict(detail)
-                        # prev_prov = existing.get('provenance', [])
-                        # new_detail.setdefault('provenance', [])
-                        # new_detail['provenance'] = prev_prov + [occurrence]
-                        new_detail['chosen_by'] = 'latest'
-                        replaced = True
-                        decision = 'replaced'
-                    elif dedup_policy == 'higher_score':
-                        # replace only if incoming score is higher
-                        if new_score_val > existing_score_val:
-                            new_detail = dict(detail)
-                            # prev_prov = existing.get('provenance', [])
-                            # new_detail.setdefault('provenance', [])
-                            # new_detail['provenance'] = prev_prov + [occurrence]
-                            new_detail['chosen_by'] = 'higher_score'
-                            replaced = True
-                            decision = 'replaced'
-                        else:
-                            ## keep existing; record provenance of duplicate occurrence
-                            # existing.setdefault('provenance', [])
-                            # existing['provenance'].append(occurrence)
-                            existing.setdefault('chosen_by', 'kept_by_higher_score')
-                            decision = 'kept'
-                    else:
-                        # fallback to latest semantics
-                        new_detail = dict(detail)
-                        # prev_prov = existing.get('provenance', [])
-                        # new_detail.setdefault('provenance', [])
-                        # new_detail['provenance'] = prev_prov + [occurrence]
-                        new_detail['chosen_by'] = 'latest'
-                        replaced = True
-                        decision = 'replaced'
-
-                    # If we are replacing, handle link map collisions for the incoming detail
-                    if replaced:
-                        if link_key:
-                            if link_key in link_map:
-                                assoc = link_map[link_key]
-                                if assoc['company'] != company or assoc['role'] != role:
-                                    # collision: keep the existing mapping and strip link from incoming
-                                    _record_link_collision(new_detail, assoc)
-                                    conflicts.append({
-                                        'type': 'link_collision',
-                                        'link': link_key,
-                                        'existing_company': assoc['company'],
-                                        'existing_role': assoc['role'],
-                                        'existing_file': assoc['file'],
-                                        'new_company': company,
-                                        'new_role': role,
-                                        'new_file': os.path.basename(fp),
-                                        'decision': 'keep_existing'
-                                    })
-                            else:
-                                # no collision: associate link to this (company,role)
-                                link_map[link_key] = {'company': company, 'role': role, 'file': os.path.basename(fp), 'timestamp': file_ts}
-
-                        master[company][role] = new_detail
-
-                    # record conflict info for diagnostics (score-based conflicts)
-                    if decision in ('replaced', 'kept'):
-                        conflicts.append({
-                            'type': 'score_conflict',
-                            'company': company,
-                            'role': role,
-                            'existing_score': existing_score_val,
-                            'new_score': new_score_val,
-                            # 'existing_file': existing.get('provenance', [{}])[0].get('file'),
-                            'new_file': os.path.basename(fp),
-                            'decision': decision,
-                            'chosen_by': 'higher_score' if dedup_policy == 'higher_score' else 'latest'
-                        })
-
-    # Write conflicts report if requested
-    if conflict_report_path and conflicts:
-        try:
-            with open(conflict_report_path, 'w', encoding='utf-8') as cf:
-                json.dump({'conflicts': conflicts}, cf, indent=2, ensure_ascii=False)
-            print(f'Wrote conflict report to {conflict_report_path} ({len(conflicts)} conflicts)')
-        except Exception as e:
-            print(f'Warning: failed to write conflict report {conflict_report_path}: {e}')
-
-    # Optionally write the canonical link map next to the conflict report
-    if conflict_report_path and link_map:
-        try:
-            link_map_path = os.path.join(os.path.dirname(conflict_report_path), 'link_map.json')
-            with open(link_map_path, 'w', encoding='utf-8') as lf:
-                json.dump({'link_map': link_map}, lf, indent=2, ensure_ascii=False)
-            print(f'Wrote link map to {link_map_path} ({len(link_map)} links)')
-        except Exception as e:
-            print(f'Warning: failed to write link map: {e}')
+def load_master_from_db(db: Optional[JobDB] = None, min_score: Optional[float] = None) -> Dict[str, Dict[str, Dict[str, Any]]]:
+    """Build the same {company: {role: detail}} master from the SQLite store.
 
+    Each job's latest analysis is used, so no de-duplication pass is needed.
+    Rows arrive highest score first, so the first analysis seen for a
+    (company, role) key is also the best one (the 'higher_score' policy).
+    """
+    db = db or JobDB()
+    master: Dict[str, Dict[str, Dict[str, Any]]] = {}
+    for job in db.iter_analyzed_jobs(min_score=min_score):
+        roles = master.setdefault(job.get('company', 'Unknown Company'), {})
+        role = job.get('role_name', 'Unknown Role')
+        if role in roles:
+            continue
+        roles[role] = {k: v for k, v in job.items() if k not in ('company', 'role_name')}
     return master
 
 
-def combine_llmout(folder: str = 'JobData\\ClearanceJobs\\llmIn\\', pattern: str = 'llm_data_ClearenceJobs_*.json', *, descending: bool = True, dedup_policy: str = 'higher_score', return_link_map: bool = False):
+def combine_llmout(folder: str = 'JobData\\ClearanceJobs\\llmIn\\', pattern: str = BATCH_PATTERN, *, descending: bool = True, dedup_policy: str = 'higher_score', return_link_map: bool = False):
     """Load and merge all matching JSON files in `folder` and return a flattened + sorted mapping.
 
-    This is a convenience wrapper around :func:`load_master_from_folder` + :func:`flatten_and_sort`.
+    This is a convenience wrapper around :func:`merge_folder` (one pass over the files).
 
     Args:
         folder: Directory containing batch JSON files (default: 'llmOut').
@@ -254,48 +335,40 @@ def combine_llmout(folder: str = 'JobData\\ClearanceJobs\\llmIn\\', pattern: str
         If return_link_map is True returns {'by_company': {...}, 'link_map': {...}}.
     """
     conflict_path = os.path.join(folder, 'merge_conflicts.json')
-    master = load_master_from_folder(folder, pattern=pattern, dedup_policy=dedup_policy, conflict_report_path=conflict_path)
-    sorted_by_company = flatten_and_sort(master, descending=descending)
+    merger = merge_folder(folder, pattern=pattern, dedup_policy=dedup_policy, descending=descending, conflict_report_path=conflict_path)
+    sorted_by_company = merger.by_company()
 
     if return_link_map:
-        link_map_path = os.path.join(os.path.dirname(conflict_path), 'link_map.json')
-        link_map = {}
-        if os.path.exists(link_map_path):
-            try:
-                with open(link_map_path, 'r', encoding='utf-8') as lf:
-                    lm = json.load(lf)
-                    link_map = lm.get('link_map', {})
-            except Exception:
-                link_map = {}
-        return {'by_company': sorted_by_company, 'link_map': link_map}
+        return {'by_company': sorted_by_company, 'link_map': merger.link_map}
 
     return sorted_by_company
 
 
+def role_row(company: str, role_name: str, detail: Dict[str, Any]) -> Dict[str, Any]:
+    """One output row: normalized score (-1 when missing) first, then the rest of the record."""
+    score = parse_score(detail.get('score'))
+    return {
+        'company': company,
+        'role_name': role_name,
+        'score': score if score is not None else -1,
+        # 'raw_score': detail.get('score'),
+        'fit_reason': detail.get('fit_reason'),
+        'missing_skills': detail.get('missing_skills'),
+        'matching_skills': detail.get('matching_skills'),
+        'link': detail.get('link'),
+        **{k: v for k, v in detail.items() if k not in ('score', 'fit_reason', 'missing_skills','matching_skills', 'link')}
+    }
+
+
 def flatten_and_sort(master: Dict[str, Dict[str, Dict[str, Any]]], *, descending: bool = True) -> Dict[str, List[Dict[str, Any]]]:
     """Return mapping company -> sorted list of role dicts with normalized score."""
     out: Dict[str, List[Dict[str, Any]]] = {}
     for company, roles in master.items():
-        role_list: List[Dict[str, Any]] = []
-        for role_name, detail in roles.items():
-            score = parse_score(detail.get('score'))
-            if score < minScore:
-                continue
-            row = {
-                'company': company,
-                'role_name': role_name,
-                'score': score if score is not None else -1,
-                # 'raw_score': detail.get('score'),
-                'fit_reason': detail.get('fit_reason'),
-                'missing_skills': detail.get('missing_skills'),
-                'matching_skills': detail.get('matching_skills'),
-                'link': detail.get('link'),
-                **{k: v for k, v in detail.items() if k not in ('score', 'fit_reason', 'missing_skills','matching_skills', 'link')}
-            }
-            role_list.append(row)
+        role_list = [role_row(company, role_name, detail) for role_name, detail in roles.items()]
+        role_list = [r for r in role_list if r['score'] >= minScore]
 
         # Sort: treat missing scores (score == -1) as lowest
-        role_list.sort(key=lambda r: (r['score'] if r['score'] is not None else -1), reverse=descending)
+        role_list.sort(key=lambda r: r['score'], reverse=descending)
         out[company] = role_list
     return out
 
@@ -392,18 +465,32 @@ def cli(argv=None):
     p.add_argument('--output-json', '-oj', default='sorted_by_company.json', help='Output JSON summary file')
     p.add_argument('--output-csv', '-oc', default=None, help='Optional output CSV file')
     p.add_argument('--top-n', type=int, default=5, help='Top N roles per company to show in console')
+    p.add_argument('--merge-top-n', type=int, default=None, help='Keep only the top N roles per company in the combined folder summary (default: all)')
     p.add_argument('--min-score', type=float, default=None, help='Filter out roles below this score when showing summary')
     p.add_argument('--desc', action='store_true', help='Sort descending (highest first). Default: True')
     p.add_argument('--no-pretty', action='store_true', help='Write compact JSON instead of pretty')
     p.add_argument('--input-folder', default='JobData/ClearanceJobs/llmIn', help='Directory containing batch JSONs to merge (default: llmOut)')
-    p.add_argument('--glob-pattern', default='llm_data_ClearenceJobs_*.json', help='Glob pattern to match files inside --input-folder')
+    p.add_argument('--glob-pattern', default=BATCH_PATTERN, help='Glob pattern to match files inside --input-folder')
     p.add_argument('--merge', action='store_true', help='Merge all matching files into a single combined summary (instead of per-file outputs)')
     p.add_argument('--dedup-policy', choices=['latest', 'higher_score'], default='higher_score', help='Deduplication policy when the same (company, role) appears in multiple files')
     p.add_argument('--to-pandas', action='store_true', help='Produce a Pandas DataFrame and print a readable summary')
     p.add_argument('--output-pandas-csv', default=None, help='Save the DataFrame to CSV')
     p.add_argument('--output-html', default=None, help='Save the DataFrame to HTML')
+    p.add_argument('--from-db', action='store_true', help='Read the latest analyses from the SQLite job store instead of batch JSON files')
     args = p.parse_args(argv)
 
+    # The SQLite store already keeps one latest analysis per job
+    if args.from_db:
+        master = load_master_from_db(min_score=minScore)
+        sorted_by_company = flatten_and_sort(master, descending=not args.desc)
+        write_json(args.output_json, sorted_by_company, pretty=not args.no_pretty)
+        print(f'Wrote JSON summary to {args.output_json}')
+        if args.output_csv:
+            write_csv(args.output_csv, sorted_by_company)
+            print(f'Wrote CSV summary to {args.output_csv}')
+        summarize(sorted_by_company, top_n=args.top_n, min_score=args.min_score)
+        return
+
     # Load master either from a single input file or by scanning a folder of batch outputs
     if args.input_folder:
         if not os.path.isdir(args.input_folder):
@@ -413,41 +500,25 @@ def cli(argv=None):
             raise SystemExit(f'No files found in {args.input_folder} matching {args.glob_pattern}')
         print(f'Found {len(files)} files in {args.input_folder} matching {args.glob_pattern}')
 
-        # Always build a combined single JSON summary for the folder (so the summary contains all entries)
+        # Always build a combined single JSON summary for the folder (so the summary contains all entries,
+        # unless --merge-top-n caps each company). One pass over the files: counts, de-duplication,
+        # conflicts and the link map all come from the merge.
         try:
-            # First scan files to compute counts and duplicate occurrences
-            total_role_instances = 0
-            role_occurrences = {}  # (company, role) -> count
-            file_errors = []
-            for fp in files:
-                try:
-                    with open(fp, 'r', encoding='utf-8') as f:
-                        m = json.load(f)
-                except Exception as e:
-                    file_errors.append((fp, str(e)))
-                    continue
-                for company, roles in m.items():
-                    for role in roles.keys():
-                        total_role_instances += 1
-                        key = (company.strip(), role.strip())
-                        role_occurrences[key] = role_occurrences.get(key, 0) + 1
-
-            unique_roles = len(role_occurrences)
-            duplicate_keys = {k: v for k, v in role_occurrences.items() if v > 1}
-
-            print(f'Files scanned: {len(files)} (errors: {len(file_errors)})')
-            print(f'Total role entries found across files: {total_role_instances}')
-            print(f'Unique role keys (company+role): {unique_roles}; duplicates: {len(duplicate_keys)}')
+            conflict_path = os.path.join(args.input_folder, 'merge_conflicts.json')
+            merger = MasterMerger(args.dedup_policy, top_n=args.merge_top_n or None, descending=not args.desc).add_files(files)
+            merger.write_reports(conflict_path)
+
+            duplicate_keys = {k: v for k, v in merger.occurrences.items() if v > 1}
+            print(f'Files scanned: {merger.files} (errors: {len(merger.errors)})')
+            print(f'Total role entries found across files: {merger.entries}')
+            print(f'Unique role keys (company+role): {len(merger.occurrences)}; duplicates: {len(duplicate_keys)}')
             if duplicate_keys:
                 print('Top duplicate role keys (count >1):')
                 # show up to 10 duplicates sorted by frequency desc
-                for (company, role), cnt in sorted(duplicate_keys.items(), key=lambda x: x[1], reverse=True)[:10]:
+                for (company, role), cnt in heapq.nlargest(10, duplicate_keys.items(), key=lambda x: x[1]):
                     print(f'  - ({cnt}x) {company} | {role}')
 
-            # Now load and merge files according to dedup policy
-            conflict_path = os.path.join(args.input_folder, 'merge_conflicts.json')
-            combined_master = load_master_from_folder(args.input_folder, pattern=args.glob_pattern, dedup_policy=args.dedup_policy, conflict_report_path=conflict_path)
-            combined_sorted = flatten_and_sort(combined_master, descending=not args.desc)
+            combined_sorted = merger.by_company()
 
             # Determine combined output path for JSON
             if args.output_json:
@@ -457,17 +528,8 @@ def cli(argv=None):
             else:
                 combined_out_json = os.path.join(args.input_folder, 'sorted_by_company.json')
 
-            # If the link_map was created by the loader, include it alongside the combined results
-            link_map_path = os.path.join(args.input_folder, 'link_map.json')
-            link_map = None
-            if os.path.exists(link_map_path):
-                try:
-                    with open(link_map_path, 'r', encoding='utf-8') as lf:
-                        lm = json.load(lf)
-                        link_map = lm.get('link_map')
-                except Exception:
-                    link_map = None
-
+            # Include the canonical link map alongside the combined results
+            link_map = merger.link_map or None
             if link_map is not None:
                 combined_package = {'by_company': combined_sorted, 'link_map': link_map}
                 write_json(combined_out_json, combined_package, pretty=not args.no_pretty)
@@ -480,18 +542,7 @@ def cli(argv=None):
             # Print combined summary to console
             summarize(combined_sorted, top_n=args.top_n, min_score=args.min_score)
             if link_map is not None:
-                # Count collisions from conflict file if present for reporting
-                conflicts = []
-                conflict_path = os.path.join(args.input_folder, 'merge_conflicts.json')
-                if os.path.exists(conflict_path):
-                    try:
-                        with open(conflict_path, 'r', encoding='utf-8') as cf:
-                            cr = json.load(cf)
-                            conflicts = cr.get('conflicts', [])
-                    except Exception:
-                        conflicts = []
-                link_collisions = sum(1 for c in conflicts if c.get('type') == 'link_collision')
-                print(f'Link collisions detected: {link_collisions}')
+                print(f'Link collisions detected: {merger.link_collisions}')
 
         except Exception as e:
             print(f'Warning: failed to build combined summary: {e}')
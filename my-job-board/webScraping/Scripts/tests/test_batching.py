@@ -0,0 +1,71 @@
+"""
+common.batching: packing jobs into token-budgeted batches, trimming
+boilerplate from descriptions and matching LLM results back to a batch.
+
+Run from Scripts/: python -m pytest tests
+"""
+import os
+import sys
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if SCRIPTS_DIR not in sys.path:
+    sys.path.insert(0, SCRIPTS_DIR)
+from common.batching import ResultMatcher, index_batch, pack_batches, reconcile_results, trim_boilerplate
+
+
+def test_results_are_matched_by_echoed_id():
+    index = index_batch(['job a', 'job b', 'job c', 'job d'])
+    assert index == {0: 'job a', 1: 'job b', 2: 'job c', 3: 'job d'}
+    results = [{'id': 2, 'score': 10}, {'id': '0', 'score': 20}, {'id': ' 3 ', 'score': 30},
+               {'id': 2, 'score': 99}, {'id': 7}, {'id': 'job b'}, {'id': True}, 'not an object']
+    matched, missing, duplicates, unknown = reconcile_results(results, index)
+    assert matched == {2: {'id': 2, 'score': 10}, 0: {'id': '0', 'score': 20}, 3: {'id': ' 3 ', 'score': 30}}
+    assert missing == [1]
+    assert duplicates == [2]
+    assert unknown == [7, 'job b', True, 'not an object']
+
+
+def test_matcher_works_one_item_at_a_time():
+    matcher = ResultMatcher(index_batch(['a', 'b']))
+    assert matcher.missing == [0, 1]
+    assert matcher.add({'id': 1}) == 1
+    assert matcher.add({'id': 1}) is None
+    assert matcher.missing == [0]
+
+
+def test_batches_are_filled_up_to_the_budget():
+    sizes = [40, 30, 30, 50, 10, 200, 5]
+    batches = list(pack_batches(sizes, token_budget=100, token_fn=lambda size: size))
+    # A job larger than the budget goes out alone
+    assert batches == [[40, 30, 30], [50, 10], [200], [5]]
+    assert list(pack_batches(sizes, token_budget=100, token_fn=lambda size: size, max_jobs=2)) == \
+        [[40, 30], [30, 50], [10], [200], [5]]
+    assert list(pack_batches([], token_budget=100)) == []
+
+
+def test_batches_are_packed_lazily():
+    def jobs():
+        yield 60
+        yield 60
+        raise AssertionError('read past the first full batch')
+    assert next(pack_batches(jobs(), token_budget=100, token_fn=lambda size: size)) == [60]
+
+
+def test_boilerplate_sections_and_lines_are_trimmed():
+    text = """Systems Engineer
+Requirements:
+- 5+ years of Python
+Benefits:
+- 401k match
+- Free snacks
+What you will do:
+- Build pipelines
+We are an Equal Opportunity Employer.
+ABOUT US
+We have been around since 1950."""
+    assert trim_boilerplate(text) == """Systems Engineer
+Requirements:
+- 5+ years of Python
+What you will do:
+- Build pipelines"""
+    assert trim_boilerplate(None) == ''
@@ -0,0 +1,118 @@
+"""
+Randomized parity check: common.features must give, for a whole corpus, the
+same values as the per-job parsers it replaces (the scrapers' extract_salary
+and friends, atsClearenceJobs.parse_salary, common.rules.job_requirements),
+with pyarrow's RE2 path and with plain pandas strings.
+
+Run from Scripts/: python -m pytest tests
+"""
+import ast
+import os
+import random
+import re
+import sys
+
+import pandas as pd
+import pytest
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if SCRIPTS_DIR not in sys.path:
+    sys.path.insert(0, SCRIPTS_DIR)
+from common import features
+from common.rules import job_requirements
+
+
+def script_function(script: str, name: str):
+    """A top-level function of one of the scripts, without importing it (that would start a scrape)."""
+    with open(os.path.join(SCRIPTS_DIR, script), encoding='utf-8') as f:
+        tree = ast.parse(f.read())
+    node = next(n for n in tree.body if isinstance(n, ast.FunctionDef) and n.name == name)
+    namespace = {'re': re}
+    exec(compile(ast.Module([node], []), script, 'exec'), namespace)
+    return namespace[name]
+
+
+cj_extract_salary = script_function('wsClearenceJobs.py', 'extract_salary')
+dice_extract_salary = script_function('wsDice.py', 'extract_salary')
+dice_extract_field = script_function('wsDice.py', 'extract_field')
+parse_salary = script_function('atsClearenceJobs.py', 'parse_salary')
+
+SNIPPETS = ['$118,600.00 - $178,000.00', '$95,000', '$120,000 – $150,000', '$1,000.5-$2', '- $5', '$',
+            'Requires 8+ years of experience', '5 or more YEARS', '12 years', '3 years experience with python',
+            'TS/SCI', 'Top Secret', 'top secret', 'TS', 'Secret', 'Public Trust', 'Polygraph', 'CI Poly',
+            'Full Scope Polygraph', 'no polygraph', '(On-Site', 'on-site', 'Potential for Remote Work: No',
+            'Hybrid', 'remote', '10% of the Time', 'Travel: 25% Schedule: Full', 'travel: none', '\n', 'lorem ipsum',
+            'preferred', 'Desired:', 'is a plus', 'Ability to obtain', 'nice to have', '.', ';']
+
+
+def random_jobs(n: int, seed: int = 3) -> list:
+    rng = random.Random(seed)
+
+    def description():
+        return ' '.join(rng.choices(SNIPPETS, k=rng.randint(0, 12)) + ['word'] * rng.randint(0, 300))
+
+    jobs = [{'full_description': description(),
+             'clearance': rng.choice(['', 'Secret', 'Top Secret', 'Not Specified', None]),
+             'clearance_required': rng.choice(['', 'TS/SCI', 'None', 'Not Specified', None]),
+             'polygraph': rng.choice(['', 'CI Polygraph', 'No', 'None', 'Not Specified', None]),
+             'years_exp_required': rng.choice(['8+', '3 years', 'Not specified', None]),
+             'remote_eligible': rng.choice(['On-Site', 'Remote/Hybrid Search Needed'])} for _ in range(n)]
+    return jobs + [{'full_description': ''}, {'full_description': None}]
+
+
+@pytest.fixture(params=['arrow', 'python'])
+def engine(request, monkeypatch):
+    """Runs a test on pyarrow's RE2 path and again on pandas' Python-re path."""
+    if request.param == 'arrow':
+        pytest.importorskip('pyarrow')
+    else:
+        monkeypatch.setattr(features, 'pc', None)
+        monkeypatch.setattr(features, 'STRING_DTYPE', pd.StringDtype('python'))
+    return request.param
+
+
+def expected_features(text: str, source: str) -> list:
+    salary = (dice_extract_salary if source == 'dice' else cj_extract_salary)(text)
+    years = re.search(r"(\d+)\s*(?:\+|or more)?\s*years", text, re.IGNORECASE)
+    row = [salary['min'], salary['max'], int(years.group(1)) if years else 0,
+           'TS/SCI' if 'TS/SCI' in text else 'Top Secret' if 'Top Secret' in text else 'Not Specified',
+           'Yes' if 'Polygraph' in text else 'No']
+    if source == 'dice':
+        return row + ['No' if 'Potential for Remote Work: No' in text else 'Yes/Hybrid', dice_extract_field(text, 'Travel')]
+    return row + ['On-Site' if '(On-Site' in text else 'Remote/Hybrid Search Needed',
+                  '10%' if '10% of the Time' in text else 'Check Description']
+
+
+@pytest.mark.parametrize('source', ['clearancejobs', 'dice'])
+def test_featurize_matches_per_job_parsers(engine, source):
+    jobs = random_jobs(2000)
+    frame = features.featurize(jobs, source=source)
+    columns = ['salary_min', 'salary_max', 'years_exp', 'clearance', 'polygraph', 'remote', 'travel']
+    for job, got in zip(jobs, frame[columns].itertuples(index=False)):
+        assert list(got) == expected_features(job['full_description'] or '', source), job['full_description']
+
+
+def test_parse_salary_column_matches_parse_salary(engine):
+    values = [118600, 1.9e5, '118,600.00', '$118,600/yr', '(120,000)', 'n/a', None, float('nan'), True, '-5', '', [1]]
+    assert features.parse_salary_column(values).tolist() == [parse_salary(v) for v in values]
+
+
+def test_requirements_frame_matches_job_requirements(engine):
+    jobs = random_jobs(2000, seed=7)
+    got = features.requirements_frame(jobs).to_dict('records')
+    for job, row in zip(jobs, got):
+        assert row == job_requirements(job), job
+
+
+@pytest.mark.parametrize('job, expected', [
+    ({'full_description': 'Active Secret clearance required; TS/SCI preferred.'}, ('Secret', 'None')),
+    ({'full_description': 'US citizen with the ability to obtain a Secret clearance.'}, ('None', 'None')),
+    ({'full_description': 'CI polygraph is a plus. Top Secret required.'}, ('Top Secret', 'None')),
+    ({'clearance_required': 'None', 'polygraph': 'None', 'full_description': 'TS/SCI with Full Scope Polygraph'},
+     ('None', 'None')),
+    ({'clearance_required': 'Not Specified', 'full_description': 'TS/SCI with Full Scope Polygraph'},
+     ('TS/SCI', 'Full Scope')),
+])
+def test_job_requirements_reads_only_required_mentions(job, expected):
+    requirements = job_requirements(job)
+    assert (requirements['clearance'], requirements['polygraph']) == expected
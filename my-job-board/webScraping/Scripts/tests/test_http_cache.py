@@ -0,0 +1,115 @@
+"""
+common.http_cache: fresh hits, conditional revalidation (304) and eviction,
+with stand-in response objects instead of a network.
+
+Run from Scripts/: python -m pytest tests
+"""
+import os
+import sys
+
+import pytest
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if SCRIPTS_DIR not in sys.path:
+    sys.path.insert(0, SCRIPTS_DIR)
+from common import http_cache
+from common.http_cache import HttpCache
+
+URL = 'https://jobs.example.test/job/1'
+
+
+class FakeResponse:
+    def __init__(self, status_code, text='', headers=None):
+        self.status_code = status_code
+        self.text = text
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(f'HTTP {self.status_code}')
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(http_cache.time, 'time', clock)
+    return clock
+
+
+def test_miss_then_fresh_hit(tmp_path, clock):
+    cache = HttpCache(str(tmp_path), fresh_for=60)
+    body, headers = cache.prepare(URL, {'User-Agent': 'test'})
+    assert body is None and headers == {'User-Agent': 'test'}
+    assert cache.complete(URL, FakeResponse(200, '<html>1</html>', {'ETag': '"v1"'})) == '<html>1</html>'
+
+    clock.now += 30
+    assert cache.prepare(URL) == ('<html>1</html>', None)
+    assert cache.stats()['hits'] == 1 and cache.stats()['misses'] == 1
+
+
+def test_stale_entry_revalidates_with_304(tmp_path, clock):
+    cache = HttpCache(str(tmp_path), fresh_for=60)
+    cache.complete(URL, FakeResponse(200, 'body', {'ETag': '"v1"', 'Last-Modified': 'Mon, 12 Oct 2026 10:00:00 GMT'}))
+
+    clock.now += 120
+    body, headers = cache.prepare(URL)
+    assert body is None
+    assert headers == {'If-None-Match': '"v1"', 'If-Modified-Since': 'Mon, 12 Oct 2026 10:00:00 GMT'}
+    assert cache.complete(URL, FakeResponse(304)) == 'body'
+    assert cache.revalidated == 1
+    # Revalidation restarts the freshness window
+    assert cache.prepare(URL) == ('body', None)
+
+
+def test_304_with_missing_body_asks_for_a_refetch(tmp_path, clock):
+    cache = HttpCache(str(tmp_path), fresh_for=60)
+    cache.complete(URL, FakeResponse(200, 'body', {'ETag': '"v1"'}))
+    os.remove(cache._paths(cache._key(URL))[0])
+
+    clock.now += 120
+    assert cache.complete(URL, FakeResponse(304)) is None
+    assert cache.lookup(URL) is None
+    assert cache.prepare(URL, {'A': 'b'}) == (None, {'A': 'b'})
+
+
+def test_http_errors_are_raised_and_not_stored(tmp_path, clock):
+    cache = HttpCache(str(tmp_path))
+    with pytest.raises(RuntimeError):
+        cache.complete(URL, FakeResponse(500, 'oops'))
+    assert cache.lookup(URL) is None
+
+
+def test_index_survives_a_restart_and_drops_expired_entries(tmp_path, clock):
+    cache = HttpCache(str(tmp_path), ttl=100)
+    cache.complete(URL, FakeResponse(200, 'old'))
+    clock.now += 90
+    cache.complete(URL + '?new', FakeResponse(200, 'new'))
+
+    clock.now += 20
+    reopened = HttpCache(str(tmp_path), ttl=100)
+    assert reopened.lookup(URL) is None
+    assert reopened.read(URL + '?new') == 'new'
+    assert reopened.stats()['entries'] == 1
+
+
+def test_least_recently_used_is_evicted_over_max_bytes(tmp_path, clock):
+    cache = HttpCache(str(tmp_path), max_bytes=10)
+    cache.complete(URL + '/a', FakeResponse(200, 'aaaa'))
+    clock.now += 1
+    cache.complete(URL + '/b', FakeResponse(200, 'bbbb'))
+    clock.now += 1
+    cache.read(URL + '/a')  # /a is now more recent than /b
+    clock.now += 1
+    cache.complete(URL + '/c', FakeResponse(200, 'cccc'))
+
+    assert cache.lookup(URL + '/b') is None
+    assert cache.read(URL + '/a') == 'aaaa' and cache.read(URL + '/c') == 'cccc'
+    assert cache.stats()['bytes'] == 8
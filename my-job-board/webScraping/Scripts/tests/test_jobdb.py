@@ -0,0 +1,51 @@
+"""
+common.jobdb.JobDB job storage: chunked upserts and the sync of a compacted
+JobStore (prune=True) that the scraper runs at the end of a scrape.
+
+Run from Scripts/: python -m pytest tests
+"""
+import os
+import sys
+import time
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if SCRIPTS_DIR not in sys.path:
+    sys.path.insert(0, SCRIPTS_DIR)
+from common import jobdb
+from common.jobdb import JobDB
+
+
+def job(n: int, salary=150000) -> dict:
+    return {'link': f'https://example.com/jobs/{n}', 'job_id': f'j{n}', 'role_name': f'Role {n}',
+            'company': 'Acme', 'salary': {'min_val': salary, 'max_val': None}}
+
+
+def links(db: JobDB) -> list:
+    return sorted(record['link'] for record in db.iter_jobs())
+
+
+def test_upsert_streams_in_chunks(tmp_path, monkeypatch):
+    monkeypatch.setattr(jobdb, 'UPSERT_CHUNK', 3)
+    db = JobDB(str(tmp_path / 'jobs.db'))
+    assert db.upsert_jobs(job(n) for n in range(10)) == 10
+    assert db.upsert_jobs([job(3, salary='$90,000')]) == 1
+    assert db.count_jobs() == 10
+    assert db.count_jobs(min_salary=100000) == 9
+
+
+def test_prune_keeps_only_the_synced_jobs(tmp_path, monkeypatch):
+    monkeypatch.setattr(jobdb, 'UPSERT_CHUNK', 2)
+    db = JobDB(str(tmp_path / 'jobs.db'))
+    db.upsert_jobs(job(n) for n in range(5))
+    db.upsert_jobs((job(n) for n in (3, 4, 5)), prune=True)
+    assert links(db) == [job(n)['link'] for n in (3, 4, 5)]
+    # Without prune nothing is deleted
+    db.upsert_jobs([job(6)])
+    assert db.count_jobs() == 4
+
+
+def test_jobs_updated_at(tmp_path):
+    db = JobDB(str(tmp_path / 'jobs.db'))
+    assert db.jobs_updated_at() is None
+    db.upsert_jobs([job(1)])
+    assert abs(db.jobs_updated_at() - time.time()) < 2
@@ -0,0 +1,52 @@
+"""
+common.jobstore: the append-only JSON-lines job store.
+
+Run from Scripts/: python -m pytest tests
+"""
+import json
+import os
+import sys
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if SCRIPTS_DIR not in sys.path:
+    sys.path.insert(0, SCRIPTS_DIR)
+from common.jobstore import JobStore, count_jobs, iter_jobs
+
+
+def test_append_extend_and_iterate(tmp_path):
+    store = JobStore(str(tmp_path / 'data' / 'jobs.jsonl'))
+    store.append({'link': 'a', 'title': 'Engineer – TS/SCI'})
+    store.extend([{'link': 'b'}, {'link': 'c'}])
+    assert [job['link'] for job in store] == ['a', 'b', 'c']
+    assert list(store)[0]['title'] == 'Engineer – TS/SCI'
+    assert count_jobs(store.path) == 3
+
+    store.reset()
+    assert list(store) == [] and count_jobs(store.path) == 0
+
+
+def test_compact_keeps_the_last_record_per_link(tmp_path):
+    store = JobStore(str(tmp_path / 'jobs.jsonl'))
+    store.extend([{'link': 'a', 'v': 1}, {'link': 'b', 'v': 1}, {'link': 'a', 'v': 2}, {'title': 'no link'}])
+    assert store.compact() == 3
+    assert list(store) == [{'link': 'b', 'v': 1}, {'link': 'a', 'v': 2}, {'title': 'no link'}]
+    assert not os.path.exists(store.path + '.tmp')
+
+
+def test_compact_of_a_missing_file(tmp_path):
+    assert JobStore(str(tmp_path / 'jobs.jsonl')).compact() == 0
+
+
+def test_half_written_and_malformed_lines_are_skipped(tmp_path, capsys):
+    path = tmp_path / 'jobs.jsonl'
+    path.write_text('{"link": "a"}\nnot json\n\n{"link": "b"}\n{"link": "c", "ti', encoding='utf-8')
+    assert [job['link'] for job in iter_jobs(str(path))] == ['a', 'b']
+    assert 'malformed line 2' in capsys.readouterr().out
+    assert count_jobs(str(path)) == 3  # counts lines without parsing them
+
+
+def test_reads_older_json_array_files(tmp_path):
+    path = tmp_path / 'jobs_data.json'
+    path.write_text(json.dumps([{'link': 'a'}, {'link': 'b'}]), encoding='utf-8')
+    assert [job['link'] for job in iter_jobs(str(path))] == ['a', 'b']
+    assert count_jobs(str(path)) == 2
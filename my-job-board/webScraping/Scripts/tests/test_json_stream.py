@@ -0,0 +1,86 @@
+"""
+common.json_stream.JSONArrayStream on streamed LLM answers: any chunking,
+truncation, code fences and malformed items.
+
+Run from Scripts/: python -m pytest tests
+"""
+import json
+import os
+import random
+import sys
+
+import pytest
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if SCRIPTS_DIR not in sys.path:
+    sys.path.insert(0, SCRIPTS_DIR)
+from common.json_stream import JSONArrayStream, iter_json_array, salvage_json_array
+
+ITEMS = [
+    {'id': 0, 'score': 91, 'fit_reason': 'Strong "DevOps" match: [AWS], {Terraform}', 'missing_skills': [], 'matching_skills': ['aws']},
+    {'id': 1, 'score': 40, 'fit_reason': 'Back\\slash and unicode – dash', 'missing_skills': ['java', 'c++'], 'matching_skills': []},
+    {'id': 2, 'score': 77, 'fit_reason': 'Nested', 'extra': {'a': [1, {'b': ']'}]}, 'missing_skills': [], 'matching_skills': []},
+]
+ANSWER = '```json\n' + json.dumps(ITEMS, indent=2) + '\n```\nLet me know if you need more.'
+
+
+def chunks(text: str, size: int) -> list:
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+@pytest.mark.parametrize('size', [1, 2, 3, 7, 64, len(ANSWER)])
+def test_any_chunking_gives_every_item(size):
+    stream = JSONArrayStream()
+    found = [item for chunk in chunks(ANSWER, size) for item in stream.feed(chunk)]
+    assert found == ITEMS
+    assert stream.complete and not stream.pending and stream.errors == 0 and stream.items == 3
+
+
+def test_random_chunk_boundaries():
+    rng = random.Random(5)
+    for _ in range(200):
+        cuts = sorted(rng.sample(range(1, len(ANSWER)), rng.randint(1, 30)))
+        pieces = [ANSWER[a:b] for a, b in zip([0] + cuts, cuts + [len(ANSWER)])]
+        assert list(iter_json_array(pieces)) == ITEMS
+
+
+def test_items_arrive_as_soon_as_they_are_complete():
+    stream = JSONArrayStream()
+    text = json.dumps(ITEMS)
+    first_end = text.index('}, {') + 1
+    assert stream.feed(text[:first_end - 1]) == []
+    assert stream.feed(text[first_end - 1:first_end + 2]) == [ITEMS[0]]
+
+
+@pytest.mark.parametrize('cut', [0.2, 0.5, 0.9])
+def test_truncated_answer_keeps_the_completed_items(cut):
+    text = json.dumps(ITEMS)
+    truncated = text[:int(len(text) * cut)]
+    stream = JSONArrayStream()
+    found = [item for chunk in chunks(truncated, 5) for item in stream.feed(chunk)]
+    assert found == [item for item in ITEMS if json.dumps(item) in truncated]
+    assert not stream.complete
+
+
+def test_pending_tells_whether_the_cut_lost_an_item():
+    text = json.dumps(ITEMS)
+    between_items = text.index('}, {') + 3
+    stream = JSONArrayStream()
+    stream.feed(text[:between_items])
+    assert not stream.pending
+    stream.feed(text[between_items:between_items + 10])
+    assert stream.pending
+
+
+def test_malformed_item_is_skipped_and_counted():
+    stream = JSONArrayStream()
+    found = stream.feed('[{"id": 0, "score": 5}, {"id": 1, "score": NaN-ish}, {"id": 2, "score": 7}]')
+    assert found == [{'id': 0, 'score': 5}, {'id': 2, 'score': 7}]
+    assert stream.errors == 1 and stream.complete
+
+
+def test_bare_object_and_text_after_the_array():
+    assert salvage_json_array('Here you go: {"id": 4, "score": 80}') == [{'id': 4, 'score': 80}]
+    stream = JSONArrayStream()
+    assert stream.feed('[{"id": 1}] and [{"id": 2}]') == [{'id': 1}]
+    assert stream.feed('{"id": 3}') == []
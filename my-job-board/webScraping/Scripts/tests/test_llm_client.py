@@ -0,0 +1,89 @@
+"""
+Quota and usage accounting of common.llm_client.LLMClient: the requests/day
+counter, its persistence in the shared usage file and the QuotaExhausted
+guard. No requests are sent; the fake backend only gives the client a model.
+
+Run from Scripts/: python -m pytest tests
+"""
+import json
+import os
+import sys
+
+import pytest
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if SCRIPTS_DIR not in sys.path:
+    sys.path.insert(0, SCRIPTS_DIR)
+from common import llm_client
+from common.llm_backends import FakeBackend
+from common.llm_client import LLMClient, QuotaExhausted
+
+
+def make_client(model_name: str, usage_path: str, rpd: int = 1000) -> LLMClient:
+    return LLMClient(model_name, quota={'rpd': rpd}, backend=FakeBackend(), usage_path=usage_path)
+
+
+def count(client: LLMClient, requests: int):
+    for _ in range(requests):
+        client._count_request()
+
+
+def read_usage(path) -> dict:
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)[llm_client.quota_day()]
+
+
+def test_clients_sharing_a_usage_file_keep_each_others_counts(tmp_path):
+    path = str(tmp_path / 'llm_usage.json')
+    tier1, tier2 = make_client('gemini-2.5-flash', path), make_client('gemini-2.5-pro', path)
+    count(tier1, 5)
+    tier1.flush_usage()
+    count(tier2, 3)
+    tier2.flush_usage()
+    assert read_usage(path) == {'gemini-2.5-flash': 5, 'gemini-2.5-pro': 3}
+
+
+def test_clients_of_the_same_model_add_up(tmp_path):
+    # e.g. the ATS stage and resumeWriter running at the same time
+    path = str(tmp_path / 'llm_usage.json')
+    first, second = make_client('gemini-2.5-flash', path), make_client('gemini-2.5-flash', path)
+    count(first, 4)
+    count(second, 2)
+    first.flush_usage()
+    second.flush_usage()
+    count(first, 1)
+    first.flush_usage()
+    assert read_usage(path) == {'gemini-2.5-flash': 7}
+    # The merged count is the client's own from then on
+    assert second._day_calls == 6 and first._day_calls == 7
+
+
+def test_daily_count_survives_a_restart_and_is_enforced(tmp_path):
+    path = str(tmp_path / 'llm_usage.json')
+    client = make_client('gemini-2.5-flash', path, rpd=5)
+    count(client, 3)
+    client.close()
+    restarted = make_client('gemini-2.5-flash', path, rpd=5)
+    count(restarted, 2)
+    with pytest.raises(QuotaExhausted):
+        restarted._count_request()
+
+
+def test_counts_are_flushed_periodically(tmp_path, monkeypatch):
+    path = str(tmp_path / 'llm_usage.json')
+    client = make_client('gemini-2.5-flash', path)
+    count(client, 2)
+    assert not os.path.exists(path)
+    monkeypatch.setattr(llm_client, 'USAGE_FLUSH_SECONDS', 0)
+    count(client, 1)
+    assert read_usage(path) == {'gemini-2.5-flash': 3}
+
+
+def test_older_days_are_dropped(tmp_path):
+    path = tmp_path / 'llm_usage.json'
+    path.write_text(json.dumps({'2000-01-01': {'gemini-2.5-flash': 99}}), encoding='utf-8')
+    client = make_client('gemini-2.5-flash', str(path))
+    assert client._day_calls == 0
+    count(client, 1)
+    client.flush_usage()
+    assert json.loads(path.read_text(encoding='utf-8')) == {llm_client.quota_day(): {'gemini-2.5-flash': 1}}
@@ -0,0 +1,84 @@
+"""
+common.llm_schema: validating each scored job and repairing the usual
+near-misses of an LLM answer (check_match_result).
+
+Run from Scripts/: python -m pytest tests
+"""
+import os
+import sys
+
+import pytest
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if SCRIPTS_DIR not in sys.path:
+    sys.path.insert(0, SCRIPTS_DIR)
+from common.llm_schema import MATCH_RESULT_SCHEMA, check_match_result, compile_validator, response_schema
+
+VALID = {'id': 3, 'score': 85, 'fit_reason': 'Good match', 'missing_skills': ['java'], 'matching_skills': ['aws', 'python']}
+
+
+def result(**changes) -> dict:
+    item = dict(VALID)
+    item.update(changes)
+    return {key: value for key, value in item.items() if value is not ...}
+
+
+def test_valid_result_passes_unchanged():
+    item = result()
+    assert check_match_result(item) == (item, 'valid')
+
+
+@pytest.mark.parametrize('changes, repaired', [
+    ({'id': '3'}, {'id': 3}),
+    ({'score': '85'}, {'score': 85}),
+    ({'score': '85%'}, {'score': 85}),
+    ({'score': '85/100'}, {'score': 85}),
+    ({'score': 85.4}, {'score': 85}),
+    ({'score': 140}, {'score': 100}),
+    ({'score': -5}, {'score': 0}),
+    # A 0-1 fraction is a percentage, not a score of 0 or 1
+    ({'score': 0.9}, {'score': 90}),
+    ({'score': '0.85'}, {'score': 85}),
+    ({'score': 1.0}, {'score': 100}),
+    ({'missing_skills': 'java; c++, go'}, {'missing_skills': ['java', 'c++', 'go']}),
+    ({'matching_skills': None}, {'matching_skills': []}),
+    ({'matching_skills': ...}, {'matching_skills': []}),
+    ({'fit_reason': ...}, {'fit_reason': ''}),
+    ({'fit_reason': 42}, {'fit_reason': '42'}),
+])
+def test_near_misses_are_repaired(changes, repaired):
+    fixed, status = check_match_result(result(**changes))
+    assert status == 'repaired'
+    assert fixed == {**VALID, **repaired}
+
+
+def test_whole_number_one_stays_one():
+    assert check_match_result(result(score=1)) == (result(score=1), 'valid')
+
+
+@pytest.mark.parametrize('item', [
+    result(score='n/a'),
+    result(score=True),
+    result(score=...),
+    result(id='job three'),
+    result(id=...),
+    ['not', 'an', 'object'],
+    None,
+])
+def test_unrepairable_results_are_invalid(item):
+    assert check_match_result(item) == (None, 'invalid')
+
+
+def test_validator_reports_paths():
+    errors = compile_validator(MATCH_RESULT_SCHEMA)({'id': 'x', 'score': 101, 'missing_skills': [1]})
+    assert '$.id: expected integer' in errors
+    assert '$.score: above 100' in errors
+    assert '$.missing_skills[0]: expected string' in errors
+    assert '$.fit_reason: missing' in errors
+
+
+def test_response_schema_keeps_only_gemini_keys():
+    schema = response_schema(MATCH_RESULT_SCHEMA)
+    assert schema['type'] == 'OBJECT'
+    assert schema['properties']['score'] == {'type': 'INTEGER'}
+    assert schema['properties']['missing_skills'] == {'type': 'ARRAY', 'items': {'type': 'STRING'}}
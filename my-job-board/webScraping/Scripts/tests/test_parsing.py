@@ -0,0 +1,82 @@
+"""
+The ClearanceJobs card and description extraction must give the same output
+under every parser backend in common.parsing, with single- and multi-class
+markup alike.
+
+Run from Scripts/: python -m pytest tests
+"""
+import os
+import sys
+
+import pytest
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if SCRIPTS_DIR not in sys.path:
+    sys.path.insert(0, SCRIPTS_DIR)
+from common import parsing
+
+CARD = '''
+<div class="{card_class}">
+  <a class="job-search-list-item-desktop__job-name" href="/jobs/{n}/systems-engineer">Systems Engineer {n}</a>
+  <div class="job-search-list-item-desktop__company-name"><a href="/c">Acme &amp; Sons</a></div>
+  <span class="cj-multiple-locations__location-name">San Diego, CA (On-Site)</span>
+  <div class="job-search-list-item-desktop__group"><i class="cjicon-locker"></i>TS/SCI</div>
+  <div class="job-search-list-item-desktop__group"><i class="cjicon-polygraph"></i>CI Polygraph</div>
+  <div class="job-search-list-item-desktop__group">Posted today</div>
+  <div class="job-search-list-item-desktop__description">Build <b>things</b> for the mission.</div>
+</div>'''
+LIST_PAGE = '<html><body><main>{}</main></body></html>'.format(''.join(
+    CARD.format(n=n, card_class=card_class) for n, card_class in enumerate(
+        ['job-search-list-item-desktop', 'job-search-list-item-desktop featured', 'promoted job-search-list-item-desktop'])))
+DETAIL_PAGE = '''
+<html><head><title>Job</title></head><body>
+  <div class="sidebar">Similar jobs: Secret, $99,000</div>
+  <div class="{desc_class}">
+    <h2>About the role</h2><p>Requires 5+ years of experience.</p>
+    <ul><li>Salary $118,600.00 - $178,000.00</li><li>Active TS/SCI</li></ul>
+  </div>
+  <div class="job-description-text-footer">Not part of the description</div>
+</body></html>'''
+DESCRIPTION = 'About the role\nRequires 5+ years of experience.\nSalary $118,600.00 - $178,000.00\nActive TS/SCI'
+BACKENDS = [name for name in parsing.PARSERS if name != 'lxml' or parsing.HAS_LXML]
+
+
+@pytest.fixture(scope='module')
+def scraper(tmp_path_factory):
+    """wsClearenceJobs, imported from a scratch folder (importing it creates the JobData folders)."""
+    cwd = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp('scraper'))
+    try:
+        import wsClearenceJobs
+    finally:
+        os.chdir(cwd)
+    active = parsing.PARSER
+    yield wsClearenceJobs
+    parsing.set_parser(active)
+
+
+def extract(scraper, parser: str):
+    parsing.set_parser(parser)
+    cards = [scraper.parse_job_card(card, idx) for idx, card in enumerate(scraper.parse_job_cards(LIST_PAGE))]
+    descriptions = [scraper.parse_job_description(DETAIL_PAGE.format(desc_class=desc_class))
+                    for desc_class in ('job-description-text', 'rich job-description-text', 'job-description-text col-12')]
+    return cards, descriptions
+
+
+@pytest.mark.parametrize('parser', BACKENDS)
+def test_cards_and_descriptions_are_extracted(scraper, parser):
+    cards, descriptions = extract(scraper, parser)
+    assert [card['role_name'] for card in cards] == ['Systems Engineer 0', 'Systems Engineer 1', 'Systems Engineer 2']
+    assert cards[1] == {
+        'idx': 1, 'role_name': 'Systems Engineer 1', 'company': 'Acme & Sons',
+        'link': 'https://www.clearancejobs.com/jobs/1/systems-engineer', 'location': 'San Diego, CA (On-Site)',
+        'date_posted': 'Posted today', 'clearance_required': 'TS/SCI', 'polygraph': 'CI Polygraph',
+        'description_preview': 'Buildthingsfor the mission.',
+    }
+    assert descriptions == [DESCRIPTION] * 3
+
+
+def test_parsers_give_identical_output(scraper):
+    if len(BACKENDS) < 2:
+        pytest.skip('lxml is not installed')
+    assert extract(scraper, 'lxml') == extract(scraper, 'html.parser')
@@ -0,0 +1,105 @@
+"""
+common.ratelimit: the token bucket and the adaptive (AIMD) per-host limiter,
+driven by a fake clock.
+
+Run from Scripts/: python -m pytest tests
+"""
+import os
+import sys
+
+import pytest
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if SCRIPTS_DIR not in sys.path:
+    sys.path.insert(0, SCRIPTS_DIR)
+from common import ratelimit
+from common.ratelimit import AdaptiveRateLimiter, TokenBucket, get_limiter, parse_retry_after
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(ratelimit.time, 'monotonic', clock)
+    return clock
+
+
+def test_bucket_spaces_out_reservations(clock):
+    bucket = TokenBucket(rate=2.0, capacity=1.0)
+    assert [bucket.reserve() for _ in range(4)] == [0.0, 0.5, 1.0, 1.5]
+    clock.now += 10
+    # Refilled, but never past its capacity
+    assert [bucket.reserve() for _ in range(2)] == [0.0, 0.5]
+
+
+def test_healthy_responses_raise_the_rate_up_to_max(clock):
+    limiter = AdaptiveRateLimiter(rate=1.0, max_rate=1.25, increase=0.1)
+    for _ in range(5):
+        limiter.record(200, latency=0.2)
+    assert limiter.current_rate == 1.25
+
+
+def test_throttling_halves_the_rate_once_per_cooldown(clock):
+    limiter = AdaptiveRateLimiter(rate=4.0, min_rate=0.5, cooldown=1.0)
+    limiter.record(429)
+    limiter.record(503)
+    assert limiter.current_rate == 2.0 and limiter.backoffs == 1
+    clock.now += 1.5
+    limiter.record(None)  # network error
+    assert limiter.current_rate == 1.0
+    for _ in range(5):
+        clock.now += 1.5
+        limiter.record(429)
+    assert limiter.current_rate == 0.5
+
+
+def test_retry_after_pauses_the_bucket(clock):
+    limiter = AdaptiveRateLimiter(rate=2.0)
+    limiter.record(429, retry_after=5)
+    # The rate is halved to 1/s and the bucket owes 5 seconds' worth of it
+    assert limiter.reserve() == pytest.approx(6.0)
+    limiter.record(429, retry_after=5)  # within the cooldown: pause again, no second cut
+    assert limiter.current_rate == 1.0
+
+
+def test_mixed_fast_and_slow_endpoints_do_not_back_off(clock):
+    limiter = AdaptiveRateLimiter(rate=2.0, max_rate=2.0)
+    for i in range(200):
+        limiter.record(200, latency=0.1 if i % 2 else 0.8)
+    assert limiter.backoffs == 0
+
+
+def test_rising_latency_backs_off_after_the_warmup(clock):
+    limiter = AdaptiveRateLimiter(rate=2.0, max_rate=2.0)
+    for _ in range(ratelimit.LATENCY_WARMUP - 2):
+        limiter.record(200, latency=0.1)
+    limiter.record(200, latency=5.0)
+    assert limiter.backoffs == 0  # still warming up
+    for _ in range(50):
+        limiter.record(200, latency=0.1)
+    for _ in range(5):
+        clock.now += 2
+        limiter.record(200, latency=5.0)
+    assert limiter.backoffs >= 1 and limiter.current_rate < 2.0
+
+
+def test_limiters_are_shared_per_host():
+    first = get_limiter('https://Example.test/jobs?page=1', rate=1.0)
+    assert get_limiter('example.test') is first
+    assert get_limiter('https://example.test/other', max_rate=3.0) is first
+    assert first.max_rate == 3.0
+    with pytest.raises(AttributeError):
+        first.configure(speed=1)
+
+
+def test_parse_retry_after():
+    assert parse_retry_after('54') == 54.0
+    assert parse_retry_after('Wed, 21 Oct 2026 07:28:00 GMT') is None
+    assert parse_retry_after(None) is None
@@ -1,39 +1,60 @@
 import json, os, re
 from pprint import pprint
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 from icecream import ic
 import requests
 import time,random
 import concurrent.futures
+import queue, threading
+import asyncio
 from datetime import datetime
 from  _init__ import *
 from common.helper import cprint 
+from common.fetch import fetch, fetch_text, close_sessions
+from common.http_cache import HttpCache
+from common.ratelimit import get_limiter
+from common.job_index import JobIndex
+from common.checkpoint import PageCheckpoints
+from common.jobstore import JobStore, iter_jobs
+from common.jobdb import JobDB
+from common.parsing import make_soup, compile_selector, set_parser, PARSER, PARSERS
+from common.async_fetch import AsyncFetcher, DEFAULT_CONCURRENCY
 import argparse, sys
 current_dir = os.path.dirname(os.path.abspath(__file__))
 parent_dir = os.path.dirname(current_dir)
 
-def jitter():
-    jitterTime = random.uniform(0, 1)  # Random time between 0 to 2 seconds
-    print(f"Jittering for {jitterTime:.2f} seconds...",end='\r')
-    time.sleep(jitterTime)  # Random delay to mimic human behavior
+# Selectors are compiled once and reused for every card on every page
+SEL_PAGINATION = compile_selector('.cj-pagination')
+SEL_PAGE_BUTTON = compile_selector('button.btn')
+SEL_JOB_CARD = compile_selector('div.job-search-list-item-desktop')
+SEL_JOB_NAME = compile_selector('.job-search-list-item-desktop__job-name')
+SEL_COMPANY = compile_selector('.job-search-list-item-desktop__company-name a')
+SEL_LOCATION = compile_selector('.cj-multiple-locations__location-name')
+SEL_GROUP = compile_selector('div.job-search-list-item-desktop__group')
+SEL_LOCKER_ICON = compile_selector('i.cjicon-locker')
+SEL_POLYGRAPH_ICON = compile_selector('i.cjicon-polygraph')
+SEL_PREVIEW = compile_selector('.job-search-list-item-desktop__description')
+SEL_DESCRIPTION = compile_selector('.job-description-text')
+# Detail pages: only build the description subtree instead of the whole page.
+# The class token is matched explicitly, because bs4's string match does not
+# find it in a multi-class attribute such as class="rich job-description-text"
+DESCRIPTION_ONLY = SoupStrainer(class_=lambda classes: classes and 'job-description-text' in classes.split())
 
 def get_total_pages(url: str = None) -> int:
     # url = "https://www.clearancejobs.com/jobs?loc=5%2C9&received=31&ind=nq%2Cnr%2Cpg%2Cnu%2Cnv"
-    headers = {"User-Agent": "Mozilla/5.0"} # Mimics a real browser
-    # 1. Get the document behind the URL
-
-    response = requests.get(url, headers=headers)
+    # 1. Get the document behind the URL (pooled session, browser headers)
+    response = fetch(url)
     html_content = response.text 
 
     # 2. Feed that document to Beautiful Soup
-    soup = BeautifulSoup(html_content, 'html.parser')
+    soup = make_soup(html_content)
     try:
         # Find the pagination container
-        pagination = soup.select_one('.cj-pagination')
+        pagination = SEL_PAGINATION.select_one(soup)
         if not pagination:
             return 1
         # Find all buttons and get the text of the last one before the "Next" arrow
-        page_buttons = pagination.find_all('button', class_='btn')
+        page_buttons = SEL_PAGE_BUTTON.select(pagination)
         # Filter for buttons that contain only digits
         pages = [int(btn.get_text()) for btn in page_buttons if btn.get_text().isdigit()]
         cprint(f"Detected {max(pages) if pages else 1} pages to scrape.", color = 'green')
@@ -42,12 +63,24 @@ def get_total_pages(url: str = None) -> int:
         cprint(f"Detected {1} pages to scrape.", color = 'yellow')
         return 1
 
+def parse_job_cards(html_content: str):
+    """Return the job card elements from a job list page's HTML."""
+    soup = make_soup(html_content)
+
+    # Target the main container identified in your screenshot
+    return SEL_JOB_CARD.select(soup)
+
+def parse_job_description(html_content: str) -> str:
+    """Return the full description text from a job detail page's HTML."""
+    soup = make_soup(html_content, parse_only=DESCRIPTION_ONLY)
+    desc_node = SEL_DESCRIPTION.select_one(soup)
+
+    return desc_node.get_text(separator="\n", strip=True) if desc_node else "Full text container not found."
+
 def parse_clearance_job_html(url: str):
     """Fetch the job list page for the given URL and return job card elements."""
-    headers = {"User-Agent": "Mozilla/5.0"} # Mimics a real browser
-
     try:
-        response = requests.get(url, headers=headers, timeout=10)
+        response = fetch(url)
         response.raise_for_status()
         html_content = response.text
     except Exception as e:
@@ -55,26 +88,18 @@ def parse_clearance_job_html(url: str):
         return []
 
     # 2. Feed that document to Beautiful Soup
-    soup = BeautifulSoup(html_content, 'html.parser')
+    return parse_job_cards(html_content)
 
-    # Target the main container identified in your screenshot
-    return soup.select('div.job-search-list-item-desktop')
-
-def get_full_job_details(url):
-    """Fetches the full description from a standalone link."""
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-    }
+def get_full_job_details(url, cache: HttpCache = None):
+    """Fetches the full description from a standalone link.
+    cache: optional HttpCache so unchanged postings are revalidated instead of re-downloaded.
+    """
     try:
         # 1. Fetch the page
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
+        html_content = fetch_text(url, cache=cache)
         
         # 2. Parse the specific div
-        soup = BeautifulSoup(response.text, 'html.parser')
-        desc_node = soup.select_one(".job-description-text")
-        
-        return desc_node.get_text(separator="\n", strip=True) if desc_node else "Full text container not found."
+        return parse_job_description(html_content)
     except Exception as e:
         return f"Error fetching details: {e}"
     
@@ -124,11 +149,98 @@ def extract_salary(text):
 
     return {"min": 0, "max": 0}
 
+def parse_job_card(card, idx: int = 0):
+    """Extract the listing-level fields from a single job card.
+
+    This only reads the card markup (no network). Returns None for malformed cards
+    so callers can skip them.
+    """
+    # 1. Role and Link (Drilling into the 'Header' and 'Job Name Wrapper')
+    role_node = SEL_JOB_NAME.select_one(card)
+    if not role_node:
+        # skip malformed card
+        cprint(f"Skipping malformed card at index {idx}", color = 'red')
+        return None
+    role_name = role_node.get_text(strip=True)
+    # Prepend base URL for the link
+    role_href = role_node.get('href')
+    if not role_href:
+        cprint(f"Skipping card with missing href for role '{role_name}'", color = 'red')
+        return None
+    role_link = "https://www.clearancejobs.com" + role_href
+
+    # 2. Company
+    company_node = SEL_COMPANY.select_one(card)
+    company = company_node.get_text(strip=True) if company_node else "Unknown"
+
+    # 3. Location (Handling the San Diego, CA On-Site structure)
+    location_node = SEL_LOCATION.select_one(card)
+    location_text = location_node.get_text(strip=True) if location_node else "N/A"
+
+    # 4. Meta Data (Clearance, Date, Poly)
+    clearance = "Not Specified"
+    poly = "Not Specified"
+    posted = "Unknown"
+
+    groups = SEL_GROUP.select(card)
+    for group in groups:
+        text = group.get_text(strip=True)
+        if SEL_LOCKER_ICON.select_one(group):
+            clearance = text
+        elif SEL_POLYGRAPH_ICON.select_one(group):
+            poly = text
+        elif "Posted" in text:
+            posted = text
+
+    # 5. Summary/Description
+    desc_node = SEL_PREVIEW.select_one(card)
+    description_preview = desc_node.get_text(strip=True) if desc_node else ""
+
+    return {
+        "idx": idx,
+        "role_name": role_name,
+        "company": company,
+        "link": role_link,
+        "location": location_text,
+        "date_posted": posted,
+        "clearance_required": clearance,
+        "polygraph": poly,
+        "description_preview": description_preview,
+    }
+
+def build_job_record(card_data, full_description):
+    """Combine the card fields with the deep-scraped description into the job JSON object."""
+    salary_data = extract_salary(full_description)
+    return {
+        "job_id":generate_job_id(card_data['role_name'],card_data['company']),
+        "role_name": card_data['role_name'],
+        "company": card_data['company'],
+        "link": card_data['link'],
+        "location": card_data['location'],
+        "date_posted": card_data['date_posted'],
+        "remote_eligible": "On-Site" if "(On-Site" in full_description else "Remote/Hybrid Search Needed",
+        "salary": {
+            "raw": f"${salary_data['min']} - ${salary_data['max']}" if salary_data['min'] else "Not Listed",
+            "min_val": salary_data['min'] if salary_data.get('min') else 0,
+            "max_val": salary_data['max'] if salary_data.get('max') else 0
+        },
+        "travel_req": "10%" if "10% of the Time" in full_description else "Check Description",
+        "clearance_required": card_data['clearance_required'],
+        "polygraph": card_data['polygraph'],
+        "years_exp_required": "8+" if "8 years" in full_description else "Not specified",
+        "is_contingent": "Yes" if "contingent on program funding" in full_description.lower() else "No",
+        "description_preview": card_data['description_preview'],
+        "full_description": full_description
+    }
+
 def process_scraped_data(job_cards, seen_links: set = None):
     """Process a list of job cards and return deduplicated extracted data.
 
     seen_links: optional set of URLs used to dedupe across pages. If not provided a new set
     will be used locally.
+
+    This is the sequential path (one deep scrape per card). Full sweeps should use
+    run_pipeline() instead.
     """
     extracted_data = []
     if seen_links is None:
@@ -136,19 +248,10 @@ def process_scraped_data(job_cards, seen_links: set = None):
 
     for idx, card in enumerate(job_cards, start=1):
         try:
-            # 1. Role and Link (Drilling into the 'Header' and 'Job Name Wrapper')
-            role_node = card.select_one('.job-search-list-item-desktop__job-name')
-            if not role_node:
-                # skip malformed card
-                cprint(f"Skipping malformed card at index {idx}", color = 'red')
-                continue
-            role_name = role_node.get_text(strip=True)
-            # Prepend base URL for the link
-            role_href = role_node.get('href')
-            if not role_href:
-                cprint(f"Skipping card with missing href for role '{role_name}'", color = 'red')
+            card_data = parse_job_card(card, idx)
+            if not card_data:
                 continue
-            role_link = "https://www.clearancejobs.com" + role_href
+            role_link = card_data['link']
 
             # Deduplicate on link
             if role_link in seen_links:
@@ -156,62 +259,11 @@ def process_scraped_data(job_cards, seen_links: set = None):
                 continue
 
             #1.5 Deep scraping for full description
-            # role_nameTruncate = role_name[:30]
-            cprint(f"{idx} |Deep scraping: {role_name}...", color = 'blue')
+            cprint(f"{idx} |Deep scraping: {card_data['role_name']}...", color = 'blue')
             full_description = get_full_job_details(role_link)
-            salary_data = extract_salary(full_description)
-            jitter()
-
-            # 2. Company
-            company_node = card.select_one('.job-search-list-item-desktop__company-name a')
-            company = company_node.get_text(strip=True) if company_node else "Unknown"
-
-            # 3. Location (Handling the San Diego, CA On-Site structure)
-            location_node = card.select_one('.cj-multiple-locations__location-name')
-            location_text = location_node.get_text(strip=True) if location_node else "N/A"
-
-            # 4. Meta Data (Clearance, Date, Poly)
-            clearance = "Not Specified"
-            poly = "Not Specified"
-            posted = "Unknown"
-
-            groups = card.find_all('div', class_='job-search-list-item-desktop__group')
-            for group in groups:
-                text = group.get_text(strip=True)
-                if group.find('i', class_='cjicon-locker'):
-                    clearance = text
-                elif group.find('i', class_='cjicon-polygraph'):
-                    poly = text
-                elif "Posted" in text:
-                    posted = text
-
-            # 5. Summary/Description
-            desc_node = card.select_one('.job-search-list-item-desktop__description')
-            description_preview = desc_node.get_text(strip=True) if desc_node else ""
 
             # Build the JSON object and record link as seen
-            extracted_data.append({
-                "job_id":generate_job_id(role_name,company),
-                "role_name": role_name,
-                "company": company,
-                "link": role_link,
-                "location": location_text,
-                "date_posted": posted,
-                "remote_eligible": "On-Site" if "(On-Site" in full_description else "Remote/Hybrid Search Needed",
-                "salary": {
-                    "raw": f"${salary_data['min']} - ${salary_data['max']}" if salary_data['min'] else "Not Listed",
-                    "min_val": salary_data['min'] if salary_data.get('min') else 0,
-                    "max_val": salary_data['max'] if salary_data.get('max') else 0
-                },
-                "travel_req": "10%" if "10% of the Time" in full_description else "Check Description",
-                "clearance_required": clearance,
-                "polygraph": poly,
-                "years_exp_required": "8+" if "8 years" in full_description else "Not specified",
-                "is_contingent": "Yes" if "contingent on program funding" in full_description.lower() else "No",
-                "description_preview": description_preview,
-                "full_description": full_description
-            })
-
+            extracted_data.append(build_job_record(card_data, full_description))
             seen_links.add(role_link)
 
         except ConnectionError as e:
@@ -220,44 +272,47 @@ def process_scraped_data(job_cards, seen_links: set = None):
             continue
 
     return extracted_data, seen_links
+
+    
+def clean_job_record(entry):
+    """Turn a scraped job into the record saved in the job store."""
+    # CLEANUP: Fixing the concatenated 'clearance' field
+    # We extract 'Secret' or 'Top Secret' from the messy string
+    raw_clearance = entry.get('clearance', '')
+    actual_clearance = "Secret" if "Secret" in raw_clearance else "Not Specified"
+    if "Top Secret" in raw_clearance: actual_clearance = "Top Secret"
     
+    # CLEANUP: Extracting the real date if it was stuck in the clearance field
+    date_val = "Posted today" if "today" in raw_clearance else entry.get('date_posted')
+    return {
+        "job_id":generate_job_id(entry['role_name'],entry['company']),
+        "role_name": entry['role_name'],
+        "company": entry['company'],
+        "link": entry['link'],
+        "location": entry['location'],
+        "date_posted": date_val,
+        "clearance": actual_clearance,
+        "travel_req": entry.get('travel_req', 'Check Description'),
+        "remote_eligible": entry.get('remote_eligible', 'Remote/Hybrid Search Needed'),
+        "salary": entry.get('salary', {'raw': 'Not Listed', 'min_val': None, 'max_val': None}),
+        "polygraph": entry['polygraph'],
+        "years_exp_required": entry.get('years_exp_required', 'Not specified'),
+        "is_contingent": entry.get('is_contingent', 'No'),
+        "full_description": entry['full_description']
+        # "description_preview": entry['description_preview']
+    }
+
 def finalize_to_json(data_list, directory= "JobData/ClearanceJobs", filename="jobs_data.json"):
+    """Clean the scraped jobs and write them to directory+filename as one JSON array.
+
+    The scraper itself streams into a JobStore (jobs_data.jsonl); this is kept
+    for one-off exports in the old format. Returns the number of jobs written.
+    """
     os.makedirs(directory, exist_ok=True)
-    cleaned_data = []
-    
-    for entry in data_list:
-        # CLEANUP: Fixing the concatenated 'clearance' field
-        # We extract 'Secret' or 'Top Secret' from the messy string
-        raw_clearance = entry.get('clearance', '')
-        actual_clearance = "Secret" if "Secret" in raw_clearance else "Not Specified"
-        if "Top Secret" in raw_clearance: actual_clearance = "Top Secret"
-        
-        # CLEANUP: Extracting the real date if it was stuck in the clearance field
-        date_val = "Posted today" if "today" in raw_clearance else entry.get('date_posted')
-        clean_entry = {
-            "job_id":generate_job_id(entry['role_name'],entry['company']),
-            "role_name": entry['role_name'],
-            "company": entry['company'],
-            "link": entry['link'],
-            "location": entry['location'],
-            "date_posted": date_val,
-            "clearance": actual_clearance,
-            "travel_req": entry.get('travel_req', 'Check Description'),
-            "remote_eligible": entry.get('remote_eligible', 'Remote/Hybrid Search Needed'),
-            "salary": entry.get('salary', {'raw': 'Not Listed', 'min_val': None, 'max_val': None}),
-            "polygraph": entry['polygraph'],
-            "years_exp_required": entry.get('years_exp_required', 'Not specified'),
-            "is_contingent": entry.get('is_contingent', 'No'),
-            "full_description": entry['full_description']
-            # "description_preview": entry['description_preview']
-        }
-        cleaned_data.append(clean_entry)
-
-    # Convert List to JSON and write to file
+    cleaned_data = [clean_job_record(entry) for entry in data_list]
     with open(f'{directory}{filename}', 'w', encoding='utf-8') as f:
         json.dump(cleaned_data, f, indent=4)
-    
-    return json.dumps(cleaned_data, indent=4) # Returns as a JSON string
+    return len(cleaned_data)
 
 def scrape_page_worker(page_num, base_url):
     """
@@ -268,10 +323,7 @@ def scrape_page_worker(page_num, base_url):
     cprint(f"[+] Scraping Page {page_num}: {current_url}",color = 'green')
 
     try:
-        # Note: jitter() is usually for sequential; in multi-threading, 
-        # the natural spread of thread start times often provides enough 'jitter'.
-        # jitter() 
-        
+        # Requests are paced by the site's adaptive rate limiter inside fetch()
         data = parse_clearance_job_html(current_url)
         
         # We pass an empty set here because we will de-duplicate 
@@ -281,7 +333,273 @@ def scrape_page_worker(page_num, base_url):
     except Exception as e:
         cprint(f"[!] Error on Page {page_num}: {e}",color = 'red')
         return []
-    
+
+########################################
+### Pipelined Deep Scrape            ###
+########################################
+# Starting request rate for the site. The old thread-per-page scraper ran 5
+# workers that each slept ~0.5s between requests, which is roughly this many
+# requests per second. The adaptive limiter climbs from here toward --rps while
+# the site answers quickly, and backs off on 429/503 or rising latency.
+START_REQUESTS_PER_SECOND = 5.0
+DEFAULT_REQUESTS_PER_SECOND = 15.0
+_STOP = object()
+
+def pace_site(base_url, requests_per_second: float = DEFAULT_REQUESTS_PER_SECOND):
+    """Set up the site's shared rate limiter: start at the old pace, never exceed requests_per_second."""
+    return get_limiter(base_url, rate=min(START_REQUESTS_PER_SECOND, requests_per_second), max_rate=requests_per_second)
+
+def needs_detail_fetch(card_data, job_index: JobIndex = None, refresh_days: float = None) -> bool:
+    """Incremental mode check: skip cards whose job is already in the index (and still fresh)."""
+    if job_index is None:
+        return True
+    if job_index.should_fetch(card_data['link'], refresh_days):
+        return True
+    print(f"Skipping known job: {card_data['role_name']} at {card_data['company']}")
+    return False
+
+def remember_job(record, job_index: JobIndex = None):
+    """Add a deep-scraped job to the index, unless its detail fetch failed."""
+    if job_index is not None and not record['full_description'].startswith("Error fetching details"):
+        job_index.add(record['link'], record['job_id'])
+
+def store_job(record, job_store: JobStore = None):
+    """Stream a finished job to the store so later stages can read it right away."""
+    if job_store is not None:
+        job_store.append(clean_job_record(record))
+
+def run_pipeline(base_url, total_pages, page_workers: int = 5, detail_workers: int = 10, requests_per_second: float = DEFAULT_REQUESTS_PER_SECOND, cache: HttpCache = None, job_index: JobIndex = None, refresh_days: float = None, checkpoints: PageCheckpoints = None, pages=None, seen_links: set = None, job_store: JobStore = None):
+    """Scrape every listing page and deep-scrape each job through a producer/consumer pipeline.
+
+    Page workers fetch listing pages and push parsed card records onto a bounded queue.
+    A separate pool of detail workers pulls from that queue and fetches the full
+    descriptions. Every request is paced by the site's shared adaptive rate limiter
+    instead of per-card sleeps; requests_per_second caps how fast it may go.
+    Links are de-duplicated globally as cards are produced.
+    cache: optional HttpCache for the detail pages.
+    job_index: optional JobIndex; known jobs are skipped unless older than refresh_days.
+    checkpoints: optional PageCheckpoints; each page is saved as soon as all its jobs are done.
+    pages: page numbers to scrape (default 1..total_pages), e.g. only the missing ones on --resume.
+    seen_links: links already collected (e.g. from resumed pages) so they are not scraped again.
+    job_store: optional JobStore; every record is appended as soon as it is built.
+    Returns the number of jobs deep-scraped. Records are not kept in memory:
+    they live in job_store (and in the page checkpoints) once built.
+    """
+    pace_site(base_url, requests_per_second)
+    card_queue = queue.Queue(maxsize=detail_workers * 4)
+    scraped = 0
+    results_lock = threading.Lock()
+    seen_links = set(seen_links or ())
+    seen_lock = threading.Lock()
+    # Per-page bookkeeping for checkpoints. Each page holds one extra pending
+    # count while its producer is still queuing cards.
+    page_jobs = {}
+    page_pending = {}
+    page_failed = set()
+
+    def job_done(page_num, record=None):
+        nonlocal scraped
+        with results_lock:
+            if record is not None:
+                scraped += 1
+                if checkpoints is not None:
+                    page_jobs[page_num].append(record)
+                if record['full_description'].startswith("Error fetching details"):
+                    page_failed.add(page_num)
+            page_pending[page_num] -= 1
+            if page_pending[page_num] > 0:
+                return
+            finished = page_jobs.pop(page_num)
+        if checkpoints is None:
+            return
+        if page_num in page_failed:
+            cprint(f"[!] Page {page_num} had failed detail fetches; not checkpointed", color = 'yellow')
+            return
+        checkpoints.save(page_num, finished)
+
+    def page_producer(page_num):
+        current_url = f"{base_url}&PAGE={page_num}"
+        cprint(f"[+] Scraping Page {page_num}: {current_url}",color = 'green')
+        # Let fetch errors propagate so a failed listing page is never checkpointed as empty
+        job_cards = parse_job_cards(fetch_text(current_url))
+        with results_lock:
+            page_jobs[page_num] = []
+            page_pending[page_num] = 1
+        queued = 0
+        for idx, card in enumerate(job_cards, start=1):
+            card_data = parse_job_card(card, idx)
+            if not card_data:
+                continue
+            with seen_lock:
+                if card_data['link'] in seen_links:
+                    print(f"Skipping duplicate job link: {card_data['link']}")
+                    continue
+                seen_links.add(card_data['link'])
+            if not needs_detail_fetch(card_data, job_index, refresh_days):
+                continue
+            card_data['page'] = page_num
+            with results_lock:
+                page_pending[page_num] += 1
+            card_queue.put(card_data)
+            queued += 1
+        # Release the producer's hold; the page completes when its last job does
+        job_done(page_num)
+        return queued
+
+    def detail_consumer():
+        while True:
+            card_data = card_queue.get()
+            try:
+                if card_data is _STOP:
+                    return
+                cprint(f"{card_data['page']}.{card_data['idx']} |Deep scraping: {card_data['role_name']}...", color = 'blue')
+                full_description = get_full_job_details(card_data['link'], cache=cache)
+                record = build_job_record(card_data, full_description)
+                remember_job(record, job_index)
+                store_job(record, job_store)
+                job_done(card_data['page'], record)
+            except Exception as e:
+                cprint(f"[!] Error deep scraping {card_data.get('link')}: {e}", color = 'red')
+            finally:
+                card_queue.task_done()
+
+    if pages is None:
+        pages = range(1, total_pages + 1)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=detail_workers) as detail_pool:
+        consumers = [detail_pool.submit(detail_consumer) for _ in range(detail_workers)]
+        try:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=page_workers) as page_pool:
+                future_to_page = {page_pool.submit(page_producer, i): i for i in pages}
+                try:
+                    for future in concurrent.futures.as_completed(future_to_page):
+                        page_num = future_to_page[future]
+                        try:
+                            cprint(f"[=] Page {page_num} queued {future.result()} jobs", color = 'green')
+                        except Exception as e:
+                            cprint(f"[!] Error on Page {page_num}: {e}",color = 'red')
+                except KeyboardInterrupt:
+                    # Stop scheduling new pages; pages already running finish and checkpoint
+                    cprint("[!] Interrupted: finishing in-flight pages. Re-run with --resume to continue.", color = 'yellow')
+                    for future in future_to_page:
+                        future.cancel()
+                    raise
+        finally:
+            # One sentinel per consumer so every detail worker exits once the queue drains
+            for _ in consumers:
+                card_queue.put(_STOP)
+
+    return scraped
+
+async def run_pipeline_async(base_url, total_pages, concurrency: int = DEFAULT_CONCURRENCY, requests_per_second: float = DEFAULT_REQUESTS_PER_SECOND, cache: HttpCache = None, job_index: JobIndex = None, refresh_days: float = None, checkpoints: PageCheckpoints = None, pages=None, seen_links: set = None, job_store: JobStore = None, page_workers: int = 5):
+    """asyncio version of run_pipeline().
+
+    Listing and detail fetches run as coroutines over one shared connection pool.
+    The semaphore in AsyncFetcher caps requests in flight and the same adaptive
+    rate limiter paces them, so raising requests_per_second is what lets
+    hundreds of requests overlap without adding threads.
+    As in run_pipeline(), at most page_workers listing pages are parsed at once
+    and their cards go onto a bounded asyncio.Queue drained by `concurrency`
+    detail workers, so neither pages nor detail fetches are scheduled all at once.
+    checkpoints, pages, seen_links and job_store work as in run_pipeline(),
+    and so does the return value: the number of jobs deep-scraped.
+    """
+    pace_site(base_url, requests_per_second)
+    seen_links = set(seen_links or ())
+    if pages is None:
+        pages = range(1, total_pages + 1)
+    page_slots = asyncio.Semaphore(page_workers)
+    card_queue = asyncio.Queue(maxsize=concurrency * 2)
+    scraped = 0
+    # Per-page bookkeeping for checkpoints, as in run_pipeline(). Everything
+    # runs on the event loop thread, so none of it needs a lock.
+    page_jobs = {}
+    page_pending = {}
+    page_failed = set()
+
+    def job_done(page_num, record=None):
+        nonlocal scraped
+        if record is not None:
+            scraped += 1
+            if checkpoints is not None:
+                page_jobs[page_num].append(record)
+            if record['full_description'].startswith("Error fetching details"):
+                page_failed.add(page_num)
+        page_pending[page_num] -= 1
+        if page_pending[page_num] > 0:
+            return
+        finished = page_jobs.pop(page_num)
+        if checkpoints is None:
+            return
+        if page_num in page_failed:
+            cprint(f"[!] Page {page_num} had failed detail fetches; not checkpointed", color = 'yellow')
+            return
+        checkpoints.save(page_num, finished)
+
+    async with AsyncFetcher(concurrency=concurrency) as fetcher:
+
+        async def detail_worker():
+            while True:
+                card_data = await card_queue.get()
+                try:
+                    if card_data is _STOP:
+                        return
+                    cprint(f"{card_data['page']}.{card_data['idx']} |Deep scraping: {card_data['role_name']}...", color = 'blue')
+                    try:
+                        full_description = parse_job_description(await fetcher.fetch_text(card_data['link'], cache=cache))
+                    except Exception as e:
+                        full_description = f"Error fetching details: {e}"
+                    record = build_job_record(card_data, full_description)
+                    remember_job(record, job_index)
+                    store_job(record, job_store)
+                    job_done(card_data['page'], record)
+                except Exception as e:
+                    cprint(f"[!] Error deep scraping {card_data.get('link')}: {e}", color = 'red')
+                finally:
+                    card_queue.task_done()
+
+        async def scrape_page(page_num):
+            async with page_slots:
+                current_url = f"{base_url}&PAGE={page_num}"
+                cprint(f"[+] Scraping Page {page_num}: {current_url}",color = 'green')
+                try:
+                    job_cards = parse_job_cards(await fetcher.fetch_text(current_url))
+                except Exception as e:
+                    cprint(f"Warning: failed to fetch {current_url}: {e}", color = 'red')
+                    return
+                page_jobs[page_num] = []
+                page_pending[page_num] = 1
+                queued = 0
+                for idx, card in enumerate(job_cards, start=1):
+                    card_data = parse_job_card(card, idx)
+                    if not card_data:
+                        continue
+                    if card_data['link'] in seen_links:
+                        print(f"Skipping duplicate job link: {card_data['link']}")
+                        continue
+                    seen_links.add(card_data['link'])
+                    if not needs_detail_fetch(card_data, job_index, refresh_days):
+                        continue
+                    card_data['page'] = page_num
+                    page_pending[page_num] += 1
+                    # Waits while the detail workers are behind, which holds back further pages
+                    await card_queue.put(card_data)
+                    queued += 1
+                # Release the producer's hold; the page completes when its last job does
+                job_done(page_num)
+                cprint(f"[=] Page {page_num} queued {queued} jobs", color = 'green')
+
+        workers = [asyncio.create_task(detail_worker()) for _ in range(concurrency)]
+        try:
+            await asyncio.gather(*(scrape_page(i) for i in pages))
+        finally:
+            # One sentinel per worker so every detail worker exits once the queue drains
+            for _ in workers:
+                await card_queue.put(_STOP)
+            await asyncio.gather(*workers)
+
+    return scraped
+
 def linkFromUI():
     # 1. Initialize the Argument Parser
     parser = argparse.ArgumentParser(description="ClearanceJobs Scraper and Analyzer")
@@ -289,6 +607,14 @@ def linkFromUI():
     # 2. Define the inputs the UI is sending
     # parser.add_argument("--resume_path", type=str, required=True, help="Path to the user's resume")
     parser.add_argument("--link", type=str, required=True, help="URL of the job posting")
+    parser.add_argument("--async", dest="use_async", action="store_true", help="Use the asyncio backend (needs httpx)")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="Max in-flight requests in --async mode")
+    parser.add_argument("--rps", type=float, default=DEFAULT_REQUESTS_PER_SECOND, help="Maximum requests per second the adaptive rate limiter may reach")
+    parser.add_argument("--no-cache", dest="no_cache", action="store_true", help="Always re-download job detail pages")
+    parser.add_argument("--parser", choices=PARSERS, default=PARSER, help="HTML parser backend (lxml is fastest when installed)")
+    parser.add_argument("--incremental", action="store_true", help="Skip jobs already scraped and append only new ones to jobs_data.jsonl")
+    parser.add_argument("--refresh-days", dest="refresh_days", type=float, default=None, help="With --incremental, re-scrape known jobs older than this many days")
+    parser.add_argument("--resume", action="store_true", help="Reload pages checkpointed by an interrupted run and scrape only the missing ones")
     # parser.add_argument("--model", type=str, required=True, help="Gemini model ID to use")
 
     args = parser.parse_args()
@@ -296,7 +622,7 @@ def linkFromUI():
     # 3. Use the data in your script
     print(f"--- Starting Analysis Pipeline ---")
     print(f"Target URL: {args.link}")
-    return args.link
+    return args
     # print(f"Using Model: {args.model}")
     # print(f"Reading Resume From: {args.resume_path}")
     print(">>>",parser)
@@ -315,50 +641,100 @@ def linkFromUI():
 ########################################
 if __name__ == "__main__":
     try:
-        baseURL = linkFromUI()
+        args = linkFromUI()
+        baseURL = args.link
     except:
+        args = argparse.Namespace(use_async=False, concurrency=DEFAULT_CONCURRENCY, rps=DEFAULT_REQUESTS_PER_SECOND, no_cache=False, parser=PARSER, incremental=False, refresh_days=None, resume=False)
         baseURL = input("Enter ClearanceJobs URL (or press Enter for default): ").strip()
         if not baseURL:
             input("No URL provided. Using default ClearanceJobs URL. Press Enter to continue...")
             baseURL = "https://www.clearancejobs.com/jobs?loc=5,9,48&received=93&ind=nq,nr,pg,nu,nv,nz&type=e&limit=50"
     
+    set_parser(args.parser)
     total_pages = get_total_pages(baseURL)
-    all_raw_jobs = []
-        
-    # --- Multi-threaded Execution ---
-    # max_workers=5 is a safe starting point. 
-    # Too many can get your IP flagged by the site's firewall.
-    print(f"Starting Multi-threaded Scraper for {total_pages} pages...")
-    
-    with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
-        # Map the worker function to all page numbers
-        future_to_page = {executor.submit(scrape_page_worker, i, baseURL): i for i in range(1, total_pages + 1)}
-        
-        for future in concurrent.futures.as_completed(future_to_page):
-            page_results = future.result()
-            if page_results:
-                all_raw_jobs.extend(page_results)
-
-    # --- Final De-duplication & Sorting ---
-    # Since threads return data in random order, we clean it up here.
-    seen_links = set()
-    unique_jobs = []
-    
-    for job in all_raw_jobs:
-        link = job.get('link')
-        if link not in seen_links:
-            # .copy() creates a unique instance so it won't be overwritten
-            unique_jobs.append(job.copy()) 
-            seen_links.add(link)
-
-    # Finalize to JSON
-    print(f"{parent_dir}\\JobData\\ClearanceJobs\\")
-    finalize_to_json(unique_jobs, directory= f"{parent_dir}\\JobData\\ClearanceJobs\\", filename="jobs_data.json")
+    # Only a count is kept here; the records themselves stream into job_store
+    raw_job_count = 0
+    # Detail pages are cached on disk and revalidated with conditional GETs,
+    # so postings that have not changed since the last sweep cost a 304.
+    detail_cache = None if args.no_cache else HttpCache(os.path.join(parent_dir, "JobData", "ClearanceJobs", "http_cache"))
+    # Incremental runs skip the detail fetch for jobs already in the index
+    job_index = JobIndex(os.path.join(parent_dir, "JobData", "ClearanceJobs", "job_index.json")) if args.incremental else None
+    if job_index is not None:
+        print(f"Incremental mode: {len(job_index)} known jobs loaded.")
+
+    # --- Checkpoints ---
+    # Every finished page is written atomically, so an interrupted run can be
+    # picked up with --resume instead of starting from zero.
+    checkpoints = PageCheckpoints(os.path.join(parent_dir, "JobData", "ClearanceJobs", "checkpoints"), baseURL)
+    pages_to_scrape = list(range(1, total_pages + 1))
+    resumed_links = set()
+    if args.resume:
+        resumed_pages = checkpoints.load_all()
+        for page_jobs in resumed_pages.values():
+            raw_job_count += len(page_jobs)
+            resumed_links.update(job.get('link') for job in page_jobs)
+        pages_to_scrape = [p for p in pages_to_scrape if p not in resumed_pages]
+        print(f"Resuming: {len(resumed_pages)} pages ({raw_job_count} jobs) reloaded, {len(pages_to_scrape)} pages left.")
+    else:
+        checkpoints.reset()
+
+    # --- Job Store ---
+    # Records are appended to jobs_data.jsonl as each job finishes, so the ATS
+    # stage can start reading before the scrape is done. Incremental and
+    # resumed runs add to the existing file; compact() drops repeats at the end.
+    job_store = JobStore(os.path.join(parent_dir, "JobData", "ClearanceJobs", "jobs_data.jsonl"))
+    if not (args.incremental or args.resume):
+        job_store.reset()
+    elif not os.path.exists(job_store.path):
+        # First incremental run after the switch to JSON lines: carry the old file over
+        legacy_path = os.path.join(parent_dir, "JobData", "ClearanceJobs", "jobs_data.json")
+        if os.path.exists(legacy_path):
+            job_store.extend(iter_jobs(legacy_path))
+
+    try:
+        if args.use_async:
+            # --- asyncio Execution ---
+            # Coroutines over one connection pool, capped by --concurrency.
+            print(f"Starting Async Scraper for {len(pages_to_scrape)} pages (concurrency {args.concurrency})...")
+            raw_job_count += asyncio.run(run_pipeline_async(baseURL, total_pages, concurrency=args.concurrency, requests_per_second=args.rps, cache=detail_cache, job_index=job_index, refresh_days=args.refresh_days, checkpoints=checkpoints, pages=pages_to_scrape, seen_links=resumed_links, job_store=job_store))
+        else:
+            # --- Pipelined Execution ---
+            # 5 page workers feed a separate pool of detail fetchers. The site's
+            # adaptive rate limiter paces every request across both pools.
+            print(f"Starting Pipelined Scraper for {len(pages_to_scrape)} pages...")
+            raw_job_count += run_pipeline(baseURL, total_pages, page_workers=5, detail_workers=10, requests_per_second=args.rps, cache=detail_cache, job_index=job_index, refresh_days=args.refresh_days, checkpoints=checkpoints, pages=pages_to_scrape, seen_links=resumed_links, job_store=job_store)
+    except KeyboardInterrupt:
+        if job_index is not None:
+            job_index.save()
+        cprint(f"[!] Scrape interrupted. {len(checkpoints.completed_pages())} pages are checkpointed; re-run with --resume to finish.", color = 'yellow')
+        sys.exit(1)
+    finally:
+        close_sessions()
+
+    # --- Final De-duplication ---
+    # The store was written as jobs finished; keep the latest record per link.
+    print(job_store.path)
+    unique_count = job_store.compact()
+    # Make the shared SQLite database used by the ATS stage and the server hold
+    # exactly the jobs in the store: new and updated ones are written, jobs no
+    # longer in it (dropped by a fresh scrape) are pruned
+    JobDB().upsert_jobs(job_store, prune=True)
+    if job_index is not None:
+        job_index.save()
+    missing_pages = set(range(1, total_pages + 1)) - checkpoints.completed_pages()
+    if missing_pages:
+        cprint(f"[!] Pages {sorted(missing_pages)} did not complete; re-run with --resume to retry them.", color = 'yellow')
+    else:
+        checkpoints.clear()
     
     print("--------------------------------------------------------")
-    print(f"✅ Scraping complete. Data saved to jobs_data.json")
-    print(f"📊 Total raw items found: {len(all_raw_jobs)}")
-    print(f"🎯 Total unique jobs: {len(unique_jobs)}")
+    print(f"✅ Scraping complete. Data saved to jobs_data.jsonl")
+    print(f"📊 Total raw items found: {raw_job_count}")
+    print(f"🎯 Total unique jobs: {unique_count}")
+    if detail_cache:
+        print(f"🗄️  Detail cache: {detail_cache.stats()}")
+    site_limiter = get_limiter(baseURL)
+    print(f"🚦 Final request rate: {site_limiter.current_rate:.2f}/s ({site_limiter.backoffs} backoffs)")
     print("--------------------------------------------------------")
 
     # finalize_to_json(all_jobs, filename="ClearanceJobs/JobData/jobs_data.json")
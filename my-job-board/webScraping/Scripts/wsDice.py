@@ -2,32 +2,24 @@ from bs4 import BeautifulSoup
 import requests,random,time,re
 import  _init__
 from common.helper import cprint 
+from common.fetch import fetch
+from common.parsing import make_soup
 import os,json
 import re
 from pprint import pprint
 
-def jitter():
-    jitterTime = random.uniform(0, 1)  # Random time between 0 to 2 seconds
-    print(f"Jittering for {jitterTime:.2f} seconds...",end='\r')
-    time.sleep(jitterTime)  # Random delay to mimic human behavior
-
 def get_dice_links(url):
-    # 1. Set a User-Agent to look like a real browser
-    # Dice may block requests that look like basic Python scripts
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-    }
-
-    # 2. Use requests to get the actual HTML document
+    # 1. Use the pooled session to get the actual HTML document
+    # (it sends browser headers; Dice may block basic Python scripts)
     print(f"Fetching: {url}")
-    response = requests.get(url, headers=headers)
+    response = fetch(url)
     
     if response.status_code != 200:
         print(f"Failed to retrieve page: Status {response.status_code}")
         return []
 
-    # 3. Feed the CONTENT (response.text) to BeautifulSoup, not the URL
-    soup = BeautifulSoup(response.text, 'html.parser')
+    # 2. Feed the CONTENT (response.text) to BeautifulSoup, not the URL
+    soup = make_soup(response.text)
     
     links = []
     # Target the data-testid you found earlier
@@ -44,25 +36,19 @@ def get_total_pages(url):
     """
     Downloads the page and parses the pagination to find the total pages.
     """
-    # 1. Setup headers to avoid bot detection
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-        'Accept-Language': 'en-US,en;q=0.9',
-    }
-
     try:
-        # 2. Perform the request inside the function
-        response = requests.get(url, headers=headers, timeout=10)
+        # 1. Perform the request through the pooled session (browser headers included)
+        response = fetch(url)
         
         # Check if the request was successful
         if not response.ok:
             print(f"❌ Failed to reach Dice. Status Code: {response.status_code}")
             return 1
 
-        # 3. Parse the HTML content
-        soup = BeautifulSoup(response.text, 'html.parser')
+        # 2. Parse the HTML content
+        soup = make_soup(response.text)
 
-        # 4. Locate the pagination section
+        # 3. Locate the pagination section
         # We look for <section aria-label="Page 1 of 25">
         pagination_sec = soup.find('section', {'aria-label': lambda x: x and 'Page' in x and 'of' in x})
         
@@ -136,13 +122,10 @@ def get_full_job_details(url):
     """
     Fetches the skills list and the full description text from a Dice job page.
     """
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-    }
     try:
-        response = requests.get(url, headers=headers, timeout=10)
+        response = fetch(url)
         response.raise_for_status()
-        soup = BeautifulSoup(response.text, 'html.parser')
+        soup = make_soup(response.text)
         
         role_node = soup.find("h1")
         role_name = role_node.get_text(strip=True) if role_node else "Unknown Role"
@@ -8,11 +8,14 @@ import concurrent.futures
 from datetime import datetime
 import  _init__
 from common.helper import cprint 
+from common.fetch import fetch
 
-def fetch_linkedin_profile(linkedin_url, headers):
-    """Fetches and parses a LinkedIn profile page."""
+def fetch_linkedin_profile(linkedin_url, headers=None):
+    """Fetches and parses a LinkedIn profile page.
+    headers: extra headers (e.g. the li_at Cookie) sent on top of the shared defaults.
+    """
     # try:
-    response = requests.get(linkedin_url, headers=headers)
+    response = fetch(linkedin_url, headers=headers)
     response.raise_for_status()
     soup = BeautifulSoup(response.text, 'html.parser')
     
@@ -46,7 +49,6 @@ linkedin_url = "https://www.linkedin.com/in/some-profile/"
 # userPorfile = input("Enter your LinkedIn profile URL (for headers): ")
 userPorfile = "https://www.linkedin.com/in/kristopher-moye/"
 headers = {
-    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
     'Cookie': f'li_at={userPorfile};'
 }
 profile_data = fetch_linkedin_profile(linkedin_url, headers)
@@ -8,15 +8,11 @@ import concurrent.futures
 from datetime import datetime
 import  _init__
 from common.helper import cprint 
+from common.fetch import fetch
 
 global BASE_URL
 BASE_URL = "https://wellfound.com"
 
-def jitter():
-    jitterTime = random.uniform(0, 1)  # Random time between 0 to 2 seconds
-    print(f"Jittering for {jitterTime:.2f} seconds...",end='\r')
-    time.sleep(jitterTime)  # Random delay to mimic human behavior
-
 
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
@@ -60,9 +56,8 @@ print(get_rendered_soup("https://wellfound.com/location/los-angeles"))
 
 def get_company_links(page_number):
     url = f"https://wellfound.com/location/los-angeles?page={page_number}"
-    headers = {"User-Agent": "Mozilla/5.0"}
 
-    response = requests.get(url, headers=headers)
+    response = fetch(url)
     soup = BeautifulSoup(response.text, "html.parser")
 
     company_links = []
@@ -96,10 +91,8 @@ pprint(all_companies)
 #########################################
 def parse_clearance_job_html(url: str):
     """Fetch the job list page for the given URL and return job card elements."""
-    headers = {"User-Agent": "Mozilla/5.0"} # Mimics a real browser
-
     try:
-        response = requests.get(url, headers=headers, timeout=10)
+        response = fetch(url)
         response.raise_for_status()
         html_content = response.text
     except Exception as e:
@@ -114,12 +107,9 @@ def parse_clearance_job_html(url: str):
 
 def get_full_job_details(url):
     """Fetches the full description from a standalone link."""
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-    }
     try:
         # 1. Fetch the page
-        response = requests.get(url, headers=headers, timeout=10)
+        response = fetch(url)
         response.raise_for_status()
         
         # 2. Parse the specific div
@@ -212,7 +202,6 @@ def process_scraped_data(job_cards, seen_links: set = None):
             cprint(f"{idx} |Deep scraping: {role_name}...", color = 'blue')
             full_description = get_full_job_details(role_link)
             salary_data = extract_salary(full_description)
-            jitter()
 
             # 2. Company
             company_node = card.select_one('.job-search-list-item-desktop__company-name a')
@@ -318,10 +307,7 @@ def scrape_page_worker(page_num, base_url):
     cprint(f"[+] Scraping Page {page_num}: {current_url}",color = 'green')
 
     try:
-        # Note: jitter() is usually for sequential; in multi-threading, 
-        # the natural spread of thread start times often provides enough 'jitter'.
-        # jitter() 
-        
+        # Requests are paced by the site's adaptive rate limiter inside fetch()
         data = parse_clearance_job_html(current_url)
         
         # We pass an empty set here because we will de-duplicate 